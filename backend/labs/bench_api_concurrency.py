@@ -0,0 +1,140 @@
+"""
+Benchmark de concurrence de l'API : latence des requêtes légères pendant que des requêtes
+lourdes (diff, détails, graphe...) occupent le serveur.
+
+    uvicorn src.main:app --port 8000
+    python -m labs.bench_api_concurrency --slow /diff/1/2 --slow /diff/1/2/details --concurrency 64
+
+Deux phases :
+1. Référence : sondes seules sur --probe (/health par défaut)
+2. Charge : --concurrency clients enchaînent les --slow en boucle, les sondes continuent
+
+On lit le p99 des sondes sous charge : avec des endpoints bloquants, il suit la durée des requêtes
+lourdes (threadpool saturé) ; avec l'accès async aux données, il reste proche de la référence.
+Client en bibliothèque standard (threads + urllib) : rien à installer en plus de l'API.
+"""
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+def _request(url: str, timeout: float) -> Optional[float]:
+    """Durée d'un GET complet (corps lu) en secondes, None en cas d'erreur ou de timeout."""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        logger.debug(f"❌ {url} : {e}")
+        return None
+    return time.perf_counter() - started
+
+
+def percentile(samples: List[float], rank: float) -> float:
+    """Percentile au rang le plus proche (samples non vide)."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(rank / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples: List[Optional[float]]) -> Dict[str, float]:
+    """{"count", "errors", "p50", "p95", "p99", "max"} en millisecondes."""
+    ok = [sample for sample in samples if sample is not None]
+    summary = {"count": len(samples), "errors": len(samples) - len(ok)}
+    if ok:
+        summary.update({f"p{rank}": percentile(ok, rank) * 1000 for rank in (50, 95, 99)})
+        summary["max"] = max(ok) * 1000
+    return summary
+
+
+def probe(url: str, duration: float, interval: float, timeout: float) -> List[Optional[float]]:
+    """Sonde `url` toutes les `interval` secondes pendant `duration` secondes."""
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        samples.append(_request(url, timeout))
+        time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+    return samples
+
+
+def load(urls: List[str], concurrency: int, stop: threading.Event, timeout: float,
+         samples: List[Optional[float]]):
+    """Démarre `concurrency` clients qui enchaînent les requêtes lourdes jusqu'à `stop`."""
+    lock = threading.Lock()
+
+    def client(index: int):
+        position = index
+        while not stop.is_set():
+            elapsed = _request(urls[position % len(urls)], timeout)
+            position += 1
+            with lock:
+                samples.append(elapsed)
+
+    workers = [threading.Thread(target=client, args=(index,), daemon=True) for index in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def _log_summary(label: str, summary: Dict[str, float]):
+    if "p50" not in summary:
+        logger.warning(f"{label:<22} {summary['count']} requêtes, toutes en erreur")
+        return
+    logger.info(
+        f"{label:<22} n={summary['count']:<6} err={summary['errors']:<4} "
+        f"p50={summary['p50']:8.1f}ms  p95={summary['p95']:8.1f}ms  "
+        f"p99={summary['p99']:8.1f}ms  max={summary['max']:8.1f}ms"
+    )
+
+
+def run(base_url: str, slow_paths: List[str], probe_path: str, concurrency: int,
+        duration: float, interval: float, timeout: float) -> dict:
+    """Exécute les deux phases et renvoie {"baseline", "under_load", "slow"}."""
+    base_url = base_url.rstrip("/")
+    probe_url = f"{base_url}{probe_path}"
+    if _request(probe_url, timeout) is None:
+        raise SystemExit(f"API injoignable : {probe_url}")
+
+    logger.info(f"📏 Référence : {probe_path} seul pendant {duration:.0f}s")
+    baseline = summarize(probe(probe_url, duration, interval, timeout))
+
+    logger.info(f"🔥 Charge : {concurrency} clients sur {', '.join(slow_paths)} pendant {duration:.0f}s")
+    stop = threading.Event()
+    slow_samples: List[Optional[float]] = []
+    workers = load([f"{base_url}{path}" for path in slow_paths], concurrency, stop, timeout, slow_samples)
+    time.sleep(min(1.0, duration / 10))  # les requêtes lourdes occupent le serveur avant la première sonde
+    under_load = summarize(probe(probe_url, duration, interval, timeout))
+    stop.set()
+    for worker in workers:
+        worker.join(timeout)
+
+    report = {"baseline": baseline, "under_load": under_load, "slow": summarize(slow_samples)}
+    _log_summary(f"{probe_path} (référence)", baseline)
+    _log_summary(f"{probe_path} (sous charge)", under_load)
+    _log_summary("requêtes lourdes", report["slow"])
+    if "p99" in baseline and "p99" in under_load:
+        logger.success(f"p99 {probe_path} : {baseline['p99']:.1f}ms → {under_load['p99']:.1f}ms sous charge")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence p99 de l'API sous charge concurrente")
+    parser.add_argument("--url", default="http://localhost:8000", help="Racine de l'API")
+    parser.add_argument("--slow", action="append", help="Endpoint lourd (répétable, défaut : /diff/1/2)")
+    parser.add_argument("--probe", default="/health", help="Endpoint léger mesuré")
+    parser.add_argument("--concurrency", type=int, default=64, help="Clients simultanés sur les endpoints lourds")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durée de chaque phase (secondes)")
+    parser.add_argument("--interval", type=float, default=0.05, help="Intervalle entre deux sondes (secondes)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Timeout par requête (secondes)")
+    args = parser.parse_args()
+    run(args.url, args.slow or ["/diff/1/2"], args.probe, args.concurrency,
+        args.duration, args.interval, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
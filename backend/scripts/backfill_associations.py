@@ -0,0 +1,64 @@
+"""
+Alimente l'index d'associations Postgres (BlobAssociation) pour les blobs stockés avant son introduction.
+
+    python -m scripts.backfill_associations
+
+Les nouveaux blobs sont indexés pendant la sync ; ce script relit dans MinIO les liens (_zibridge_links)
+des blobs qui n'ont encore aucune ligne d'index, par lots paginés sur le hash. Rejouable sans risque :
+seuls les blobs sans ligne sont relus (ceux qui n'ont réellement aucun lien le sont à chaque passage).
+"""
+import argparse
+
+from loguru import logger
+from sqlalchemy import exists
+from sqlmodel import Session, select
+
+from src.core.associations import AssociationIndex
+from src.core.models import Blob, BlobAssociation
+from src.core.snapshot import SnapshotEngine
+from src.utils.db import engine
+
+
+def backfill(chunk_size: int = 1000) -> dict:
+    """Indexe les liens des blobs non indexés. Renvoie {"scanned", "indexed"}."""
+    stats = {"scanned": 0, "indexed": 0}
+    reader = SnapshotEngine(snapshot_id=None)
+    last_hash = ""
+    while True:
+        with Session(engine) as session:
+            hashes = session.exec(
+                select(Blob.hash).where(
+                    Blob.hash > last_hash,
+                    ~exists().where(BlobAssociation.content_hash == Blob.hash)
+                ).order_by(Blob.hash).limit(chunk_size)
+            ).all()
+            if not hashes:
+                break
+            last_hash = hashes[-1]
+
+            blobs = reader.get_items_by_hash({content_hash: content_hash for content_hash in hashes})
+            indexed = 0
+            for content_hash, data in blobs.items():
+                if AssociationIndex.index_links(session, content_hash, data.get("_zibridge_links")):
+                    indexed += 1
+            # Liens ajoutés à des snapshots déjà complets : graphes en cache et ETags à invalider
+            if indexed:
+                AssociationIndex.bump_version(session)
+            session.commit()
+            stats["indexed"] += indexed
+        stats["scanned"] += len(hashes)
+        logger.info(f"🔗 {stats['scanned']} blobs parcourus, {stats['indexed']} indexés")
+
+    logger.success(f"✅ Index d'associations à jour : {stats['indexed']}/{stats['scanned']} blobs avec liens")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de l'index d'associations Postgres")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Blobs par lot")
+    args = parser.parse_args()
+    backfill(chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
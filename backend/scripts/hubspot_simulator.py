@@ -0,0 +1,619 @@
+"""
+Simulateur HubSpot local (API v3 objets / search / batch, v4 associations).
+
+Sert à mesurer la sync et la restauration sans réseau, avec le vrai RestApiConnector :
+
+    python -m scripts.hubspot_simulator --scale 20 --latency-ms 40 --rate-limit 100 --error-rate 0.01
+    HUBSPOT_API_BASE=http://localhost:8090 python zibridge.py sync
+
+Les données sont amorcées depuis les CSV générés par saas-dataset/saas_hubspot_dataset.py,
+répliqués `scale` fois (IDs décalés, emails rendus uniques) : le jeu est identique d'un lancement à l'autre.
+Les pannes (latence, 429, 5xx) sont tirées d'un générateur seedé.
+"""
+import argparse
+import csv
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from loguru import logger
+
+DATASET_DIR = Path(__file__).resolve().parent.parent / "saas-dataset"
+
+# Colonnes CSV → propriétés HubSpot, et colonnes d'association
+DATASET_MAPPING = {
+    "companies": {
+        "id": "company_id",
+        "properties": {"name": "company_name", "industry": "industry", "annualrevenue": "annual_revenue",
+                       "numberofemployees": "num_employees", "country": "country"},
+        "associations": {},
+    },
+    "contacts": {
+        "id": "contact_id",
+        "properties": {"firstname": "first_name", "lastname": "last_name", "email": "email",
+                       "phone": "phone", "jobtitle": "job_title"},
+        "associations": {"companies": "company_id"},
+    },
+    "deals": {
+        "id": "deal_id",
+        "properties": {"dealname": "deal_name", "amount": "amount", "dealstage": "stage", "closedate": "close_date"},
+        "associations": {"companies": "company_id", "contacts": "contact_id"},
+    },
+}
+
+# Propriétés gérées par HubSpot (lecture seule) et une propriété calculée à forte rotation
+SYSTEM_PROPERTIES = ["hs_object_id", "createdate", "lastmodifieddate"]
+CALCULATED_PROPERTIES = ["hs_analytics_num_page_views"]
+
+# Types d'association HUBSPOT_DEFINED (mêmes IDs que RestoreEngine._get_association_type_id)
+ASSOCIATION_TYPE_IDS = {
+    ("contacts", "companies"): 1, ("companies", "contacts"): 2,
+    ("deals", "contacts"): 3, ("contacts", "deals"): 4,
+    ("deals", "companies"): 5, ("companies", "deals"): 6,
+}
+
+# Unicité (409 "Existing ID") comme HubSpot
+UNIQUE_PROPERTIES = {"contacts": "email", "companies": "domain"}
+
+# Plafonds de l'API réelle
+MAX_PAGE_SIZE = 100
+MAX_SEARCH_PAGE_SIZE = 200
+MAX_SEARCH_RESULTS = 10_000
+MAX_BATCH_INPUTS = 100
+ASSOCIATIONS_PAGE_SIZE = 500
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat(timespec="milliseconds") + "Z"
+
+
+def _compare_value(value):
+    """Comparaison numérique si possible (IDs, montants), sinon lexicographique."""
+    try:
+        return (0, float(value))
+    except (TypeError, ValueError):
+        return (1, str(value))
+
+
+class SimulatedCRM:
+    """Base CRM en mémoire (thread-safe) avec les sémantiques HubSpot utilisées par Zibridge."""
+
+    def __init__(self, scale: int = 1, dataset_dir: Path = DATASET_DIR):
+        self.objects: Dict[str, Dict[str, dict]] = {object_type: {} for object_type in DATASET_MAPPING}
+        # {(from_type, to_type): {from_id: set(to_id)}} (les deux sens sont maintenus)
+        self.associations: Dict[Tuple[str, str], Dict[str, Set[str]]] = {}
+        self._next_id: Dict[str, int] = {}
+        # Index des propriétés uniques : {type: {valeur: id}}
+        self._unique: Dict[str, Dict[str, str]] = {object_type: {} for object_type in UNIQUE_PROPERTIES}
+        self._lock = threading.RLock()
+        self._seed(max(1, scale), dataset_dir)
+
+    # ========================================
+    # AMORÇAGE
+    # ========================================
+
+    def _seed(self, scale: int, dataset_dir: Path):
+        rows = {}
+        for object_type in DATASET_MAPPING:
+            with open(dataset_dir / f"{object_type}.csv", encoding="utf-8") as f:
+                rows[object_type] = list(csv.DictReader(f))
+        # Décalage d'IDs par réplique : chaque copie garde ses associations internes
+        offsets = {object_type: max(int(row[DATASET_MAPPING[object_type]["id"]]) for row in type_rows)
+                   for object_type, type_rows in rows.items()}
+
+        for replica in range(scale):
+            for object_type, mapping in DATASET_MAPPING.items():
+                for row in rows[object_type]:
+                    object_id = str(int(row[mapping["id"]]) + replica * offsets[object_type])
+                    properties = {prop: row[column] for prop, column in mapping["properties"].items() if row.get(column)}
+                    if replica and "email" in properties:
+                        local, _, domain = properties["email"].partition("@")
+                        properties["email"] = f"{local}+{replica}@{domain}"
+                    self._insert(object_type, properties, object_id=object_id)
+                    for related_type, column in mapping["associations"].items():
+                        if row.get(column):
+                            related_id = str(int(row[column]) + replica * offsets[related_type])
+                            if related_id in self.objects[related_type]:
+                                self._associate(object_type, object_id, related_type, related_id)
+
+        counts = ", ".join(f"{len(items)} {object_type}" for object_type, items in self.objects.items())
+        logger.info(f"🧪 Simulateur amorcé (x{scale}) : {counts}")
+
+    # ========================================
+    # OBJETS
+    # ========================================
+
+    def _insert(self, object_type: str, properties: dict, object_id: str = None) -> dict:
+        if object_id is None:
+            object_id = str(self._next_id.get(object_type, 1))
+        self._next_id[object_type] = max(self._next_id.get(object_type, 1), int(object_id) + 1)
+        now = _now()
+        record = {
+            "id": object_id,
+            "properties": {**properties, "hs_object_id": object_id, "createdate": now, "lastmodifieddate": now,
+                           "hs_analytics_num_page_views": "0"},
+            "createdAt": now,
+            "updatedAt": now,
+            "archived": False,
+        }
+        self.objects[object_type][object_id] = record
+        self._index_unique(object_type, record)
+        return record
+
+    def _index_unique(self, object_type: str, record: dict):
+        unique = UNIQUE_PROPERTIES.get(object_type)
+        if unique and record["properties"].get(unique):
+            self._unique[object_type][record["properties"][unique]] = record["id"]
+
+    def find_duplicate(self, object_type: str, properties: dict) -> Optional[str]:
+        unique = UNIQUE_PROPERTIES.get(object_type)
+        value = properties.get(unique) if unique else None
+        if not value:
+            return None
+        object_id = self._unique[object_type].get(value)
+        # L'index peut garder une ancienne valeur (objet supprimé ou modifié)
+        if object_id in self.objects[object_type] and self.objects[object_type][object_id]["properties"].get(unique) == value:
+            return object_id
+        return None
+
+    def create(self, object_type: str, properties: dict) -> Tuple[Optional[dict], Optional[str]]:
+        """Retourne (objet créé, None) ou (None, ID existant) en cas de doublon."""
+        with self._lock:
+            existing_id = self.find_duplicate(object_type, properties)
+            if existing_id:
+                return None, existing_id
+            return self._insert(object_type, self._writable(properties)), None
+
+    def update(self, object_type: str, object_id: str, properties: dict) -> Optional[dict]:
+        with self._lock:
+            record = self.objects[object_type].get(object_id)
+            if record is None:
+                return None
+            now = _now()
+            record["properties"].update(self._writable(properties))
+            record["properties"]["lastmodifieddate"] = now
+            record["updatedAt"] = now
+            self._index_unique(object_type, record)
+            return record
+
+    def delete(self, object_type: str, object_id: str) -> bool:
+        with self._lock:
+            if self.objects[object_type].pop(object_id, None) is None:
+                return False
+            for (from_type, to_type), links in self.associations.items():
+                if from_type == object_type:
+                    links.pop(object_id, None)
+                elif to_type == object_type:
+                    for to_ids in links.values():
+                        to_ids.discard(object_id)
+            return True
+
+    @staticmethod
+    def _writable(properties: dict) -> dict:
+        return {k: v for k, v in properties.items() if k not in SYSTEM_PROPERTIES + CALCULATED_PROPERTIES}
+
+    @staticmethod
+    def project(record: dict, properties: Optional[List[str]]) -> dict:
+        """Vue API d'un objet : propriétés demandées (+ propriétés système)."""
+        keys = list(properties) if properties else ["createdate", "lastmodifieddate"]
+        props = {key: record["properties"].get(key) for key in dict.fromkeys(keys + ["hs_object_id"])}
+        return {**record, "properties": props}
+
+    def sorted_ids(self, object_type: str) -> List[str]:
+        with self._lock:
+            return sorted(self.objects[object_type], key=int)
+
+    # ========================================
+    # ASSOCIATIONS
+    # ========================================
+
+    def _associate(self, from_type: str, from_id: str, to_type: str, to_id: str):
+        self.associations.setdefault((from_type, to_type), {}).setdefault(from_id, set()).add(to_id)
+        self.associations.setdefault((to_type, from_type), {}).setdefault(to_id, set()).add(from_id)
+
+    def associate(self, from_type: str, from_id: str, to_type: str, to_id: str) -> bool:
+        with self._lock:
+            if from_id not in self.objects.get(from_type, {}) or to_id not in self.objects.get(to_type, {}):
+                return False
+            self._associate(from_type, from_id, to_type, to_id)
+            return True
+
+    def linked(self, from_type: str, from_id: str, to_type: str) -> List[str]:
+        with self._lock:
+            return sorted(self.associations.get((from_type, to_type), {}).get(from_id, ()), key=int)
+
+    def schema(self, object_type: str) -> List[dict]:
+        """Définitions des propriétés (format /crm/v3/properties)."""
+        names = list(DATASET_MAPPING[object_type]["properties"])
+        if object_type in UNIQUE_PROPERTIES and UNIQUE_PROPERTIES[object_type] not in names:
+            names.append(UNIQUE_PROPERTIES[object_type])
+        definitions = [{"name": name, "type": "string", "calculated": False, "hidden": False} for name in names]
+        definitions += [{"name": name, "type": "datetime" if "date" in name else "number", "calculated": False,
+                         "hidden": False, "modificationMetadata": {"readOnlyValue": True}} for name in SYSTEM_PROPERTIES]
+        definitions += [{"name": name, "type": "number", "calculated": True, "hidden": False} for name in CALCULATED_PROPERTIES]
+        return definitions
+
+
+class FaultInjector:
+    """Latence, rate-limit (fenêtre glissante comme HubSpot) et erreurs 5xx, seedés."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, rate_limit: int = 0,
+                 rate_window: float = 10.0, error_rate: float = 0.0, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._calls = deque()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "rate_limited": 0, "injected_errors": 0}
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter) / 1000
+
+    def check(self) -> Optional[Tuple[int, dict, dict]]:
+        """None si la requête passe, sinon (statut, corps, en-têtes) de l'erreur injectée."""
+        with self._lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            if self.rate_limit:
+                while self._calls and now - self._calls[0] >= self.rate_window:
+                    self._calls.popleft()
+                if len(self._calls) >= self.rate_limit:
+                    self.stats["rate_limited"] += 1
+                    retry_after = max(1, int(self.rate_window - (now - self._calls[0])) + 1)
+                    return 429, {
+                        "status": "error", "category": "RATE_LIMITS",
+                        "message": "You have reached your ten_secondly_rolling limit.",
+                        "policyName": "TEN_SECONDLY_ROLLING"
+                    }, {"Retry-After": str(retry_after)}
+                self._calls.append(now)
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats["injected_errors"] += 1
+                status = self._random.choice([500, 502, 503])
+                return status, {"status": "error", "category": "INTERNAL_ERROR", "message": "Injected failure"}, {}
+        return None
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    crm: SimulatedCRM = None
+    faults: FaultInjector = None
+    protocol_version = "HTTP/1.1"
+
+    ROUTES = [
+        ("GET", re.compile(r"^/__simulator/stats$"), "stats"),
+        ("GET", re.compile(r"^/crm/v3/properties/(?P<type>\w+)$"), "properties"),
+        ("GET", re.compile(r"^/crm/v3/objects/(?P<type>\w+)$"), "list_objects"),
+        ("POST", re.compile(r"^/crm/v3/objects/(?P<type>\w+)$"), "create_object"),
+        ("POST", re.compile(r"^/crm/v3/objects/(?P<type>\w+)/search$"), "search"),
+        ("POST", re.compile(r"^/crm/v3/objects/(?P<type>\w+)/batch/read$"), "batch_read"),
+        ("POST", re.compile(r"^/crm/v3/objects/(?P<type>\w+)/batch/update$"), "batch_update"),
+        ("POST", re.compile(r"^/crm/v3/objects/(?P<type>\w+)/batch/create$"), "batch_create"),
+        ("GET", re.compile(r"^/crm/v3/objects/(?P<type>\w+)/(?P<id>\d+)$"), "get_object"),
+        ("PATCH", re.compile(r"^/crm/v3/objects/(?P<type>\w+)/(?P<id>\d+)$"), "update_object"),
+        ("DELETE", re.compile(r"^/crm/v3/objects/(?P<type>\w+)/(?P<id>\d+)$"), "delete_object"),
+        ("POST", re.compile(r"^/crm/v4/associations/(?P<type>\w+)/(?P<to>\w+)/batch/read$"), "associations_read"),
+        ("POST", re.compile(r"^/crm/v4/associations/(?P<type>\w+)/(?P<to>\w+)/batch/create$"), "associations_create"),
+        ("PUT", re.compile(r"^/crm/v4/objects/(?P<type>\w+)/(?P<id>\d+)/associations/default/(?P<to>\w+)/(?P<to_id>\d+)$"),
+         "associate_default"),
+    ]
+
+    def log_message(self, format, *args):
+        logger.debug(f"🧪 {self.command} {self.path} → {format % args}")
+
+    # ========================================
+    # DISPATCH
+    # ========================================
+
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            self.body = json.loads(raw) if raw else {}
+        except ValueError:
+            return self._send(400, {"status": "error", "category": "VALIDATION_ERROR", "message": "Invalid JSON"})
+
+        for method, pattern, handler_name in self.ROUTES:
+            match = pattern.match(url.path) if method == self.command else None
+            if not match:
+                continue
+            params = match.groupdict()
+            if handler_name != "stats":
+                delay = self.faults.delay()
+                if delay:
+                    time.sleep(delay)
+                fault = self.faults.check()
+                if fault:
+                    return self._send(*fault)
+                for key in ("type", "to"):
+                    if key in params and params[key] not in self.crm.objects:
+                        return self._send(400, {"status": "error", "category": "VALIDATION_ERROR",
+                                                "message": f"Unable to infer object type from: {params[key]}"})
+            return getattr(self, handler_name)(**params)
+        self._send(404, {"status": "error", "category": "OBJECT_NOT_FOUND", "message": f"No route {self.command} {url.path}"})
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+    def _send(self, status: int, payload: Optional[dict] = None, headers: dict = None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _inputs(self) -> Optional[list]:
+        inputs = self.body.get("inputs", [])
+        if len(inputs) > MAX_BATCH_INPUTS:
+            self._send(400, {"status": "error", "category": "VALIDATION_ERROR",
+                             "message": f"Batch input limit is {MAX_BATCH_INPUTS}"})
+            return None
+        return inputs
+
+    @staticmethod
+    def _not_found(ids: List[str]) -> dict:
+        return {"status": "error", "category": "OBJECT_NOT_FOUND", "message": "Could not get some objects",
+                "context": {"ids": ids}}
+
+    # ========================================
+    # OBJETS (v3)
+    # ========================================
+
+    def stats(self):
+        counts = {object_type: len(items) for object_type, items in self.crm.objects.items()}
+        self._send(200, {**self.faults.stats, "objects": counts})
+
+    def properties(self, type: str):
+        self._send(200, {"results": self.crm.schema(type)})
+
+    def list_objects(self, type: str):
+        limit = min(int(self.query.get("limit", 10)), MAX_PAGE_SIZE)
+        after = int(self.query.get("after", 0))
+        properties = self.query["properties"].split(",") if self.query.get("properties") else None
+        ids = self.crm.sorted_ids(type)
+        page = ids[after:after + limit]
+        results = [self.crm.project(self.crm.objects[type][object_id], properties)
+                   for object_id in page if object_id in self.crm.objects[type]]
+        payload = {"results": results}
+        if after + limit < len(ids):
+            next_query = {**self.query, "after": str(after + limit), "limit": str(limit)}
+            host = self.headers.get("Host", "localhost")
+            payload["paging"] = {"next": {"after": str(after + limit),
+                                          "link": f"http://{host}/crm/v3/objects/{type}?{urlencode(next_query)}"}}
+        self._send(200, payload)
+
+    def get_object(self, type: str, id: str):
+        record = self.crm.objects[type].get(id)
+        if record is None:
+            return self._send(404, self._not_found([id]))
+        properties = self.query["properties"].split(",") if self.query.get("properties") else None
+        self._send(200, self.crm.project(record, properties))
+
+    def update_object(self, type: str, id: str):
+        record = self.crm.update(type, id, self.body.get("properties", {}))
+        if record is None:
+            return self._send(404, self._not_found([id]))
+        self._send(200, record)
+
+    def create_object(self, type: str):
+        record, existing_id = self.crm.create(type, self.body.get("properties", {}))
+        if existing_id:
+            return self._send(409, {"status": "error", "category": "CONFLICT",
+                                    "message": f"Object already exists. Existing ID: {existing_id}"})
+        self._send(201, record)
+
+    def delete_object(self, type: str, id: str):
+        self._send(204 if self.crm.delete(type, id) else 404)
+
+    def search(self, type: str):
+        limit = min(int(self.body.get("limit", 10)), MAX_SEARCH_PAGE_SIZE)
+        after = int(self.body.get("after", 0))
+        if after + limit > MAX_SEARCH_RESULTS:
+            return self._send(400, {"status": "error", "category": "VALIDATION_ERROR",
+                                    "message": f"Search results are limited to {MAX_SEARCH_RESULTS}"})
+        with self.crm._lock:
+            records = [record for record in self.crm.objects[type].values()
+                       if self._matches(record, self.body.get("filterGroups", []))]
+        for sort in reversed(self.body.get("sorts", [])):
+            name = sort["propertyName"] if isinstance(sort, dict) else sort
+            descending = isinstance(sort, dict) and sort.get("direction") == "DESCENDING"
+            records.sort(key=lambda record: _compare_value(record["properties"].get(name)), reverse=descending)
+        if not self.body.get("sorts"):
+            records.sort(key=lambda record: int(record["id"]))
+
+        page = records[after:after + limit]
+        payload = {"total": len(records), "results": [self.crm.project(r, self.body.get("properties")) for r in page]}
+        if after + limit < len(records):
+            payload["paging"] = {"next": {"after": str(after + limit)}}
+        self._send(200, payload)
+
+    @staticmethod
+    def _matches(record: dict, filter_groups: list) -> bool:
+        """filterGroups : OU entre groupes, ET entre filtres d'un groupe."""
+        if not filter_groups:
+            return True
+        for group in filter_groups:
+            if all(SimulatorHandler._match_filter(record, f) for f in group.get("filters", [])):
+                return True
+        return False
+
+    @staticmethod
+    def _match_filter(record: dict, filter_: dict) -> bool:
+        value = record["properties"].get(filter_["propertyName"])
+        operator = filter_["operator"]
+        if operator == "HAS_PROPERTY":
+            return value not in (None, "")
+        if operator == "NOT_HAS_PROPERTY":
+            return value in (None, "")
+        if operator == "IN":
+            return str(value) in {str(v) for v in filter_.get("values", [])}
+        if value is None:
+            return False
+        left, right = _compare_value(value), _compare_value(filter_.get("value"))
+        return {
+            "EQ": left == right, "NEQ": left != right,
+            "LT": left < right, "LTE": left <= right,
+            "GT": left > right, "GTE": left >= right,
+        }.get(operator, False)
+
+    def batch_read(self, type: str):
+        inputs = self._inputs()
+        if inputs is None:
+            return
+        properties = self.body.get("properties")
+        results, missing = [], []
+        for entry in inputs:
+            record = self.crm.objects[type].get(str(entry["id"]))
+            if record is None:
+                missing.append(str(entry["id"]))
+            else:
+                results.append(self.crm.project(record, properties))
+        payload = {"status": "COMPLETE", "results": results}
+        if missing:
+            payload["errors"] = [self._not_found(missing)]
+        self._send(207 if missing else 200, payload)
+
+    def batch_update(self, type: str):
+        inputs = self._inputs()
+        if inputs is None:
+            return
+        missing = [str(entry["id"]) for entry in inputs if str(entry["id"]) not in self.crm.objects[type]]
+        if missing:
+            # Comme HubSpot : un seul ID inconnu fait échouer tout le lot
+            return self._send(400, self._not_found(missing))
+        results = [self.crm.update(type, str(entry["id"]), entry.get("properties", {})) for entry in inputs]
+        self._send(200, {"status": "COMPLETE", "results": results})
+
+    def batch_create(self, type: str):
+        inputs = self._inputs()
+        if inputs is None:
+            return
+        with self.crm._lock:
+            for entry in inputs:
+                existing_id = self.crm.find_duplicate(type, entry.get("properties", {}))
+                if existing_id:
+                    # Un doublon bloque tout le lot
+                    return self._send(409, {"status": "error", "category": "CONFLICT",
+                                            "message": f"Object already exists. Existing ID: {existing_id}"})
+            results = []
+            for entry in inputs:
+                record, _ = self.crm.create(type, entry.get("properties", {}))
+                results.append({**record, "objectWriteTraceId": entry.get("objectWriteTraceId")})
+        self._send(201, {"status": "COMPLETE", "results": results})
+
+    # ========================================
+    # ASSOCIATIONS (v4)
+    # ========================================
+
+    def associations_read(self, type: str, to: str):
+        inputs = self._inputs()
+        if inputs is None:
+            return
+        type_id = ASSOCIATION_TYPE_IDS.get((type, to), 1)
+        results, empty = [], []
+        for entry in inputs:
+            from_id = str(entry["id"])
+            to_ids = self.crm.linked(type, from_id, to)
+            start = int(entry.get("after") or 0)
+            page = to_ids[start:start + ASSOCIATIONS_PAGE_SIZE]
+            if not page:
+                empty.append(from_id)
+                continue
+            result = {
+                "from": {"id": from_id},
+                "to": [{"toObjectId": int(to_id),
+                        "associationTypes": [{"category": "HUBSPOT_DEFINED", "typeId": type_id, "label": None}]}
+                       for to_id in page]
+            }
+            if start + ASSOCIATIONS_PAGE_SIZE < len(to_ids):
+                result["paging"] = {"next": {"after": str(start + ASSOCIATIONS_PAGE_SIZE)}}
+            results.append(result)
+        payload = {"status": "COMPLETE", "results": results}
+        if empty:
+            payload["errors"] = [{"status": "error", "category": "OBJECT_NOT_FOUND",
+                                  "subCategory": "crm.associations.NO_ASSOCIATIONS_FOUND", "context": {"fromObjectId": empty}}]
+        self._send(207 if empty else 200, payload)
+
+    def associations_create(self, type: str, to: str):
+        inputs = self._inputs()
+        if inputs is None:
+            return
+        results, failed = [], []
+        for entry in inputs:
+            from_id, to_id = str(entry["from"]["id"]), str(entry["to"]["id"])
+            if self.crm.associate(type, from_id, to, to_id):
+                results.append({"fromObjectTypeId": type, "fromObjectId": int(from_id),
+                                "toObjectTypeId": to, "toObjectId": int(to_id), "labels": []})
+            else:
+                failed.append(from_id)
+        payload = {"status": "COMPLETE", "results": results}
+        if failed:
+            payload["errors"] = [self._not_found(failed)]
+        self._send(207 if failed else 201, payload)
+
+    def associate_default(self, type: str, id: str, to: str, to_id: str):
+        if not self.crm.associate(type, id, to, to_id):
+            return self._send(404, self._not_found([id, to_id]))
+        self._send(200, {"fromObjectTypeId": type, "fromObjectId": int(id), "toObjectTypeId": to,
+                         "toObjectId": int(to_id), "labels": []})
+
+
+def serve(host: str = "127.0.0.1", port: int = 8090, crm: SimulatedCRM = None, faults: FaultInjector = None,
+          background: bool = False) -> ThreadingHTTPServer:
+    """
+    Démarre le simulateur. background=True : thread démon (benchmarks in-process),
+    le serveur renvoyé s'arrête avec server.shutdown().
+    """
+    handler = type("BoundSimulatorHandler", (SimulatorHandler,), {
+        "crm": crm or SimulatedCRM(),
+        "faults": faults or FaultInjector(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    logger.info(f"🧪 Simulateur HubSpot sur http://{host}:{server.server_port}")
+    if background:
+        threading.Thread(target=server.serve_forever, name="hubspot-simulator", daemon=True).start()
+    else:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulateur HubSpot local pour Zibridge")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--scale", type=int, default=1, help="Réplications du jeu saas-dataset")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latence ajoutée à chaque requête")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Jitter aléatoire (seedé) ajouté à la latence")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requêtes autorisées par fenêtre (0 = illimité)")
+    parser.add_argument("--rate-window", type=float, default=10.0, help="Fenêtre glissante du rate-limit (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 5xx injectées")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, SimulatedCRM(scale=args.scale), FaultInjector(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit=args.rate_limit,
+        rate_window=args.rate_window, error_rate=args.error_rate, seed=args.seed
+    ))
+
+
+if __name__ == "__main__":
+    main()
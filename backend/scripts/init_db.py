@@ -1,12 +1,44 @@
-from sqlmodel import SQLModel
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlmodel import Session, SQLModel, func, select
 from src.utils.db import engine
 # IMPORTANT : Importer les modèles pour que SQLModel les connaisse
-from src.core.models import Snapshot, Blob, SnapshotItem, IdMapping
+from src.core.models import Snapshot, Blob, SnapshotItem, BlobAssociation, IndexVersion, IdMapping, RestoreRun, RestoreOperation
 
 def create_db_and_tables():
     print("🔨 Création des tables dans PostgreSQL...")
     SQLModel.metadata.create_all(engine)
+    # create_all ignore les tables existantes : on ajoute les index manquants (migration)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    mark_legacy_snapshots_completed()
     print("✅ Tables créées avec succès !")
 
+# Une sync plus récente que ça peut être en cours : jamais marquée par la migration
+LEGACY_MIN_AGE = timedelta(hours=1)
+
+def mark_legacy_snapshots_completed() -> int:
+    """
+    Migration : les syncs antérieures au suivi du statut laissaient leurs snapshots "pending".
+    Ils sont marqués "completed" (cache HTTP, LiveEntityIndex, base du diff sélectif) : tous ceux qui
+    précèdent le premier snapshot finalisé par la sync actuelle (completed / failed), ou à défaut
+    ceux de plus de LEGACY_MIN_AGE. Idempotent.
+    """
+    with Session(engine) as session:
+        first_tracked = session.exec(
+            select(func.min(Snapshot.id)).where(Snapshot.status.in_(["completed", "failed"]))
+        ).one()
+        legacy = (Snapshot.status == "pending") | Snapshot.status.is_(None)
+        if first_tracked is not None:
+            legacy &= Snapshot.id < first_tracked
+        else:
+            legacy &= Snapshot.timestamp < datetime.utcnow() - LEGACY_MIN_AGE
+        migrated = session.execute(update(Snapshot).where(legacy).values(status="completed")).rowcount
+        session.commit()
+    if migrated:
+        print(f"🏷️ {migrated} snapshots antérieurs au suivi du statut marqués 'completed'")
+    return migrated
+
 if __name__ == "__main__":
     create_db_and_tables()
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+Migration du graphe Neo4j vers le modèle à intervalles de validité.
+
+Ancien modèle : une arête HAS_VERSION par entité et par snapshot, relations (WORKS_AT,
+ASSOCIATED_WITH...) sans dimension temporelle. Nouveau modèle (voir GraphManager) :
+une arête HAS_VERSION {hash, from_snap, to_snap} par version de contenu, et des relations
+portant le même intervalle [from_snap, to_snap).
+
+    python -m scripts.migrate_graph_intervals --dry-run
+    python -m scripts.migrate_graph_intervals
+
+- Les versions consécutives de même hash fusionnent ; une absence dans un snapshot ferme l'intervalle
+- Les snapshots 'failed' (extraction tronquée) sont ignorés : ils ne ferment rien
+- Les intervalles des relations sont recalculés depuis les liens (_zibridge_links) des blobs de chaque version ;
+  sans liens dans les blobs, une relation historique couvre toute la vie de l'entité
+- Idempotente : seules les arêtes sans from_snap (ancien modèle) sont migrées, par lots transactionnels
+"""
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlmodel import Session, select
+
+from src.core.associations import normalize_links
+from src.core.graph import REL_TYPES
+from src.core.models import Snapshot
+from src.core.snapshot import SnapshotEngine
+from src.utils.db import engine, neo4j_driver
+
+OBJECT_TYPES = ["companies", "contacts", "deals", "tickets"]
+
+
+def _valid_snapshots(session) -> List[int]:
+    """Snapshots du graphe, dans l'ordre, hors snapshots en échec."""
+    graph_snaps = {record["snap_id"] for record in session.run("MATCH (s:Snapshot) RETURN s.snap_id AS snap_id")}
+    with Session(engine) as db:
+        failed = set(db.exec(select(Snapshot.id).where(Snapshot.status == "failed")).all())
+    return sorted(graph_snaps - failed)
+
+
+def compute_intervals(seen: Dict[int, str], snap_ids: List[int]) -> List[dict]:
+    """
+    {snap_id: hash} (ancien modèle) → [{"hash", "from_snap", "to_snap"}].
+
+    to_snap est le premier snapshot où l'entité a changé ou disparu (None : toujours valide).
+    """
+    intervals = []
+    current: Optional[dict] = None
+    started = False
+    for snap_id in snap_ids:
+        started = started or snap_id in seen
+        if not started:
+            continue
+        item_hash = seen.get(snap_id)
+        if current and current["hash"] == item_hash:
+            continue
+        if current:
+            current["to_snap"] = snap_id
+            current = None
+        if item_hash:
+            current = {"hash": item_hash, "from_snap": snap_id, "to_snap": None}
+            intervals.append(current)
+    return intervals
+
+
+def _links_of(blob: Optional[dict]) -> Optional[Dict[str, List[str]]]:
+    """Liens stockés dans un blob (même lecture que la restauration), None si le blob n'en porte pas."""
+    if not blob or "_zibridge_links" not in blob:
+        return None
+    return normalize_links(blob["_zibridge_links"])
+
+
+def relation_intervals(object_type: str, versions: List[dict], blobs: Dict[str, dict],
+                       legacy: List[Tuple[str, str]]) -> List[dict]:
+    """
+    Intervalles des relations sortantes d'une entité : [{"rel_type", "related_type", "related_id", "from_snap", "to_snap"}].
+
+    Args:
+        versions: Intervalles de versions (compute_intervals)
+        legacy: Relations de l'ancien modèle [(related_type, related_id)], utilisées si les blobs n'ont pas de liens
+    """
+    per_version = [_links_of(blobs.get(version["hash"])) for version in versions]
+    if all(links is None for links in per_version):
+        # Pas d'historique des liens : la relation couvre toute la vie de l'entité
+        lifetime_start = versions[0]["from_snap"]
+        lifetime_end = versions[-1]["to_snap"]
+        return [
+            {"rel_type": REL_TYPES[(object_type, related_type)], "related_type": related_type, "related_id": related_id,
+             "from_snap": lifetime_start, "to_snap": lifetime_end}
+            for related_type, related_id in legacy if (object_type, related_type) in REL_TYPES
+        ]
+
+    intervals = []
+    open_links: Dict[Tuple[str, str], dict] = {}
+    previous_end = None
+    for version, links in zip(versions, per_version):
+        # Trou entre deux versions (entité supprimée puis recréée) : tout est fermé
+        if previous_end is not None and version["from_snap"] != previous_end:
+            for interval in open_links.values():
+                interval["to_snap"] = previous_end
+            open_links = {}
+        current = {
+            (related_type, related_id)
+            for related_type, related_ids in (links or {}).items() if (object_type, related_type) in REL_TYPES
+            for related_id in related_ids
+        }
+        for key in list(open_links):
+            if key not in current:
+                open_links.pop(key)["to_snap"] = version["from_snap"]
+        for related_type, related_id in current:
+            if (related_type, related_id) not in open_links:
+                interval = {"rel_type": REL_TYPES[(object_type, related_type)], "related_type": related_type,
+                            "related_id": related_id, "from_snap": version["from_snap"], "to_snap": None}
+                open_links[(related_type, related_id)] = interval
+                intervals.append(interval)
+        previous_end = version["to_snap"]
+    for interval in open_links.values():
+        interval["to_snap"] = previous_end
+    return intervals
+
+
+def _load_legacy(session, object_type: str) -> Dict[str, dict]:
+    """Versions et relations de l'ancien modèle : {external_id: {"seen": {snap: hash}, "relations": [...]}}."""
+    entities: Dict[str, dict] = {}
+    result = session.run("""
+    MATCH (e:Entity {type: $obj_type})-[v:HAS_VERSION]->(s:Snapshot)
+    WHERE v.from_snap IS NULL
+    RETURN e.external_id AS ext_id, s.snap_id AS snap_id, v.hash AS hash
+    """, obj_type=object_type)
+    for record in result:
+        entity = entities.setdefault(record["ext_id"], {"seen": {}, "relations": []})
+        entity["seen"][record["snap_id"]] = record["hash"]
+
+    result = session.run("""
+    MATCH (e:Entity {type: $obj_type})-[r]->(related:Entity)
+    WHERE r.from_snap IS NULL
+    RETURN e.external_id AS ext_id, related.type AS related_type, related.external_id AS related_id
+    """, obj_type=object_type)
+    for record in result:
+        if record["ext_id"] in entities:
+            entities[record["ext_id"]]["relations"].append((record["related_type"], record["related_id"]))
+    return entities
+
+
+def _write_chunk(session, object_type: str, ext_ids: List[str], versions: List[dict], relations: List[dict]):
+    """Remplace, dans une transaction, les arêtes legacy d'un lot d'entités par leurs intervalles."""
+    with session.begin_transaction() as tx:
+        tx.run("""
+        UNWIND $ext_ids AS ext_id
+        MATCH (e:Entity {external_id: ext_id, type: $obj_type})-[r]->()
+        WHERE r.from_snap IS NULL AND (type(r) = 'HAS_VERSION' OR type(r) IN $rel_types)
+        DELETE r
+        """, ext_ids=ext_ids, obj_type=object_type, rel_types=sorted(set(REL_TYPES.values())))
+        tx.run("""
+        UNWIND $rows AS row
+        MATCH (e:Entity {external_id: row.ext_id, type: $obj_type})
+        MERGE (s:Snapshot {snap_id: row.from_snap})
+        CREATE (e)-[:HAS_VERSION {hash: row.hash, from_snap: row.from_snap, to_snap: row.to_snap, at: datetime()}]->(s)
+        """, rows=versions, obj_type=object_type)
+        for rel_type in sorted({row["rel_type"] for row in relations}):
+            tx.run(f"""
+            UNWIND $rows AS row
+            MATCH (e:Entity {{external_id: row.ext_id, type: $obj_type}})
+            MERGE (t:Entity {{external_id: row.related_id, type: row.related_type}})
+            CREATE (e)-[:{rel_type} {{from_snap: row.from_snap, to_snap: row.to_snap}}]->(t)
+            """, rows=[row for row in relations if row["rel_type"] == rel_type], obj_type=object_type)
+        tx.commit()
+
+
+def migrate(dry_run: bool = False, chunk_size: int = 1000) -> dict:
+    """Migre tout le graphe. Renvoie {type: {"entities", "versions", "relations"}}."""
+    report = {}
+    with neo4j_driver.session() as session:
+        if not dry_run:
+            # Les MERGE par (type, external_id) de la sync et de la migration s'appuient sur ces index
+            session.run("CREATE INDEX entity_key IF NOT EXISTS FOR (e:Entity) ON (e.type, e.external_id)")
+            session.run("CREATE INDEX snapshot_key IF NOT EXISTS FOR (s:Snapshot) ON (s.snap_id)")
+        snap_ids = _valid_snapshots(session)
+        logger.info(f"🕰️ Migration du graphe sur {len(snap_ids)} snapshots")
+
+        for object_type in OBJECT_TYPES:
+            entities = _load_legacy(session, object_type)
+            stats = {"entities": len(entities), "versions": 0, "relations": 0}
+            ext_ids = list(entities)
+            for start in range(0, len(ext_ids), chunk_size):
+                chunk = ext_ids[start:start + chunk_size]
+                intervals = {ext_id: compute_intervals(entities[ext_id]["seen"], snap_ids) for ext_id in chunk}
+                hashes = {version["hash"]: version["hash"] for versions in intervals.values() for version in versions}
+                blobs = SnapshotEngine(snapshot_id=None).get_items_by_hash(hashes) if hashes else {}
+
+                version_rows, relation_rows = [], []
+                for ext_id, versions in intervals.items():
+                    if not versions:
+                        continue
+                    version_rows += [{"ext_id": ext_id, **version} for version in versions]
+                    relation_rows += [
+                        {"ext_id": ext_id, **interval}
+                        for interval in relation_intervals(object_type, versions, blobs, entities[ext_id]["relations"])
+                    ]
+                stats["versions"] += len(version_rows)
+                stats["relations"] += len(relation_rows)
+                if not dry_run:
+                    _write_chunk(session, object_type, chunk, version_rows, relation_rows)
+
+            if entities:
+                logger.success(f"✅ {object_type} : {stats['entities']} entités → {stats['versions']} versions, {stats['relations']} relations")
+            report[object_type] = stats
+
+    if dry_run:
+        logger.info("🔍 Dry-run : aucune écriture")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migration du graphe Neo4j vers les intervalles de validité")
+    parser.add_argument("--dry-run", action="store_true", help="Calcule les intervalles sans rien écrire")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Entités par transaction")
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,23 @@ from sqlmodel import Session
 
 # On importe nos outils centralisés
 from src.utils.db import engine, get_neo4j_session, storage_manager
-from src.connectors.rest_api import RestApiConnector
+from src.connectors.rest_api import BATCH_SIZE, RestApiConnector
+from src.connectors.async_api import AsyncRestApiConnector
+from src.connectors.base import BaseConnector
+from src.utils.config import settings
 from src.core.snapshot import SnapshotEngine
 from src.core.diff import DiffEngine
 from src.core.models import Snapshot
 from src.core.graph import GraphManager
+from src.core.events import ProgressEmitter
 
 # Silence les warnings SSL sur Mac
 warnings.filterwarnings("ignore", message=".*OpenSSL 1.1.1+.*")
 
 def link_snapshots_in_graph(parent_id, child_id):
     """Lien Git-style dans Neo4j pour la lignée temporelle."""
+    if not settings.neo4j.enabled:
+        return
     with get_neo4j_session() as session:
         query = """
         MERGE (p:Snapshot {snap_id: $parent_id})
@@ -23,73 +29,31 @@ def link_snapshots_in_graph(parent_id, child_id):
         """
         session.run(query, parent_id=parent_id, child_id=child_id)
 
-def extract_relations(item: dict, obj_type: str) -> dict:
+def extract_relations(item: dict, obj_type: str, associations: dict = None) -> dict:
     """
-    Extrait les relations d'un objet HubSpot.
-    
+    Liens complets d'un objet HubSpot.
+
+    Args:
+        associations: Liens lus par l'étape d'associations (connector.fetch_associations)
+
     Returns:
         {
-            "company_id": "123",
-            "contact_id": "456",
-            "deal_id": "789"
+            "companies": ["123", "124"],
+            "contacts": ["456"]
         }
     """
-    relations = {}
-    
-    if obj_type == "contacts":
-        # Structure API HubSpot v4 : associations -> companies -> results -> [...]
-        associations = item.get("associations", {})
-        
-        if "companies" in associations:
-            companies_data = associations["companies"]
-            
-            # Cas 1: Format direct avec "results"
-            if isinstance(companies_data, dict) and "results" in companies_data:
-                results = companies_data["results"]
-                if results and len(results) > 0:
-                    relations["company_id"] = str(results[0]["id"])
-                    logger.debug(f"✅ Contact {item['id']} → Company {relations['company_id']}")
-            
-            # Cas 2: Format liste directe
-            elif isinstance(companies_data, list) and len(companies_data) > 0:
-                relations["company_id"] = str(companies_data[0]["id"])
-                logger.debug(f"✅ Contact {item['id']} → Company {relations['company_id']}")
-    
-    elif obj_type == "deals":
-        associations = item.get("associations", {})
-        
-        # Deal → Company
-        if "companies" in associations:
-            companies_data = associations["companies"]
-            if isinstance(companies_data, dict) and "results" in companies_data:
-                results = companies_data["results"]
-                if results and len(results) > 0:
-                    relations["company_id"] = str(results[0]["id"])
-            elif isinstance(companies_data, list) and len(companies_data) > 0:
-                relations["company_id"] = str(companies_data[0]["id"])
-        
-        # Deal → Contact
-        if "contacts" in associations:
-            contacts_data = associations["contacts"]
-            if isinstance(contacts_data, dict) and "results" in contacts_data:
-                results = contacts_data["results"]
-                if results and len(results) > 0:
-                    relations["contact_id"] = str(results[0]["id"])
-            elif isinstance(contacts_data, list) and len(contacts_data) > 0:
-                relations["contact_id"] = str(contacts_data[0]["id"])
+    relations = {related_type: list(ids) for related_type, ids in (associations or {}).items() if ids}
     
-    elif obj_type == "tickets":
+    if obj_type == "tickets":
         props = item.get("properties", {})
         
-        # Ticket → Contact
+        # Ticket → Contact / Company (propriétés, pas d'association v4 lue)
         contact_id = props.get("hs_ticket_contact_id")
         if contact_id:
-            relations["contact_id"] = str(contact_id)
-        
-        # Ticket → Company
+            relations["contacts"] = [str(contact_id)]
         company_id = props.get("hs_ticket_company_id")
         if company_id:
-            relations["company_id"] = str(company_id)
+            relations["companies"] = [str(company_id)]
     
     if relations:
         logger.debug(f"🔗 {obj_type}/{item['id']}: {relations}")
@@ -97,7 +61,49 @@ def extract_relations(item: dict, obj_type: str) -> dict:
     return relations
 
 
-def sync_all():
+def _ingest_page(obj_type: str, items: list, connector, engine_snap: SnapshotEngine, graph_mgr: GraphManager):
+    """Lit les associations d'une page (1 appel batch par type lié) puis stocke chaque objet. Renvoie les IDs."""
+    ids = [str(item.get("id") or item.get(f"{obj_type[:-1]}Id")) for item in items]
+    links = connector.fetch_associations(obj_type, ids)
+
+    for ext_id, item in zip(ids, items):
+        # --- INTELLIGENCE : Capture et Injection des relations ---
+        relations = extract_relations(item, obj_type, links.get(ext_id))
+        # On stocke ces relations DANS l'item pour que MinIO les garde en mémoire
+        item["_zibridge_links"] = relations
+        # Les associations inline éventuelles sont redondantes avec les liens complets
+        item.pop("associations", None)
+
+        # --- Ingestion (Stockage du JSON enrichi des liens) ---
+        engine_snap.process_item(obj_type, ext_id, item)
+
+        # --- Mise à jour du Graphe Neo4j (intervalles : seuls les liens changés sont écrits) ---
+        graph_mgr.sync_relations(engine_snap.snapshot_id, obj_type, ext_id, relations)
+
+    return ids
+
+
+def _set_snapshot_status(snap_id: int, status: str):
+    with Session(engine) as session:
+        snap = session.get(Snapshot, snap_id)
+        snap.status = status
+        session.add(snap)
+        session.commit()
+
+
+def sync_all(on_event=None, partitions: int = None, connector: BaseConnector = None):
+    """
+    Capture complète du CRM dans un nouveau snapshot.
+
+    Args:
+        on_event: Sink optionnel des événements de progression (voir ProgressEmitter)
+        partitions: Extraction parallèle par plages d'IDs (0 = pagination séquentielle,
+            None = HUBSPOT_EXTRACT_PARTITIONS)
+        connector: Connecteur à utiliser à la place de HubSpot (ex. SyntheticConnector pour les tests de charge)
+    """
+    if partitions is None:
+        partitions = settings.http.extract_partitions
+    progress = ProgressEmitter(on_event)
     # 1. Création du Snapshot dans Postgres
     with Session(engine) as session:
         new_snap = Snapshot(source="HubSpot_Production_API")
@@ -113,64 +119,84 @@ def sync_all():
         link_snapshots_in_graph(snap_id - 1, snap_id)
         logger.info(f"🔗 Graphe : Snap {snap_id-1} -> Snap {snap_id}")
 
-    engine_snap = SnapshotEngine(snapshot_id=snap_id)
-    graph_mgr = GraphManager()
-    connector = RestApiConnector()
-    objects = ["companies", "contacts", "deals"]
+    if connector is None:
+        connector = AsyncRestApiConnector(partitions=partitions) if partitions else RestApiConnector()
+    try:
+        progress.start_phase("extract")
+        engine_snap = SnapshotEngine(snapshot_id=snap_id)
+        graph_mgr = GraphManager()
+        objects = ["companies", "contacts", "deals"]
+        # IDs vus par type : les entités absentes sont fermées dans le graphe en fin de sync
+        seen_ids = {obj_type: set() for obj_type in objects}
 
-    for obj_type in objects:
-        logger.info(f"📥 Extraction : {obj_type}...")
-        count = 0
+        for obj_type in objects:
+            logger.info(f"📥 Extraction : {obj_type}...")
+            count = 0
         
-        for item in connector.extract_data(obj_type):
-            ext_id = str(item.get("id") or item.get(f"{obj_type[:-1]}Id"))
-            
-            # --- INTELLIGENCE : Capture et Injection des relations ---
-            relations = extract_relations(item, obj_type)
-            # On stocke ces relations DANS l'item pour que MinIO les garde en mémoire
-            item["_zibridge_links"] = relations 
-
-            # --- Ingestion (Stockage du JSON enrichi des liens) ---
-            engine_snap.process_item(obj_type, ext_id, item)
-
-            # --- Mise à jour du Graphe Neo4j ---
-            if obj_type == "contacts" and "company_id" in relations:
-                graph_mgr.create_belongs_to(ext_id, relations["company_id"])
-                logger.debug(f"🔗 Contact #{ext_id} → Company #{relations['company_id']}")
-            
-            elif obj_type == "deals":
-                graph_mgr.create_deal_relations(
-                    deal_id=ext_id,
-                    company_id=relations.get("company_id"),
-                    contact_id=relations.get("contact_id")
-                )
-                if relations:
-                    logger.debug(f"🔗 Deal #{ext_id} → {relations}")
-            
-            count += 1
-        
-        logger.success(f"✅ {obj_type} : {count} synchronisés.")
+            page = []
+            for item in connector.extract_data(obj_type):
+                page.append(item)
+                if len(page) >= BATCH_SIZE:
+                    seen_ids[obj_type].update(_ingest_page(obj_type, page, connector, engine_snap, graph_mgr))
+                    count += len(page)
+                    progress.tick(obj_type, len(page))
+                    page = []
+            if page:
+                seen_ids[obj_type].update(_ingest_page(obj_type, page, connector, engine_snap, graph_mgr))
+                count += len(page)
+                progress.tick(obj_type, len(page))
+
+            logger.success(f"✅ {obj_type} : {count} synchronisés.")
+    except Exception as e:
+        # Un snapshot tronqué ne doit jamais servir de référence (index live, restaurations)
+        _set_snapshot_status(snap_id, "failed")
+        progress.error(str(e))
+        progress.finish("failed")
+        logger.error(f"❌ Sync #{snap_id} en échec, snapshot marqué 'failed' : {e}")
+        raise
+    finally:
+        # Les connecteurs hors HTTP (synthétique) n'ont pas de transport
+        if getattr(connector, "http", None):
+            connector.http.log_metrics()
 
-    # 3. Rapport de Diff Automatique
+    # 3. Extraction complète : le snapshot devient une référence fiable (index live, restaurations)
+    _set_snapshot_status(snap_id, "completed")
+
+    # Suppressions : fermeture des intervalles des entités absentes de ce snapshot
+    for obj_type, ids in seen_ids.items():
+        try:
+            graph_mgr.close_missing(snap_id, obj_type, ids)
+        except Exception as e:
+            logger.warning(f"⚠️ Graphe : fermeture des {obj_type} supprimés impossible : {e}")
+
+    # 4. Rapport de Diff Automatique
+    progress.start_phase("diff")
     if snap_id > 1:
         logger.info(f"🔍 Comparaison avec le Snapshot précédent ({snap_id - 1})...")
         diff = DiffEngine(snap_id - 1, snap_id)
         report = diff.generate_report()
-        
+        # Diff des liens : ne lit que l'index des objets changés, pas de blob
+        links = diff.generate_association_report(report)
+    
         logger.info(f"""
 ==================================================
 📊 RAPPORT D'ACTIVITÉ - SNAPSHOT {snap_id}
 ✨ Nouveaux    : {len(report['created'])}
 🔄 Modifiés    : {len(report['updated'])}
 🗑️ Supprimés   : {len(report['deleted'])}
+🔗 Liens       : +{links['summary']['added']} / -{links['summary']['removed']}
 ==================================================
         """)
-        
+        for pair, changes in links["pairs"].items():
+            logger.info(f"🔗 {pair} : +{len(changes['added'])} / -{len(changes['removed'])}")
+    
         if report['updated']:
             changed_ids = [f"{item['type']}/{item['id']}" for item in report['updated']]
             logger.info(f"📝 Liste des changements : {changed_ids[:10]}")
-    
+
+    progress.finish()
     logger.success(f"🏁 Fin de session Zibridge (ID: {snap_id})")
+    return snap_id
 
 if __name__ == "__main__":
     sync_all()
\ No newline at end of file
@@ -0,0 +1,190 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, Callable, Generator, List, Optional, Tuple
+
+from loguru import logger
+
+from src.connectors.base import ExtractionError
+from src.connectors.rest_api import EXTRACT_PROPERTIES, RestApiConnector
+from src.utils.config import settings
+
+# Taille de page maximale de l'API search HubSpot
+SEARCH_PAGE_SIZE = 200
+# Partitions d'ID par type (plus que de workers : une partition dense ne bloque pas les autres)
+DEFAULT_PARTITIONS = 16
+# Requêtes search simultanées
+DEFAULT_CONCURRENCY = 4
+# Pages en attente entre le producteur asyncio et le consommateur (backpressure)
+BUFFERED_PAGES = 8
+
+
+class RateLimiter:
+    """
+    Limiteur de débit partagé (GCRA / token bucket) : `rate` requêtes par seconde, rafales de `burst`.
+
+    La réservation d'un créneau est protégée par un threading.Lock (section critique très courte),
+    l'attente se fait avec asyncio.sleep : le limiteur peut être partagé entre boucles et threads.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1.0 / rate
+        self.burst = max(1, burst)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            # Un crédit de `burst` créneaux au plus s'accumule pendant l'inactivité
+            self._next = max(self._next, now - (self.burst - 1) * self.interval)
+            wait = self._next - now
+            self._next += self.interval
+            return max(wait, 0.0)
+
+    async def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AsyncRestApiConnector(RestApiConnector):
+    """
+    Variante du connecteur HubSpot qui extrait un type en parallèle.
+
+    Les IDs (hs_object_id) sont découpés en plages indépendantes, paginées simultanément
+    via l'API search sous un limiteur de débit commun. Dans chaque plage, la pagination
+    se fait par clé (hs_object_id > dernier ID vu) : pas de plafond de 10 000 résultats.
+
+    extract_data reste un générateur synchrone (contrat BaseConnector) : une boucle asyncio
+    tourne dans un thread et alimente un flux unique, sans ordre garanti entre partitions.
+    Les pushs (update, batch, associations) et la lecture batch des associations
+    (fetch_associations) sont hérités de RestApiConnector.
+    """
+
+    def __init__(self, partitions: int = DEFAULT_PARTITIONS, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 rate: Optional[float] = None, properties: List[str] = None):
+        super().__init__()
+        self.partitions = max(1, partitions)
+        self.max_concurrency = max(1, max_concurrency)
+        # None : projection du schéma (par type)
+        self.properties = properties
+        self.rate_limiter = RateLimiter(rate or settings.http.search_rate, burst=self.max_concurrency)
+
+    def extract_data(self, object_type: str) -> Generator[dict[str, Any], None, None]:
+        """Flux fusionné de toutes les partitions d'un type."""
+        pages: queue.Queue = queue.Queue(maxsize=BUFFERED_PAGES)
+        stop = threading.Event()
+
+        def put(message: tuple) -> bool:
+            # put bloquant mais interruptible : False si le consommateur a abandonné le générateur
+            while not stop.is_set():
+                try:
+                    pages.put(message, timeout=0.2)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        producer = threading.Thread(
+            target=lambda: asyncio.run(self._produce(object_type, put)),
+            name=f"zibridge-extract-{object_type}", daemon=True
+        )
+        producer.start()
+        try:
+            while True:
+                kind, payload = pages.get()
+                if kind == "page":
+                    yield from payload
+                elif kind == "error":
+                    raise ExtractionError(object_type, payload)
+                else:
+                    break
+        finally:
+            stop.set()
+            producer.join(timeout=5)
+
+    # ========================================
+    # PRODUCTEUR ASYNCIO
+    # ========================================
+
+    async def _produce(self, object_type: str, put: Callable[[tuple], bool]):
+        try:
+            properties = self.properties or await asyncio.to_thread(
+                self.schema.projection, object_type, EXTRACT_PROPERTIES
+            )
+            ranges = await self._partition_ranges(object_type)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            counts = await asyncio.gather(*(
+                self._paginate_range(object_type, low, high, semaphore, put, properties) for low, high in ranges
+            ))
+            logger.info(f"⚡ {object_type} : {sum(counts)} objets extraits sur {len(ranges)} partitions")
+            put(("done", None))
+        except Exception as e:
+            logger.error(f"💥 Erreur lors de l'extraction parallèle {object_type} : {e}")
+            put(("error", str(e)))
+
+    async def _search(self, object_type: str, body: dict) -> dict:
+        """Un appel search (POST de lecture, rejouable) sous le limiteur partagé."""
+        await self.rate_limiter.acquire()
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        # Le transport (pool, retries 429/5xx) est synchrone : l'appel part dans un thread
+        response = await asyncio.to_thread(
+            self.http.post, f"{self.base_url}/{object_type}/search", json=body, headers=headers, idempotent=True
+        )
+        if response.status_code != 200:
+            raise ExtractionError(object_type, f"HTTP {response.status_code} sur search : {response.text[:200]}")
+        return response.json()
+
+    async def _partition_ranges(self, object_type: str) -> List[Tuple[int, int]]:
+        """Découpe [min ID, max ID] en plages [low, high) de tailles égales."""
+        bounds = []
+        for direction in ("ASCENDING", "DESCENDING"):
+            data = await self._search(object_type, {
+                "sorts": [{"propertyName": "hs_object_id", "direction": direction}],
+                "properties": ["hs_object_id"],
+                "limit": 1
+            })
+            results = data.get("results", [])
+            if not results:
+                return []
+            bounds.append(int(results[0]["id"]))
+        low, high = bounds[0], bounds[1] + 1
+
+        # Pas plus de partitions que de pages à lire
+        total = data.get("total") or (high - low)
+        count = max(1, min(self.partitions, -(-total // SEARCH_PAGE_SIZE), high - low))
+        step = -(-(high - low) // count)
+        return [(start, min(start + step, high)) for start in range(low, high, step)]
+
+    async def _paginate_range(self, object_type: str, low: int, high: int, semaphore: asyncio.Semaphore,
+                              put: Callable[[tuple], bool], properties: List[str]) -> int:
+        """Pagine une plage d'IDs par clé et pousse chaque page dans le flux commun."""
+        extracted = 0
+        last_id = None
+        async with semaphore:
+            while True:
+                lower = {"propertyName": "hs_object_id", "operator": "GTE", "value": str(low)}
+                if last_id is not None:
+                    lower = {"propertyName": "hs_object_id", "operator": "GT", "value": last_id}
+                data = await self._search(object_type, {
+                    "filterGroups": [{"filters": [
+                        lower,
+                        {"propertyName": "hs_object_id", "operator": "LT", "value": str(high)}
+                    ]}],
+                    "sorts": [{"propertyName": "hs_object_id", "direction": "ASCENDING"}],
+                    "properties": properties,
+                    "limit": SEARCH_PAGE_SIZE
+                })
+                results = data.get("results", [])
+                if results:
+                    if not await asyncio.to_thread(put, ("page", results)):
+                        return extracted
+                    extracted += len(results)
+                    last_id = str(results[-1]["id"])
+                if len(results) < SEARCH_PAGE_SIZE:
+                    return extracted
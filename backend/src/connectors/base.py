@@ -1,6 +1,14 @@
 from abc import ABC, abstractmethod
 from typing import Generator, Any
 
+class ExtractionError(Exception):
+    """L'extraction s'est arrêtée avant la fin : le snapshot serait incomplet."""
+
+    def __init__(self, object_type: str, reason: str):
+        super().__init__(f"Extraction {object_type} interrompue : {reason}")
+        self.object_type = object_type
+        self.reason = reason
+
 class BaseConnector(ABC):
     """
     C'est une Classe Abstraite. Elle ne peut pas être utilisée seule.
@@ -17,5 +25,6 @@ class BaseConnector(ABC):
         """
         Oblige chaque connecteur à extraire des données.
         Le type 'Generator' indique qu'on va utiliser 'yield' (tasse par tasse).
+        Doit lever ExtractionError plutôt que s'arrêter en silence sur une erreur.
         """
         pass
\ No newline at end of file
@@ -0,0 +1,197 @@
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+
+from src.utils.config import settings
+
+# Statuts transitoires : rate-limit HubSpot et erreurs serveur
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Méthodes rejouables sans risque de doublon (les POST de lecture/batch update le précisent à l'appel)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# /crm/v3/objects/contacts/123 → /crm/v3/objects/contacts/{id}
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+class EndpointStats:
+    """Compteurs d'un endpoint (méthode + chemin normalisé)."""
+
+    __slots__ = ("calls", "errors", "retries", "rate_limited", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class HttpTransport:
+    """
+    Transport HTTP partagé par les connecteurs HubSpot.
+
+    - Session requests : keep-alive et pool de connexions (une seule poignée de main TLS)
+    - Timeouts connect/read systématiques
+    - Retry avec backoff exponentiel (+ jitter) sur 429/5xx et erreurs réseau, en respectant Retry-After
+    - Métriques par endpoint : latence, retries, rate-limits, erreurs
+
+    Après épuisement des retries, la dernière réponse est renvoyée telle quelle (ou l'exception
+    réseau relevée) : l'appelant décide si l'échec est fatal.
+    """
+
+    def __init__(self, connect_timeout: float = None, read_timeout: float = None, max_retries: int = None,
+                 backoff_base: float = None, backoff_max: float = None, pool_size: int = None):
+        config = settings.http
+        self.timeout = (connect_timeout or config.connect_timeout, read_timeout or config.read_timeout)
+        self.max_retries = config.max_retries if max_retries is None else max_retries
+        self.backoff_base = backoff_base or config.backoff_base
+        self.backoff_max = backoff_max or config.backoff_max
+
+        pool_size = pool_size or config.pool_size
+        self.session = requests.Session()
+        # Les retries sont gérés ici (Retry-After, métriques), pas par urllib3
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    # ========================================
+    # REQUÊTES
+    # ========================================
+
+    def request(self, method: str, url: str, idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """
+        Exécute une requête avec retries.
+
+        Args:
+            idempotent: Autorise le rejeu sur 5xx / erreur réseau. Par défaut selon la méthode
+                (un POST de création n'est rejoué que sur 429, où HubSpot n'a rien écrit).
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = self._endpoint(method, url)
+
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(endpoint, started, error=True)
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"🔁 {endpoint} : {type(e).__name__}, nouvel essai dans {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+            else:
+                status = response.status_code
+                retryable = status == 429 or (status in RETRY_STATUSES and idempotent)
+                self._record(endpoint, started, error=status >= 400, rate_limited=status == 429)
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_after(response) or self._backoff(attempt)
+                logger.warning(f"🔁 {endpoint} : HTTP {status}, nouvel essai dans {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+            attempt += 1
+            with self._lock:
+                self._stats[endpoint].retries += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def _backoff(self, attempt: int) -> float:
+        """Backoff exponentiel plafonné, avec jitter pour désynchroniser les workers."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Délai imposé par l'en-tête Retry-After (secondes ou date HTTP)."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        return min(max(delay, 0.0), self.backoff_max)
+
+    # ========================================
+    # MÉTRIQUES
+    # ========================================
+
+    @staticmethod
+    def _endpoint(method: str, url: str) -> str:
+        return f"{method} {_ID_SEGMENT.sub('/{id}', urlsplit(url).path)}"
+
+    def _record(self, endpoint: str, started: float, error: bool = False, rate_limited: bool = False):
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, EndpointStats())
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if error:
+                stats.errors += 1
+            if rate_limited:
+                stats.rate_limited += 1
+
+    def metrics(self) -> Dict[str, dict]:
+        """Métriques par endpoint : {"POST /crm/v3/objects/contacts/batch/read": {...}}."""
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in sorted(self._stats.items())}
+
+    def log_metrics(self):
+        """Résumé des métriques dans les logs (fin de sync / restauration)."""
+        for endpoint, stats in self.metrics().items():
+            logger.info(
+                f"📶 {endpoint} : {stats['calls']} appels, {stats['avg_ms']}ms moy. (max {stats['max_ms']}ms), "
+                f"{stats['retries']} retries, {stats['rate_limited']} 429, {stats['errors']} erreurs"
+            )
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Transport partagé du processus (un seul pool de connexions)."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
@@ -1,17 +1,49 @@
-import requests
 import os
 from dotenv import load_dotenv
-from src.connectors.base import BaseConnector
-from typing import Generator, Any, Tuple
+from src.connectors.base import BaseConnector, ExtractionError
+from src.connectors.http import get_transport
+from src.connectors.schema import BASELINE_PROPERTIES, PropertySchemaService
+from src.utils.config import settings
+from typing import Callable, Generator, Any, Optional, Tuple, Dict, List
 from loguru import logger
 
 # Charge le .env pour récupérer le token
 load_dotenv()
 
+# Limite HubSpot des endpoints batch (read/update/create/associations)
+BATCH_SIZE = 100
+
+# Propriétés en lecture seule côté HubSpot (refusées en écriture)
+FORBIDDEN_PROPERTIES = [
+    "hs_object_id", "createdate", "lastmodifieddate",
+    "hs_lastmodifieddate", "hs_createdate", "id",
+    "createdAt", "updatedAt"
+]
+
+# Propriétés extraites si le schéma HubSpot est inaccessible
+EXTRACT_PROPERTIES = BASELINE_PROPERTIES
+
+# Longueur max du paramètre properties= des GET de liste (au-delà : 414 / URL tronquée) ;
+# le reste de la projection est lu page par page via batch/read (propriétés dans le corps POST)
+URL_PROPERTIES_MAX_CHARS = 2000
+
+# Associations lues (API v4 batch) pour chaque type extrait
+ASSOCIATION_TARGETS = {
+    "contacts": ["companies"],
+    "deals": ["companies", "contacts"],
+    "companies": ["contacts"],
+}
+
 class RestApiConnector(BaseConnector):
     def __init__(self):
         self.token = os.getenv("HUBSPOT_ACCESS_TOKEN")
-        self.base_url = "https://api.hubapi.com/crm/v3/objects"
+        self.api_base = settings.hubspot_api_base.rstrip("/")
+        self.base_url = f"{self.api_base}/crm/v3/objects"
+        self.associations_url = f"{self.api_base}/crm/v4/associations"
+        # Session partagée : keep-alive, timeouts, retries 429/5xx et métriques
+        self.http = get_transport()
+        # Schéma des propriétés (cache TTL) et projections par type (zibridge_config.json)
+        self.schema = PropertySchemaService(self)
         
         if not self.token:
             logger.error("❌ HUBSPOT_ACCESS_TOKEN manquant dans le .env")
@@ -21,28 +53,23 @@ class RestApiConnector(BaseConnector):
         url = f"{self.base_url}/contacts?limit=1"
         headers = {"Authorization": f"Bearer {self.token}"}
         try:
-            response = requests.get(url, headers=headers)
+            response = self.http.get(url, headers=headers)
             return response.status_code == 200
         except Exception as e:
             logger.error(f"❌ Test de connexion échoué : {e}")
             return False
 
     def extract_data(self, object_type: str) -> Generator[dict[str, Any], None, None]:
-        """Extrait les données AVEC ASSOCIATIONS via v3 API."""
-        
-        properties = "firstname,lastname,email,name,dealname"
-        associations_param = ""
+        """
+        Extrait les données via v3 API.
+        Les associations ne sont pas demandées inline (listes tronquées, pages alourdies) :
+        voir fetch_associations.
+        """
         
-        # ✅ FIX CRITIQUE : Associations réelles
-        if object_type == "contacts":
-            associations_param = "&associations=companies"
-            logger.info("📡 Contacts : associations=companies activé")
-        elif object_type == "deals":
-            associations_param = "&associations=companies,contacts"
-        elif object_type == "companies":
-            associations_param = "&associations=contacts"
-        
-        next_url = f"https://api.hubapi.com/crm/v3/objects/{object_type}?limit=100&properties={properties}{associations_param}"
+        inline, overflow = self._split_properties(self.schema.projection(object_type, fallback=EXTRACT_PROPERTIES))
+        next_url = f"{self.base_url}/{object_type}?limit=100&properties={','.join(inline)}"
+        if overflow:
+            logger.info(f"📐 {object_type} : {len(overflow)} propriétés lues via batch/read (URL trop longue)")
         
         headers = {
             "Authorization": f"Bearer {self.token}",
@@ -50,21 +77,47 @@ class RestApiConnector(BaseConnector):
         }
 
         while next_url:
+            # Les 429/5xx sont déjà rejoués par le transport : un échec ici tronquerait le snapshot
             try:
-                response = requests.get(next_url, headers=headers)
-                if response.status_code != 200:
-                    logger.error(f"❌ Erreur HubSpot ({response.status_code}): {response.text}")
-                    break
-
-                data = response.json()
-                for item in data.get("results", []):
-                    yield item
-
-                paging = data.get("paging")
-                next_url = paging.get("next", {}).get("link") if paging else None
+                response = self.http.get(next_url, headers=headers)
+                data = response.json() if response.status_code == 200 else None
             except Exception as e:
                 logger.error(f"💥 Erreur lors de l'extraction : {e}")
-                break
+                raise ExtractionError(object_type, str(e)) from e
+            if data is None:
+                logger.error(f"❌ Erreur HubSpot ({response.status_code}): {response.text}")
+                raise ExtractionError(object_type, f"HTTP {response.status_code}")
+
+            results = data.get("results", [])
+            if overflow:
+                self._merge_overflow(object_type, results, overflow)
+            for item in results:
+                yield item
+
+            paging = data.get("paging")
+            next_url = paging.get("next", {}).get("link") if paging else None
+
+    @staticmethod
+    def _split_properties(properties: List[str]) -> Tuple[List[str], List[str]]:
+        """Sépare la projection : ce qui tient dans l'URL de liste, le reste pour batch/read."""
+        inline, length = [], 0
+        for index, name in enumerate(properties):
+            length += len(name) + 1
+            if length > URL_PROPERTIES_MAX_CHARS:
+                return inline, properties[index:]
+            inline.append(name)
+        return inline, []
+
+    def _merge_overflow(self, object_type: str, results: List[dict], overflow: List[str]):
+        """Complète une page avec les propriétés hors URL ; un objet non relu ferait varier son hash."""
+        ids = [str(item.get("id")) for item in results]
+        records = self.batch_read(object_type, ids, overflow)
+        missing = [item_id for item_id in ids if item_id not in records]
+        if missing:
+            raise ExtractionError(object_type, f"batch/read incomplet ({len(missing)} objets sans propriétés complémentaires)")
+        for item in results:
+            extra = records[str(item.get("id"))].get("properties", {})
+            item.setdefault("properties", {}).update({name: extra.get(name) for name in overflow})
 
 
     def _extract_existing_id(self, error_response: dict) -> str:
@@ -78,6 +131,14 @@ class RestApiConnector(BaseConnector):
             pass
         return None
 
+    def clean_properties(self, data: dict) -> dict:
+        """Retire les propriétés en lecture seule et les valeurs vides."""
+        props_to_send = data.get("properties", data)
+        return {
+            k: v for k, v in props_to_send.items()
+            if k not in FORBIDDEN_PROPERTIES and v is not None and v != ""
+        }
+
     def push_update(self, object_type: str, item_id: str, data: dict) -> Tuple[str, str]:
         """Restaure un objet (Patch -> Post -> Merge)."""
         url = f"{self.base_url}/{object_type}/{item_id}"
@@ -86,19 +147,10 @@ class RestApiConnector(BaseConnector):
             "Content-Type": "application/json"
         }
         
-        props_to_send = data.get("properties", data)
-        forbidden = [
-            "hs_object_id", "createdate", "lastmodifieddate", 
-            "hs_lastmodifieddate", "hs_createdate", "id",
-            "createdAt", "updatedAt"
-        ]
-        clean_props = {
-            k: v for k, v in props_to_send.items() 
-            if k not in forbidden and v is not None and v != ""
-        }
+        clean_props = self.clean_properties(data)
 
         try:
-            response = requests.patch(url, json={"properties": clean_props}, headers=headers)
+            response = self.http.patch(url, json={"properties": clean_props}, headers=headers)
             
             if response.status_code in [200, 204]:
                 return ("updated", item_id)
@@ -106,7 +158,7 @@ class RestApiConnector(BaseConnector):
             if response.status_code == 404:
                 logger.warning(f"👻 Objet {item_id} absent. Recréation...")
                 create_url = f"{self.base_url}/{object_type}"
-                res_create = requests.post(create_url, json={"properties": clean_props}, headers=headers)
+                res_create = self.http.post(create_url, json={"properties": clean_props}, headers=headers)
                 
                 if res_create.status_code in [201, 200]:
                     new_id = str(res_create.json().get("id"))
@@ -116,7 +168,7 @@ class RestApiConnector(BaseConnector):
                     existing_id = self._extract_existing_id(res_create.json())
                     if existing_id:
                         update_url = f"{self.base_url}/{object_type}/{existing_id}"
-                        res_update = requests.patch(update_url, json={"properties": clean_props}, headers=headers)
+                        res_update = self.http.patch(update_url, json={"properties": clean_props}, headers=headers)
                         if res_update.status_code in [200, 204]:
                             return ("merged", existing_id)
             
@@ -127,7 +179,7 @@ class RestApiConnector(BaseConnector):
 
     def create_association(self, from_type: str, from_id: str, to_type: str, to_id: str, association_type_id: int) -> bool:
         """Crée une association via l'API v4."""
-        url = f"https://api.hubapi.com/crm/v4/objects/{from_type}/{from_id}/associations/default/{to_type}/{to_id}"
+        url = f"{self.api_base}/crm/v4/objects/{from_type}/{from_id}/associations/default/{to_type}/{to_id}"
         # Note : 'default' simplifie la création pour les types standards
         
         headers = {
@@ -138,17 +190,321 @@ class RestApiConnector(BaseConnector):
         try:
             # Pour une association par défaut, le payload peut être vide ou spécifier le type
             payload = [{"associationCategory": "HUBSPOT_DEFINED", "associationTypeId": association_type_id}]
-            response = requests.put(url, json=payload, headers=headers)
+            response = self.http.put(url, json=payload, headers=headers)
             return response.status_code in [200, 201]
         except Exception as e:
             logger.error(f"💥 Erreur association: {e}")
             return False
 
+    # ========================================
+    # MODE BATCH (100 objets par appel)
+    # ========================================
+
+    def _batch_errors_ids(self, payload: dict, categories: Optional[tuple]) -> set:
+        """Extrait les IDs en erreur d'une réponse batch HubSpot (207 / 4xx), toutes catégories si None."""
+        ids = set()
+        errors = payload.get("errors", [])
+        # Une réponse 4xx globale est elle-même un objet d'erreur
+        if not errors and payload.get("category"):
+            errors = [payload]
+        for error in errors:
+            if categories is not None and error.get("category") not in categories:
+                continue
+            for error_id in error.get("context", {}).get("ids", []):
+                ids.add(str(error_id))
+        return ids
+
+    def batch_read(self, object_type: str, ids: List[str], properties: List[str]) -> Dict[str, dict]:
+        """
+        Lit l'état live d'un lot d'objets (100 IDs par appel).
+
+        Returns:
+            {id: objet HubSpot} (les IDs introuvables sont absents)
+
+        Raises:
+            ExtractionError: un lot n'a pas pu être lu (absent ≠ non lu : pas de résultat partiel)
+        """
+        url = f"{self.base_url}/{object_type}/batch/read"
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        records = {}
+
+        for start in range(0, len(ids), BATCH_SIZE):
+            chunk = ids[start:start + BATCH_SIZE]
+            payload = {"properties": properties, "inputs": [{"id": item_id} for item_id in chunk]}
+            try:
+                response = self.http.post(url, json=payload, headers=headers, idempotent=True)
+            except Exception as e:
+                logger.error(f"💥 Erreur API batch read {object_type} : {e}")
+                raise ExtractionError(object_type, f"batch read : {e}") from e
+            # 207 : certains IDs introuvables (réellement absents), les autres sont lus
+            if response.status_code not in [200, 207]:
+                logger.error(f"❌ Erreur HubSpot batch read ({response.status_code}): {response.text}")
+                raise ExtractionError(object_type, f"batch read : HTTP {response.status_code}")
+            for result in response.json().get("results", []):
+                records[str(result.get("id"))] = result
+
+        return records
+
+    def batch_push_updates(self, object_type: str, items: Dict[str, dict],
+                           on_created: Optional[Callable[[Dict[str, Tuple[str, str]]], None]] = None) -> Dict[str, Tuple[str, str]]:
+        """
+        Restaure un lot d'objets via les endpoints batch (Update -> Create -> Merge).
+
+        Args:
+            object_type: Type HubSpot (companies, contacts, deals...)
+            items: {ancien_id: données du snapshot}
+            on_created: Appelé avec les résultats de chaque appel de création (et de la fusion des conflits),
+                        avant l'appel suivant : l'appelant rend les recréations durables au fil de l'eau
+
+        Returns:
+            {ancien_id: (statut, id_actuel)} avec statut updated/resurrected/merged/failed,
+            ou conflict (plusieurs anciens objets en doublon du même objet existant, id_actuel = ce dernier)
+        """
+        url = f"{self.base_url}/{object_type}/batch/update"
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        results = {}
+        missing = []
+
+        item_ids = list(items.keys())
+        for start in range(0, len(item_ids), BATCH_SIZE):
+            chunk = item_ids[start:start + BATCH_SIZE]
+            try:
+                chunk_missing = self._batch_update_chunk(url, headers, object_type, chunk, items, results)
+                missing.extend(chunk_missing)
+            except Exception as e:
+                logger.error(f"💥 Erreur API batch update {object_type} : {e}")
+                for item_id in chunk:
+                    results.setdefault(item_id, ("failed", item_id))
+
+        if missing:
+            logger.warning(f"👻 {len(missing)} {object_type} absents. Recréation par lot...")
+            results.update(self._batch_create(object_type, {item_id: items[item_id] for item_id in missing}, on_created))
+
+        return results
+
+    def _batch_update_chunk(self, url: str, headers: dict, object_type: str, chunk: List[str], items: Dict[str, dict], results: dict) -> List[str]:
+        """
+        Envoie un lot de PATCH. Retourne les IDs introuvables (OBJECT_NOT_FOUND / 404) à recréer.
+        Une erreur de validation (enum invalide, propriété en lecture seule...) vise un objet existant :
+        il est marqué en échec, jamais recréé (ce serait un doublon).
+        """
+        inputs = [{"id": item_id, "properties": self.clean_properties(items[item_id])} for item_id in chunk]
+        response = self.http.post(url, json={"inputs": inputs}, headers=headers, idempotent=True)
+        payload = response.json() if response.content else {}
+
+        if response.status_code in [200, 207]:
+            for result in payload.get("results", []):
+                results[str(result.get("id"))] = ("updated", str(result.get("id")))
+            missing = self._batch_errors_ids(payload, ("OBJECT_NOT_FOUND",))
+        elif response.status_code in [400, 404]:
+            # HubSpot rejette tout le lot si un seul ID est en erreur : on renvoie le reste
+            missing = self._batch_errors_ids(payload, None if response.status_code == 404 else ("OBJECT_NOT_FOUND",))
+            invalid = self._batch_errors_ids(payload, None) - missing
+            for item_id in invalid & set(chunk):
+                logger.error(f"❌ {object_type} #{item_id} refusé par HubSpot (validation) : non recréé")
+                results[item_id] = ("failed", item_id)
+            retry = [item_id for item_id in chunk if item_id not in missing and item_id not in invalid]
+            if not (missing | invalid) or len(retry) == len(chunk):
+                logger.error(f"❌ Erreur HubSpot batch ({response.status_code}): {response.text}")
+                for item_id in chunk:
+                    results[item_id] = ("failed", item_id)
+                return []
+            if retry:
+                missing |= set(self._batch_update_chunk(url, headers, object_type, retry, items, results))
+        else:
+            logger.error(f"❌ Erreur HubSpot batch ({response.status_code}): {response.text}")
+            missing = set()
+
+        for item_id in chunk:
+            if item_id not in results and item_id not in missing:
+                results[item_id] = ("failed", item_id)
+        return [item_id for item_id in chunk if item_id in missing]
+
+    def _batch_create(self, object_type: str, items: Dict[str, dict],
+                      on_created: Optional[Callable[[Dict[str, Tuple[str, str]]], None]] = None) -> Dict[str, Tuple[str, str]]:
+        """Recrée un lot d'objets supprimés. Les conflits 409 sont fusionnés via l'ID existant."""
+        url = f"{self.base_url}/{object_type}/batch/create"
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        results = {}
+        conflicts = {}
+
+        item_ids = list(items.keys())
+        for start in range(0, len(item_ids), BATCH_SIZE):
+            chunk = item_ids[start:start + BATCH_SIZE]
+            # objectWriteTraceId permet de relier chaque résultat à son ancien ID
+            inputs = [
+                {"properties": self.clean_properties(items[item_id]), "objectWriteTraceId": item_id}
+                for item_id in chunk
+            ]
+            try:
+                response = self.http.post(url, json={"inputs": inputs}, headers=headers)
+                payload = response.json() if response.content else {}
+
+                if response.status_code in [200, 201, 207]:
+                    for position, result in enumerate(payload.get("results", [])):
+                        old_id = result.get("objectWriteTraceId") or chunk[position]
+                        results[str(old_id)] = ("resurrected", str(result.get("id")))
+                    for error in payload.get("errors", []):
+                        existing_id = self._extract_existing_id(error)
+                        trace_id = error.get("context", {}).get("objectWriteTraceId", [None])[0]
+                        if existing_id and trace_id:
+                            conflicts[str(trace_id)] = existing_id
+                elif response.status_code == 409:
+                    # Un doublon bloque tout le lot : on repasse en unitaire pour ce lot
+                    for item_id in chunk:
+                        status, new_id = self._create_single(object_type, items[item_id], headers)
+                        results[item_id] = (status, new_id or item_id)
+                else:
+                    logger.error(f"❌ Erreur HubSpot batch create ({response.status_code}): {response.text}")
+            except Exception as e:
+                logger.error(f"💥 Erreur API batch create {object_type} : {e}")
+
+            for item_id in chunk:
+                if item_id not in results and item_id not in conflicts:
+                    results[item_id] = ("failed", item_id)
+            if on_created:
+                on_created({item_id: results[item_id] for item_id in chunk if item_id in results})
+
+        if conflicts:
+            logger.info(f"🔀 {len(conflicts)} {object_type} déjà existants. Fusion par lot...")
+            old_ids_by_existing: Dict[str, List[str]] = {}
+            for old_id, existing_id in conflicts.items():
+                old_ids_by_existing.setdefault(existing_id, []).append(old_id)
+            # Plusieurs anciens objets en conflit avec le même objet (même email...) : aucune version
+            # ne l'emporte d'office, chacun est signalé en conflit plutôt que fusionné
+            merge_targets = {}
+            for existing_id, old_ids in old_ids_by_existing.items():
+                if len(old_ids) == 1:
+                    merge_targets[existing_id] = old_ids[0]
+                    continue
+                logger.error(f"⚠️ {object_type} {', '.join(old_ids)} en conflit sur le même objet existant #{existing_id} : non fusionnés")
+                for old_id in old_ids:
+                    results[old_id] = ("conflict", existing_id)
+            merged = self.batch_push_updates(object_type, {
+                existing_id: items[old_id] for existing_id, old_id in merge_targets.items()
+            }) if merge_targets else {}
+            for existing_id, old_id in merge_targets.items():
+                status, _ = merged.get(existing_id, ("failed", existing_id))
+                results[old_id] = ("merged", existing_id) if status == "updated" else ("failed", old_id)
+            if on_created:
+                on_created({old_id: results[old_id] for old_id in conflicts})
+
+        return results
+
+    def _create_single(self, object_type: str, data: dict, headers: dict) -> Tuple[str, str]:
+        """Création unitaire avec résolution du conflit 409 (Post -> Merge)."""
+        clean_props = self.clean_properties(data)
+        res_create = self.http.post(f"{self.base_url}/{object_type}", json={"properties": clean_props}, headers=headers)
+        if res_create.status_code in [201, 200]:
+            return ("resurrected", str(res_create.json().get("id")))
+        if res_create.status_code == 409:
+            existing_id = self._extract_existing_id(res_create.json())
+            if existing_id:
+                res_update = self.http.patch(f"{self.base_url}/{object_type}/{existing_id}", json={"properties": clean_props}, headers=headers)
+                if res_update.status_code in [200, 204]:
+                    return ("merged", existing_id)
+        return ("failed", None)
+
+    def batch_create_associations(self, from_type: str, to_type: str, pairs: List[Tuple[str, str]], association_type_id: int) -> int:
+        """
+        Crée des associations par lots de 100 via l'API v4.
+
+        Returns:
+            Nombre d'associations créées
+        """
+        url = f"{self.associations_url}/{from_type}/{to_type}/batch/create"
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        created = 0
+
+        for start in range(0, len(pairs), BATCH_SIZE):
+            chunk = pairs[start:start + BATCH_SIZE]
+            inputs = [
+                {
+                    "from": {"id": from_id},
+                    "to": {"id": to_id},
+                    "types": [{"associationCategory": "HUBSPOT_DEFINED", "associationTypeId": association_type_id}]
+                }
+                for from_id, to_id in chunk
+            ]
+            try:
+                # La création d'association est idempotente côté HubSpot
+                response = self.http.post(url, json={"inputs": inputs}, headers=headers, idempotent=True)
+                if response.status_code in [200, 201, 207]:
+                    created += len(response.json().get("results", []))
+                else:
+                    logger.error(f"❌ Erreur associations batch ({response.status_code}): {response.text}")
+            except Exception as e:
+                logger.error(f"💥 Erreur associations batch: {e}")
+
+        return created
+
+    def batch_read_associations(self, from_type: str, to_type: str, ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Lit les associations complètes d'un lot d'objets (100 IDs par appel, API v4).
+        Les objets très connectés sont paginés (curseur `after` par objet).
+
+        Returns:
+            {from_id: [to_id, ...]} trié (les objets sans association ont une liste vide)
+        """
+        url = f"{self.associations_url}/{from_type}/{to_type}/batch/read"
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        links = {str(item_id): set() for item_id in ids}
+        pending = [{"id": str(item_id)} for item_id in ids]
+
+        while pending:
+            chunk, pending = pending[:BATCH_SIZE], pending[BATCH_SIZE:]
+            try:
+                response = self.http.post(url, json={"inputs": chunk}, headers=headers, idempotent=True)
+            except Exception as e:
+                raise ExtractionError(from_type, f"associations {to_type} : {e}") from e
+            # 207 : certains IDs sans association (NO_ASSOCIATIONS_FOUND), le reste est valide
+            if response.status_code not in [200, 207]:
+                logger.error(f"❌ Erreur associations batch read ({response.status_code}): {response.text}")
+                raise ExtractionError(from_type, f"associations {to_type} : HTTP {response.status_code}")
+            for result in response.json().get("results", []):
+                from_id = str(result.get("from", {}).get("id"))
+                links.setdefault(from_id, set()).update(str(to["toObjectId"]) for to in result.get("to", []))
+                after = (result.get("paging") or {}).get("next", {}).get("after")
+                if after:
+                    pending.append({"id": from_id, "after": after})
+
+        # Listes triées : l'empreinte du blob ne dépend pas de l'ordre renvoyé par l'API
+        return {from_id: sorted(to_ids, key=lambda v: (len(v), v)) for from_id, to_ids in links.items()}
+
+    def fetch_associations(self, object_type: str, ids: List[str]) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Étape d'associations de la sync : liens complets de chaque objet vers les types suivis.
+
+        Returns:
+            {id: {"companies": [...], "contacts": [...]}} (types sans lien omis)
+        """
+        links = {str(item_id): {} for item_id in ids}
+        for to_type in ASSOCIATION_TARGETS.get(object_type, []):
+            for from_id, to_ids in self.batch_read_associations(object_type, to_type, ids).items():
+                if to_ids and from_id in links:
+                    links[from_id][to_type] = to_ids
+        return links
+
     def entity_exists(self, object_type: str, external_id: str) -> bool:
         """Vérifie l'existence d'une entité."""
         url = f"{self.base_url}/{object_type}/{external_id}"
         headers = {"Authorization": f"Bearer {self.token}"}
         try:
-            return requests.get(url, headers=headers).status_code == 200
+            return self.http.get(url, headers=headers).status_code == 200
         except:
             return False
\ No newline at end of file
@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.utils.config import settings
+
+# Configuration des projections (section "projections", par portail)
+CONFIG_PATH = Path("zibridge_config.json")
+
+# Propriétés extraites historiquement : la projection par défaut s'y limite pour que les hash
+# des objets ne changent pas à la mise à jour (les motifs larges sont un opt-in par portail)
+BASELINE_PROPERTIES = ["firstname", "lastname", "email", "name", "dealname"]
+
+# Règle appliquée sans configuration
+DEFAULT_RULE = {
+    "include": list(BASELINE_PROPERTIES),
+    "exclude": [],
+    # Propriétés calculées par HubSpot (compteurs, analytics...) : changent sans action utilisateur
+    "skip_calculated": True,
+    # Propriétés internes masquées dans l'interface HubSpot
+    "skip_hidden": True,
+}
+
+# Toujours extraites (affichage, déduplication) si le schéma les définit
+REQUIRED_PROPERTIES = list(BASELINE_PROPERTIES)
+
+
+def load_projection_config(path: Path = CONFIG_PATH) -> dict:
+    """Section "projections" de zibridge_config.json ({} si absente)."""
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f).get("projections", {})
+
+
+class PropertySchemaService:
+    """
+    Schéma des propriétés HubSpot (GET /crm/v3/properties/{type}) et projections par type.
+
+    Les définitions sont mises en cache `ttl` secondes. La projection d'un type est construite
+    à partir de la configuration du portail (zibridge_config.json) :
+
+        "projections": {
+            "default": {
+                "*":     {"include": ["*"], "exclude": ["hs_analytics_*"], "skip_calculated": true},
+                "deals": {"include": ["dealname", "amount", "dealstage", "pipeline", "closedate"]}
+            },
+            "<portal_id>": {...}
+        }
+
+    La règle d'un type complète la règle "*" de la même section ; la section du portail
+    (HUBSPOT_PORTAL_ID) remplace la section "default". include/exclude acceptent des motifs fnmatch.
+
+    Sans configuration, seules les BASELINE_PROPERTIES sont extraites. Élargir une projection
+    (motif "*", nouveaux noms) change le hash de tous les objets du type : le premier snapshot
+    suivant les signale tous comme modifiés, une seule fois, puis les diffs redeviennent normaux.
+    """
+
+    def __init__(self, connector, ttl: int = None, portal: str = None, config: dict = None):
+        self.connector = connector
+        self.ttl = settings.hubspot_schema_ttl if ttl is None else ttl
+        self.portal = portal or settings.hubspot_portal_id
+        self.config = load_projection_config() if config is None else config
+        self._cache: Dict[str, Tuple[float, List[dict]]] = {}
+        self._lock = threading.Lock()
+
+    def get_definitions(self, object_type: str) -> List[dict]:
+        """Définitions des propriétés d'un type (cache TTL)."""
+        with self._lock:
+            cached = self._cache.get(object_type)
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+
+        url = f"{self.connector.api_base}/crm/v3/properties/{object_type}"
+        headers = {"Authorization": f"Bearer {self.connector.token}"}
+        response = self.connector.http.get(url, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"Schéma {object_type} indisponible (HTTP {response.status_code})")
+        definitions = [d for d in response.json().get("results", []) if not d.get("archived")]
+
+        with self._lock:
+            self._cache[object_type] = (time.monotonic(), definitions)
+        logger.info(f"📐 Schéma {object_type} : {len(definitions)} propriétés")
+        return definitions
+
+    def invalidate(self, object_type: str = None):
+        """Vide le cache (un type ou tout)."""
+        with self._lock:
+            if object_type:
+                self._cache.pop(object_type, None)
+            else:
+                self._cache.clear()
+
+    def rule(self, object_type: str) -> dict:
+        """Règle de projection effective d'un type pour le portail courant."""
+        section = self.config.get(self.portal) or self.config.get("default") or {}
+        return {**DEFAULT_RULE, **section.get("*", {}), **section.get(object_type, {})}
+
+    def projection(self, object_type: str, fallback: Optional[List[str]] = None) -> List[str]:
+        """
+        Propriétés à extraire pour un type.
+
+        Args:
+            fallback: Liste utilisée si le schéma est inaccessible (ex. token sans scope schema)
+        """
+        try:
+            definitions = self.get_definitions(object_type)
+        except Exception as e:
+            logger.warning(f"⚠️ Schéma {object_type} inaccessible, projection par défaut : {e}")
+            return list(fallback or [])
+
+        rule = self.rule(object_type)
+        include, exclude = rule["include"], rule["exclude"]
+        selected = []
+        for definition in definitions:
+            name = definition["name"]
+            explicit = name in include
+            if not explicit and not any(fnmatch(name, pattern) for pattern in include):
+                continue
+            if any(fnmatch(name, pattern) for pattern in exclude):
+                continue
+            # Une propriété nommée explicitement passe les filtres calculated / hidden
+            if not explicit and rule["skip_calculated"] and definition.get("calculated"):
+                continue
+            if not explicit and rule["skip_hidden"] and definition.get("hidden"):
+                continue
+            selected.append(name)
+
+        known = {definition["name"] for definition in definitions}
+        for name in REQUIRED_PROPERTIES:
+            if name in known and name not in selected:
+                selected.append(name)
+        logger.debug(f"📐 Projection {object_type} : {len(selected)}/{len(definitions)} propriétés")
+        return sorted(selected)
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from src.connectors.base import BaseConnector
+
+# Répartition des mutations entre deux runs (le reste du taux = créations)
+EDIT_SHARE = 0.6
+DELETE_SHARE = 0.2
+CREATE_SHARE = 0.2
+
+# Date du run 0 (les timestamps sont dérivés du run : pas d'horloge système)
+EPOCH = datetime(2025, 1, 1)
+RUN_INTERVAL = timedelta(days=1)
+
+_MASK64 = (1 << 64) - 1
+_TYPE_SALT = {"companies": 1, "contacts": 2, "deals": 3}
+
+_FIRST_NAMES = ["Alice", "Bruno", "Chloé", "David", "Emma", "Farid", "Gaëlle", "Hugo", "Inès", "Jules", "Léa", "Malik"]
+_LAST_NAMES = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau"]
+_COMPANY_WORDS = ["Nova", "Atlas", "Pixel", "Orbit", "Quartz", "Helix", "Vertex", "Lumen", "Cobalt", "Zenith"]
+_INDUSTRIES = ["SaaS", "FinTech", "HealthTech", "EdTech", "Retail", "Logistics", "Energy", "Media"]
+_STAGES = ["appointmentscheduled", "qualifiedtobuy", "presentationscheduled", "contractsent", "closedwon", "closedlost"]
+_LIFECYCLE = ["subscriber", "lead", "marketingqualifiedlead", "salesqualifiedlead", "opportunity", "customer"]
+
+
+def _mix(*values: int) -> int:
+    """Hash 64 bits déterministe (splitmix64 chaîné) : la source de tout l'aléa du connecteur."""
+    state = 0x9E3779B97F4A7C15
+    for value in values:
+        state = (state + (value & _MASK64) + 0x9E3779B97F4A7C15) & _MASK64
+        state = ((state ^ (state >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        state = ((state ^ (state >> 27)) * 0x94D049BB133111EB) & _MASK64
+        state ^= state >> 31
+    return state
+
+
+class SyntheticConnector(BaseConnector):
+    """
+    Connecteur synthétique déterministe pour les tests de charge (sync, diff, restore).
+
+    - N companies, M contacts et K deals, associés (contact → company, deal → company + contact)
+    - `run` : état du CRM après `run` cycles de mutations au taux `mutation_rate`
+      (éditions, suppressions, créations), reproductible pour un même `seed`
+    - Génération paresseuse en O(1) mémoire : chaque objet est recalculé depuis (seed, type, id, run),
+      rien n'est conservé entre deux objets
+
+    L'état d'un objet au run r ne dépend que de ses tirages aux runs 1..r : deux connecteurs
+    (run=r et run=r+1) produisent exactement le delta du cycle r+1, ce qui permet de comparer
+    le DiffEngine à la vérité terrain (expected_changes).
+    """
+
+    def __init__(self, companies: int = 1_000, contacts: int = 10_000, deals: int = 5_000,
+                 seed: int = 42, run: int = 0, mutation_rate: float = 0.0):
+        self.base_counts = {"companies": companies, "contacts": contacts, "deals": deals}
+        self.seed = seed
+        self.run = run
+        self.mutation_rate = mutation_rate
+
+    def test_connection(self) -> bool:
+        return True
+
+    # ========================================
+    # CYCLE DE VIE D'UN OBJET
+    # ========================================
+
+    def _uniform(self, object_type: str, object_id: int, run: int, salt: int = 0) -> float:
+        return _mix(self.seed, _TYPE_SALT[object_type], object_id, run, salt) / float(_MASK64 + 1)
+
+    def _created_per_run(self, object_type: str) -> int:
+        return round(self.base_counts[object_type] * self.mutation_rate * CREATE_SHARE)
+
+    def _birth_run(self, object_type: str, object_id: int) -> int:
+        """Run de création d'un objet (0 pour le jeu initial)."""
+        base = self.base_counts[object_type]
+        if object_id <= base:
+            return 0
+        per_run = self._created_per_run(object_type)
+        return 1 + (object_id - base - 1) // per_run if per_run else self.run + 1
+
+    def _max_id(self, object_type: str, run: int) -> int:
+        return self.base_counts[object_type] + run * self._created_per_run(object_type)
+
+    def _state(self, object_type: str, object_id: int, run: int) -> Optional[Tuple[int, int]]:
+        """(version, run de la dernière modification) de l'objet au run donné, None s'il n'existe pas."""
+        birth = self._birth_run(object_type, object_id)
+        if birth > run:
+            return None
+        version, modified_run = 0, birth
+        edit_threshold = self.mutation_rate * EDIT_SHARE
+        delete_threshold = edit_threshold + self.mutation_rate * DELETE_SHARE
+        for cycle in range(birth + 1, run + 1):
+            draw = self._uniform(object_type, object_id, cycle)
+            if draw < edit_threshold:
+                version, modified_run = version + 1, cycle
+            elif draw < delete_threshold:
+                return None
+        return version, modified_run
+
+    def exists(self, object_type: str, object_id: int, run: int = None) -> bool:
+        return self._state(object_type, object_id, self.run if run is None else run) is not None
+
+    # ========================================
+    # ASSOCIATIONS (calculées, jamais stockées)
+    # ========================================
+
+    def _company_of_contact(self, contact_id: int) -> int:
+        return (contact_id - 1) % self.base_counts["companies"] + 1
+
+    def _contacts_of_company(self, company_id: int) -> List[int]:
+        """Inverse de _company_of_contact (company c ← contacts c, c+N, c+2N...)."""
+        step = self.base_counts["companies"]
+        return list(range(company_id, self._max_id("contacts", self.run) + 1, step))
+
+    def _deal_links(self, deal_id: int) -> Dict[str, int]:
+        companies = self.base_counts["companies"]
+        company_id = _mix(self.seed, _TYPE_SALT["deals"], deal_id, 0, 1) % companies + 1
+        # Un contact de la même company (les contacts sont répartis modulo N)
+        contacts_of_company = max(1, (self._max_id("contacts", 0) - company_id) // companies + 1)
+        contact_id = company_id + companies * (_mix(self.seed, _TYPE_SALT["deals"], deal_id, 0, 2) % contacts_of_company)
+        return {"companies": company_id, "contacts": contact_id}
+
+    def _links(self, object_type: str, object_id: int) -> Dict[str, List[str]]:
+        """Liens vivants d'un objet (les cibles supprimées sont retirées, comme dans HubSpot)."""
+        if object_type == "contacts":
+            candidates = {"companies": [self._company_of_contact(object_id)]}
+        elif object_type == "deals":
+            candidates = {related_type: [related_id] for related_type, related_id in self._deal_links(object_id).items()}
+        elif object_type == "companies":
+            candidates = {"contacts": self._contacts_of_company(object_id)}
+        else:
+            return {}
+        links = {}
+        for related_type, related_ids in candidates.items():
+            alive = [str(related_id) for related_id in related_ids if self.exists(related_type, related_id)]
+            if alive:
+                links[related_type] = alive
+        return links
+
+    # ========================================
+    # CONTRAT BaseConnector
+    # ========================================
+
+    def _properties(self, object_type: str, object_id: int, version: int) -> Dict[str, str]:
+        pick = lambda values, salt: values[_mix(self.seed, _TYPE_SALT[object_type], object_id, version, salt) % len(values)]
+        if object_type == "companies":
+            name = f"{pick(_COMPANY_WORDS, 1)} {pick(_COMPANY_WORDS, 2)} {object_id}"
+            return {"name": name, "domain": f"{name.lower().replace(' ', '-')}.example.com",
+                    "industry": pick(_INDUSTRIES, 3)}
+        if object_type == "contacts":
+            first, last = pick(_FIRST_NAMES, 1), pick(_LAST_NAMES, 2)
+            return {"firstname": first, "lastname": last,
+                    "email": f"{first.lower()}.{last.lower()}.{object_id}@example.com",
+                    "lifecyclestage": pick(_LIFECYCLE, 3)}
+        amount = 500 + _mix(self.seed, _TYPE_SALT[object_type], object_id, version, 4) % 100_000
+        return {"dealname": f"Deal {object_id}", "amount": str(amount), "dealstage": pick(_STAGES, 3)}
+
+    def _record(self, object_type: str, object_id: int, state: Tuple[int, int]) -> dict:
+        version, modified_run = state
+        created_at = (EPOCH + self._birth_run(object_type, object_id) * RUN_INTERVAL).isoformat() + "Z"
+        updated_at = (EPOCH + modified_run * RUN_INTERVAL).isoformat() + "Z"
+        return {
+            "id": str(object_id),
+            "properties": {
+                **self._properties(object_type, object_id, version),
+                "hs_object_id": str(object_id),
+                "createdate": created_at,
+            },
+            "createdAt": created_at,
+            "updatedAt": updated_at,
+            "archived": False,
+        }
+
+    def extract_data(self, object_type: str) -> Generator[dict[str, Any], None, None]:
+        """Objets vivants du type au run courant, par ID croissant."""
+        if object_type not in self.base_counts:
+            return
+        for object_id in range(1, self._max_id(object_type, self.run) + 1):
+            state = self._state(object_type, object_id, self.run)
+            if state is not None:
+                yield self._record(object_type, object_id, state)
+
+    def fetch_associations(self, object_type: str, ids: List[str]) -> Dict[str, Dict[str, List[str]]]:
+        """Même interface que RestApiConnector.fetch_associations (étape d'associations de la sync)."""
+        return {str(item_id): self._links(object_type, int(item_id)) for item_id in ids}
+
+    def expected_changes(self, object_type: str, previous_run: int = None) -> Dict[str, int]:
+        """
+        Vérité terrain du delta entre deux runs : {"created", "updated", "deleted"}.
+        Ne compte que les éditions de propriétés : un objet dont une cible d'association a été
+        supprimée change aussi de liens (_zibridge_links), donc d'empreinte, côté DiffEngine.
+        """
+        previous_run = self.run - 1 if previous_run is None else previous_run
+        counts = {"created": 0, "updated": 0, "deleted": 0}
+        for object_id in range(1, self._max_id(object_type, self.run) + 1):
+            before = self._state(object_type, object_id, previous_run)
+            after = self._state(object_type, object_id, self.run)
+            if before is None and after is not None:
+                counts["created"] += 1
+            elif before is not None and after is None:
+                counts["deleted"] += 1
+            elif before is not None and before != after:
+                counts["updated"] += 1
+        return counts
@@ -0,0 +1,438 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlmodel import Session, select
+
+from src.core.associations import AssociationIndex
+from src.core.models import BlobAssociation, Snapshot, SnapshotItem
+from src.utils.db import engine
+
+# Snapshots gardés en mémoire (LRU) : ~20 octets par arête et par sens
+GRAPH_CACHE_SIZE = 4
+
+
+class SnapshotGraph:
+    """
+    Graphe des associations d'un snapshot en CSR (compressed sparse row) NumPy.
+
+    - Nœuds : objets du snapshot + cibles de liens absentes du snapshot ("dangling"),
+      numérotés par type (IDs HubSpot triés, recherche par np.searchsorted)
+    - Arêtes : non orientées (contact ↔ company...), dédoublonnées ; les voisins du nœud i
+      sont indices[indptr[i]:indptr[i + 1]]
+    - Composantes connexes calculées à la première demande (hooking + pointer jumping vectorisés)
+
+    Les requêtes (k-hop, composante, orphelins) ne font que des opérations sur tableaux :
+    quelques microsecondes à quelques millisecondes, sans aller-retour base.
+    """
+
+    def __init__(self, snapshot_id: int, nodes: Dict[str, np.ndarray], edges: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]]):
+        self.snapshot_id = snapshot_id
+        self.types: List[str] = sorted(set(nodes) | {t for pair in edges for t in pair})
+
+        # Numérotation : IDs triés par type, décalés par type
+        self.ids: Dict[str, np.ndarray] = {}
+        self.offsets: Dict[str, int] = {}
+        present_parts = []
+        offset = 0
+        for object_type in self.types:
+            referenced = [dst for (_, dst_type), (_, dst) in edges.items() if dst_type == object_type]
+            present = nodes.get(object_type, np.empty(0, dtype=np.int64))
+            type_ids = np.unique(np.concatenate([present, *referenced])) if referenced else np.unique(present)
+            self.ids[object_type] = type_ids
+            self.offsets[object_type] = offset
+            present_parts.append(np.isin(type_ids, present, assume_unique=False))
+            offset += len(type_ids)
+        self.node_count = offset
+        self.present = np.concatenate(present_parts) if present_parts else np.empty(0, dtype=bool)
+        self._type_bounds = np.array([self.offsets[t] for t in self.types] + [offset], dtype=np.int64)
+
+        # Arêtes dans les deux sens, dédoublonnées (u, v) puis triées par u
+        sources, targets = [], []
+        for (src_type, dst_type), (src, dst) in edges.items():
+            u = self._index_of(src_type, src)
+            v = self._index_of(dst_type, dst)
+            sources += [u, v]
+            targets += [v, u]
+        if sources:
+            keys = np.unique(np.concatenate(sources) * offset + np.concatenate(targets))
+            u, v = np.divmod(keys, offset)
+        else:
+            u = v = np.empty(0, dtype=np.int64)
+        self.indices = v.astype(np.int64)
+        self.indptr = np.zeros(offset + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u, minlength=offset), out=self.indptr[1:])
+        self.degree = np.diff(self.indptr)
+        self.edge_count = len(self.indices) // 2
+        self._labels: Optional[np.ndarray] = None
+
+    # ========================================
+    # CONSTRUCTION
+    # ========================================
+
+    @classmethod
+    def load(cls, snapshot_id: int) -> "SnapshotGraph":
+        """Construit le graphe depuis SnapshotItem ⋈ BlobAssociation (2 requêtes SQL)."""
+        started = time.monotonic()
+        nodes: Dict[str, List[int]] = {}
+        edge_lists: Dict[Tuple[str, str], Tuple[List[int], List[int]]] = {}
+        with Session(engine) as session:
+            rows = session.exec(
+                select(SnapshotItem.object_type, SnapshotItem.object_id).where(SnapshotItem.snapshot_id == snapshot_id)
+            )
+            for object_type, object_id in rows:
+                if object_id.isdigit():
+                    nodes.setdefault(object_type, []).append(int(object_id))
+
+            rows = session.exec(
+                select(SnapshotItem.object_type, SnapshotItem.object_id, BlobAssociation.related_type, BlobAssociation.related_ids)
+                .join(BlobAssociation, BlobAssociation.content_hash == SnapshotItem.content_hash)
+                .where(SnapshotItem.snapshot_id == snapshot_id)
+            )
+            for object_type, object_id, related_type, related_ids in rows:
+                if not object_id.isdigit():
+                    continue
+                src, dst = edge_lists.setdefault((object_type, related_type), ([], []))
+                src.extend([int(object_id)] * len(related_ids))
+                dst.extend(related_ids)
+
+        graph = cls(
+            snapshot_id,
+            {object_type: np.array(ids, dtype=np.int64) for object_type, ids in nodes.items()},
+            {pair: (np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)) for pair, (src, dst) in edge_lists.items()}
+        )
+        logger.info(
+            f"🕸️ Graphe du snapshot #{snapshot_id} : {graph.node_count} nœuds, {graph.edge_count} arêtes "
+            f"({(time.monotonic() - started) * 1000:.0f}ms)"
+        )
+        return graph
+
+    def _index_of(self, object_type: str, ids: np.ndarray) -> np.ndarray:
+        return self.offsets[object_type] + np.searchsorted(self.ids[object_type], ids)
+
+    def node(self, object_type: str, external_id: str) -> Optional[int]:
+        """Index du nœud (None si l'objet est inconnu du graphe)."""
+        type_ids = self.ids.get(object_type)
+        if type_ids is None or not str(external_id).isdigit():
+            return None
+        position = int(np.searchsorted(type_ids, int(external_id)))
+        if position < len(type_ids) and type_ids[position] == int(external_id):
+            return self.offsets[object_type] + position
+        return None
+
+    def _group(self, node_indices: np.ndarray) -> Dict[str, List[str]]:
+        """Indices de nœuds → {type: [IDs]}."""
+        grouped = {}
+        node_indices = np.sort(node_indices)
+        bounds = np.searchsorted(node_indices, self._type_bounds)
+        for position, object_type in enumerate(self.types):
+            chunk = node_indices[bounds[position]:bounds[position + 1]]
+            if len(chunk):
+                grouped[object_type] = [str(i) for i in self.ids[object_type][chunk - self.offsets[object_type]]]
+        return grouped
+
+    def count_by_type(self, node_indices: np.ndarray) -> Dict[str, int]:
+        """Indices de nœuds → {type: nombre} (sans conversion des IDs)."""
+        counts = np.diff(np.searchsorted(np.sort(node_indices), self._type_bounds))
+        return {object_type: int(count) for object_type, count in zip(self.types, counts) if count}
+
+    # ========================================
+    # REQUÊTES
+    # ========================================
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def _expand(self, frontier: np.ndarray) -> np.ndarray:
+        """Voisins de tous les nœuds d'une frontière (vectorisé, avec doublons)."""
+        starts = self.indptr[frontier]
+        lengths = self.indptr[frontier + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        # Segments indices[start:start + length] concaténés sans boucle Python
+        within = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return self.indices[np.repeat(starts, lengths) + within]
+
+    def k_hop(self, sources: Iterable[int], depth: int, max_nodes: Optional[int] = None) -> Tuple[np.ndarray, List[int], bool]:
+        """
+        BFS par frontières depuis un ou plusieurs nœuds.
+
+        Returns:
+            (nœuds atteints hors sources, nombre de nœuds par saut, tronqué)
+        """
+        sources = np.unique(np.asarray(list(sources), dtype=np.int64))
+        # Nœuds visités en tableau trié (pas de masque O(n) : coût proportionnel au voisinage)
+        visited = sources
+        frontier = sources
+        reached, per_hop, truncated = [], [], False
+        for _ in range(depth):
+            frontier = np.setdiff1d(np.unique(self._expand(frontier)), visited, assume_unique=True)
+            if not len(frontier):
+                break
+            if max_nodes is not None and sum(per_hop) + len(frontier) > max_nodes:
+                frontier = frontier[:max_nodes - sum(per_hop)]
+                truncated = True
+            visited = np.union1d(visited, frontier)
+            reached.append(frontier)
+            per_hop.append(len(frontier))
+            if truncated:
+                break
+        nodes = np.concatenate(reached) if reached else np.empty(0, dtype=np.int64)
+        return nodes, per_hop, truncated
+
+    def reach(self, entities: Iterable[Tuple[str, str]], depth: int) -> dict:
+        """
+        Voisinage cumulé d'un lot d'objets (BFS multi-sources).
+
+        Returns:
+            {"depth", "touched": {type: n} (entités du snapshot atteintes hors sources),
+             "missing": {type: n} (entités liées absentes du snapshot)}
+        """
+        sources = [node for node in (self.node(t, i) for t, i in entities) if node is not None]
+        nodes, _, _ = self.k_hop(sources, depth) if sources else (np.empty(0, dtype=np.int64), [], False)
+        return {
+            "depth": depth,
+            "touched": self.count_by_type(nodes[self.present[nodes]]),
+            "missing": self.count_by_type(nodes[~self.present[nodes]])
+        }
+
+    def blast_radius(self, object_type: str, external_id: str, depth: int = 2, max_nodes: Optional[int] = None) -> Optional[dict]:
+        """
+        Entités atteintes en `depth` sauts depuis un objet.
+
+        Returns:
+            {"entity", "depth", "count", "per_hop", "truncated", "nodes": {type: [ids]}, "missing": {type: [ids]}}
+            ("missing" : entités liées absentes du snapshot) ou None si l'objet est inconnu
+        """
+        node = self.node(object_type, external_id)
+        if node is None:
+            return None
+        nodes, per_hop, truncated = self.k_hop([node], depth, max_nodes)
+        return {
+            "entity": {"type": object_type, "id": str(external_id)},
+            "depth": depth,
+            "count": len(nodes),
+            "per_hop": per_hop,
+            "truncated": truncated,
+            "nodes": self._group(nodes[self.present[nodes]]),
+            "missing": self._group(nodes[~self.present[nodes]])
+        }
+
+    # ========================================
+    # VOISINAGE PAGINÉ (VUE GRAPHE)
+    # ========================================
+
+    def key(self, node: int) -> str:
+        """Index de nœud → "type/id"."""
+        position = int(np.searchsorted(self._type_bounds, node, side="right")) - 1
+        object_type = self.types[position]
+        return f"{object_type}/{self.ids[object_type][node - self.offsets[object_type]]}"
+
+    def _typed_neighbors(self, node: int) -> Dict[str, np.ndarray]:
+        """Voisins d'un nœud groupés par type (les lignes CSR sont triées : segments contigus)."""
+        row = self.neighbors(node)
+        bounds = np.searchsorted(row, self._type_bounds)
+        return {
+            object_type: row[bounds[position]:bounds[position + 1]]
+            for position, object_type in enumerate(self.types) if bounds[position + 1] > bounds[position]
+        }
+
+    def neighborhood(self, object_type: str, external_id: str, depth: int = 1, max_nodes: int = 200,
+                     per_type: int = 50) -> Optional[dict]:
+        """
+        Voisinage borné d'un objet, pour la vue graphe.
+
+        Chaque nœud n'apporte au plus que `per_type` voisins par type, et le total est plafonné
+        à `max_nodes`. Les listes coupées renvoient un curseur {"node", "type", "offset"}
+        (voir expand) : le client charge la suite à la demande.
+
+        Returns:
+            {"root", "nodes": [[key, present], ...], "edges": [[source, target], ...], "cursors": [...], "truncated"}
+        """
+        root = self.node(object_type, external_id)
+        if root is None:
+            return None
+        included = {root}
+        nodes, edges, cursors = [root], [], []
+        frontier = [root]
+        truncated = False
+        for _ in range(depth):
+            next_frontier = []
+            for node in frontier:
+                for related_type, related in self._typed_neighbors(node).items():
+                    shown = 0
+                    for neighbor in related[:per_type].tolist():
+                        if neighbor not in included:
+                            if len(nodes) >= max_nodes:
+                                truncated = True
+                                break
+                            included.add(neighbor)
+                            nodes.append(neighbor)
+                            next_frontier.append(neighbor)
+                        edges.append((node, neighbor))
+                        shown += 1
+                    if shown < len(related):
+                        cursors.append({"node": self.key(node), "type": related_type, "offset": shown})
+            frontier = next_frontier
+            if not frontier:
+                break
+
+        # Arêtes non orientées : une seule occurrence par paire
+        unique_edges = {(min(u, v), max(u, v)) for u, v in edges}
+        return {
+            "root": self.key(root),
+            "nodes": [[self.key(node), bool(self.present[node])] for node in nodes],
+            "edges": [[self.key(u), self.key(v)] for u, v in sorted(unique_edges)],
+            "cursors": cursors,
+            "truncated": truncated
+        }
+
+    def expand(self, node_key: str, related_type: str, offset: int = 0, limit: int = 50) -> Optional[dict]:
+        """Page suivante des voisins d'un nœud pour un type (curseur renvoyé par neighborhood)."""
+        object_type, _, external_id = node_key.partition("/")
+        node = self.node(object_type, external_id)
+        if node is None:
+            return None
+        related = self._typed_neighbors(node).get(related_type, np.empty(0, dtype=np.int64))
+        page = related[offset:offset + limit].tolist()
+        next_offset = offset + len(page)
+        return {
+            "root": node_key,
+            "nodes": [[self.key(neighbor), bool(self.present[neighbor])] for neighbor in page],
+            "edges": [[node_key, self.key(neighbor)] for neighbor in page],
+            "cursors": [{"node": node_key, "type": related_type, "offset": next_offset}] if next_offset < len(related) else [],
+            "truncated": False
+        }
+
+    def _components(self) -> np.ndarray:
+        """Étiquette de composante par nœud (plus petit index de la composante)."""
+        if self._labels is not None:
+            return self._labels
+        parent = np.arange(self.node_count, dtype=np.int64)
+        u = np.repeat(np.arange(self.node_count, dtype=np.int64), self.degree)
+        v = self.indices
+        while True:
+            pu, pv = parent[u], parent[v]
+            differ = pu != pv
+            if not differ.any():
+                break
+            # Hooking : la racine la plus grande passe sous la plus petite
+            np.minimum.at(parent, np.maximum(pu[differ], pv[differ]), np.minimum(pu[differ], pv[differ]))
+            # Pointer jumping jusqu'à ce que chaque nœud pointe sur sa racine
+            while True:
+                grandparent = parent[parent]
+                if np.array_equal(grandparent, parent):
+                    break
+                parent = grandparent
+        self._labels = parent
+        return parent
+
+    def component(self, object_type: str, external_id: str, limit: Optional[int] = None) -> Optional[dict]:
+        """Composante connexe d'un objet : {"entity", "size", "nodes": {type: [ids]}, "truncated"}."""
+        node = self.node(object_type, external_id)
+        if node is None:
+            return None
+        labels = self._components()
+        members = np.flatnonzero(labels == labels[node])
+        members = members[members != node]
+        truncated = limit is not None and len(members) > limit
+        return {
+            "entity": {"type": object_type, "id": str(external_id)},
+            "size": len(members) + 1,
+            "nodes": self._group(members[:limit] if truncated else members),
+            "truncated": truncated
+        }
+
+    def orphans(self, object_type: Optional[str] = None) -> dict:
+        """
+        Orphelins du snapshot.
+
+        Returns:
+            {"isolated": {type: [ids]}  objets du snapshot sans aucune association,
+             "dangling": {type: [ids]}  entités liées mais absentes du snapshot}
+        """
+        mask = np.ones(self.node_count, dtype=bool)
+        if object_type is not None:
+            mask[:] = False
+            if object_type in self.offsets:
+                start = self.offsets[object_type]
+                mask[start:start + len(self.ids[object_type])] = True
+        return {
+            "isolated": self._group(np.flatnonzero(mask & self.present & (self.degree == 0))),
+            "dangling": self._group(np.flatnonzero(mask & ~self.present))
+        }
+
+    def stats(self) -> dict:
+        return {
+            "snapshot_id": self.snapshot_id,
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "by_type": {
+                object_type: int(self.present[self.offsets[object_type]:self.offsets[object_type] + len(type_ids)].sum())
+                for object_type, type_ids in self.ids.items()
+            },
+            "memory_bytes": int(self.indices.nbytes + self.indptr.nbytes + sum(ids.nbytes for ids in self.ids.values()))
+        }
+
+
+class SnapshotGraphCache:
+    """
+    Cache LRU des graphes CSR, par snapshot.
+
+    Seuls les snapshots complets sont mis en cache ; un snapshot en cours est reconstruit à chaque
+    demande. Un graphe construit avant un backfill de l'index d'associations (version changée) est
+    reconstruit. Un verrou par snapshot évite les constructions en double.
+    """
+
+    def __init__(self, max_size: int = GRAPH_CACHE_SIZE):
+        self.max_size = max_size
+        self._graphs: "OrderedDict[int, Tuple[SnapshotGraph, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[int, threading.Lock] = {}
+
+    def get(self, snapshot_id: int) -> SnapshotGraph:
+        version = AssociationIndex.version()
+        with self._lock:
+            cached = self._graphs.get(snapshot_id)
+            if cached is not None and cached[1] == version:
+                self._graphs.move_to_end(snapshot_id)
+                return cached[0]
+            build_lock = self._build_locks.setdefault(snapshot_id, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                cached = self._graphs.get(snapshot_id)
+                if cached is not None and cached[1] == version:
+                    return cached[0]
+            graph = SnapshotGraph.load(snapshot_id)
+            with Session(engine) as session:
+                snapshot = session.get(Snapshot, snapshot_id)
+                cacheable = snapshot is not None and snapshot.status == "completed"
+            with self._lock:
+                self._build_locks.pop(snapshot_id, None)
+                if cacheable:
+                    self._graphs[snapshot_id] = (graph, version)
+                    self._graphs.move_to_end(snapshot_id)
+                    while len(self._graphs) > self.max_size:
+                        evicted, _ = self._graphs.popitem(last=False)
+                        logger.debug(f"🕸️ Graphe du snapshot #{evicted} évincé du cache")
+            return graph
+
+    def invalidate(self, snapshot_id: int = None):
+        with self._lock:
+            if snapshot_id is None:
+                self._graphs.clear()
+            else:
+                self._graphs.pop(snapshot_id, None)
+
+
+_graph_cache = SnapshotGraphCache()
+
+
+def get_snapshot_graph(snapshot_id: int) -> SnapshotGraph:
+    """Graphe CSR d'un snapshot (cache LRU partagé du processus)."""
+    return _graph_cache.get(snapshot_id)
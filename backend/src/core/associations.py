@@ -0,0 +1,98 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlmodel import Session, select
+
+from src.core.models import BlobAssociation, IndexVersion, SnapshotItem
+from src.utils.db import engine
+
+# Nom de l'index dans IndexVersion
+INDEX_NAME = "associations"
+
+
+def normalize_links(links: Optional[dict]) -> Dict[str, List[str]]:
+    """_zibridge_links → {type: [ids]} (listes v4, ou format legacy company_id / contact_id)."""
+    relations = {}
+    for related_type, related_ids in (links or {}).items():
+        if isinstance(related_ids, list) and related_ids:
+            relations[related_type] = [str(related_id) for related_id in related_ids]
+    if links and "company_id" in links:
+        relations["companies"] = [str(links["company_id"])]
+    if links and "contact_id" in links:
+        relations["contacts"] = [str(links["contact_id"])]
+    return relations
+
+
+class AssociationIndex:
+    """
+    Index relationnel des associations, dans Postgres (table BlobAssociation).
+
+    Alimenté pendant la sync (SnapshotEngine, à l'écriture de chaque nouveau blob), il remplace
+    les allers-retours Neo4j de la restauration : les relations d'un lot d'objets au snapshot N
+    s'obtiennent en une requête SQL par type et par chunk (SnapshotItem ⋈ BlobAssociation).
+    """
+
+    @staticmethod
+    def index_links(session: Session, content_hash: str, links: Optional[dict]) -> int:
+        """Ajoute à la session les lignes d'un nouveau blob. Renvoie le nombre de types liés indexés."""
+        indexed = 0
+        for related_type, related_ids in normalize_links(links).items():
+            numeric_ids = sorted({int(related_id) for related_id in related_ids if related_id.isdigit()})
+            if len(numeric_ids) < len(set(related_ids)):
+                logger.debug(f"🔗 IDs non numériques ignorés par l'index ({related_type}) : {related_ids}")
+            if numeric_ids:
+                session.add(BlobAssociation(content_hash=content_hash, related_type=related_type, related_ids=numeric_ids))
+                indexed += 1
+        return indexed
+
+    @staticmethod
+    def bump_version(session: Session):
+        """À appeler (avant commit) quand des lignes sont ajoutées pour des blobs de snapshots déjà complets."""
+        state = session.get(IndexVersion, INDEX_NAME) or IndexVersion(name=INDEX_NAME)
+        state.version += 1
+        state.updated_at = datetime.utcnow()
+        session.add(state)
+
+    @staticmethod
+    def version() -> int:
+        """Version courante de l'index (0 s'il n'a jamais été rétro-alimenté)."""
+        with Session(engine) as session:
+            state = session.get(IndexVersion, INDEX_NAME)
+        return state.version if state else 0
+
+    def get_relations_bulk(self, snapshot_id: int, entities: Iterable[Tuple[str, str]],
+                           chunk_size: int = 1000) -> Dict[Tuple[str, str], Dict[str, List[str]]]:
+        """
+        Relations de tout un lot d'objets au snapshot.
+
+        Args:
+            entities: [(type, external_id), ...]
+
+        Returns:
+            {("contacts", "123"): {"companies": ["456"]}, ...} (objets sans lien : {})
+        """
+        relations = {(object_type, str(ext_id)): {} for object_type, ext_id in entities}
+        by_type: Dict[str, List[str]] = {}
+        for object_type, ext_id in relations:
+            by_type.setdefault(object_type, []).append(ext_id)
+
+        with Session(engine) as session:
+            for object_type, ext_ids in by_type.items():
+                for start in range(0, len(ext_ids), chunk_size):
+                    statement = select(
+                        SnapshotItem.object_id, BlobAssociation.related_type, BlobAssociation.related_ids
+                    ).join(
+                        BlobAssociation, BlobAssociation.content_hash == SnapshotItem.content_hash
+                    ).where(
+                        SnapshotItem.snapshot_id == snapshot_id,
+                        SnapshotItem.object_type == object_type,
+                        SnapshotItem.object_id.in_(ext_ids[start:start + chunk_size])
+                    )
+                    for object_id, related_type, related_ids in session.exec(statement).all():
+                        relations[(object_type, object_id)][related_type] = [str(related_id) for related_id in related_ids]
+        return relations
+
+    def get_relations(self, snapshot_id: int, object_type: str, external_id: str) -> Dict[str, List[str]]:
+        """Relations d'un objet au snapshot : {"companies": ["456"], ...}."""
+        return self.get_relations_bulk(snapshot_id, [(object_type, external_id)])[(object_type, str(external_id))]
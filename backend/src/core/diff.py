@@ -1,29 +1,59 @@
+import asyncio
+from typing import Dict, Iterable, List, Set, Tuple
 from sqlmodel import Session, select
-from src.utils.db import engine
-from src.core.models import SnapshotItem
+from src.utils.db import AsyncSessionLocal, engine
+from src.core.models import BlobAssociation, SnapshotItem
 from loguru import logger
 
+# Lignes d'inventaire lues par lot en mode async (la boucle d'événements reprend la main entre deux lots)
+INVENTORY_CHUNK = 10_000
+
 class DiffEngine:
     def __init__(self, old_snap_id: int, new_snap_id: int):
         self.old_id = old_snap_id
         self.new_id = new_snap_id
 
+    def _inventory_statement(self, snap_id: int):
+        return select(SnapshotItem.object_type, SnapshotItem.object_id, SnapshotItem.content_hash).where(
+            SnapshotItem.snapshot_id == snap_id
+        )
+
     def _get_inventory(self, snap_id: int):
         """
         Récupère tous les objets d'un snapshot.
         Retourne un dictionnaire : { "type/id": "hash_du_contenu" }
         """
         with Session(engine) as session:
-            statement = select(SnapshotItem).where(SnapshotItem.snapshot_id == snap_id)
-            items = session.exec(statement).all()
+            rows = session.exec(self._inventory_statement(snap_id)).all()
             # On utilise le format 'type/id' comme clé unique
-            return {f"{i.object_type}/{i.object_id}": i.content_hash for i in items}
+            return {f"{object_type}/{object_id}": content_hash for object_type, object_id, content_hash in rows}
+
+    async def _aget_inventory(self, snap_id: int) -> Dict[str, str]:
+        """_get_inventory via l'engine async, en flux (curseur serveur, lots de INVENTORY_CHUNK lignes)."""
+        inventory = {}
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(
+                self._inventory_statement(snap_id).execution_options(yield_per=INVENTORY_CHUNK)
+            )
+            async for rows in result.partitions():
+                inventory.update((f"{object_type}/{object_id}", content_hash) for object_type, object_id, content_hash in rows)
+        return inventory
 
     def generate_report(self):
         """ Calcule les différences entre les deux inventaires. """
-        old_map = self._get_inventory(self.old_id)
-        new_map = self._get_inventory(self.new_id)
+        return self._compare(self._get_inventory(self.old_id), self._get_inventory(self.new_id))
+
+    async def agenerate_report(self) -> dict:
+        """
+        generate_report pour les endpoints async : les deux inventaires sont lus en parallèle
+        sans bloquer la boucle, la comparaison (CPU) tourne dans un thread.
+        """
+        old_map, new_map = await asyncio.gather(self._aget_inventory(self.old_id), self._aget_inventory(self.new_id))
+        return await asyncio.to_thread(self._compare, old_map, new_map)
 
+    @staticmethod
+    def _compare(old_map: Dict[str, str], new_map: Dict[str, str]) -> dict:
+        """Rapport created / updated / deleted entre deux inventaires {"type/id": hash}."""
         report = {
             "created": [],
             "updated": [],
@@ -65,4 +95,105 @@ class DiffEngine:
                     "hash": old_hash
                 })
 
-        return report
\ No newline at end of file
+        return report
+
+    # ========================================
+    # DIFF DES ASSOCIATIONS
+    # ========================================
+
+    def _links_by_hash(self, hashes: Iterable[str], chunk_size: int = 1000) -> Dict[str, Dict[str, Set[int]]]:
+        """Liens indexés (BlobAssociation) des blobs demandés : {hash: {type lié: {ids}}}."""
+        hashes = list(set(hashes))
+        links: Dict[str, Dict[str, Set[int]]] = {}
+        with Session(engine) as session:
+            for start in range(0, len(hashes), chunk_size):
+                statement = select(BlobAssociation).where(BlobAssociation.content_hash.in_(hashes[start:start + chunk_size]))
+                for row in session.exec(statement).all():
+                    links.setdefault(row.content_hash, {})[row.related_type] = set(row.related_ids)
+        return links
+
+    async def _alinks_by_hash(self, hashes: Iterable[str], chunk_size: int = 1000) -> Dict[str, Dict[str, Set[int]]]:
+        """_links_by_hash via l'engine async."""
+        hashes = list(set(hashes))
+        links: Dict[str, Dict[str, Set[int]]] = {}
+        async with AsyncSessionLocal() as session:
+            for start in range(0, len(hashes), chunk_size):
+                statement = select(BlobAssociation).where(BlobAssociation.content_hash.in_(hashes[start:start + chunk_size]))
+                for row in (await session.exec(statement)).all():
+                    links.setdefault(row.content_hash, {})[row.related_type] = set(row.related_ids)
+        return links
+
+    @staticmethod
+    def _changes(report: dict) -> List[Tuple[str, str, str, str]]:
+        """Objets modifiés du rapport : [(type, id, ancien hash, nouveau hash)] (None si absent)."""
+        return (
+            [(i["type"], i["id"], None, i["hash"]) for i in report["created"]]
+            + [(i["type"], i["id"], i["old_hash"], i["new_hash"]) for i in report["updated"]]
+            + [(i["type"], i["id"], i["hash"], None) for i in report["deleted"]]
+        )
+
+    def generate_association_report(self, report: dict = None) -> dict:
+        """
+        Liens ajoutés / retirés entre les deux snapshots, par paire de types (ordre alphabétique : chaque lien compté une fois).
+
+        Seuls les objets créés, modifiés ou supprimés sont examinés (un hash inchangé a les mêmes
+        liens), à partir de l'index BlobAssociation : aucune lecture de blob MinIO.
+
+        Args:
+            report: Rapport de generate_report déjà calculé (évite de relire les inventaires)
+
+        Returns:
+            {
+                "pairs": {"companies→contacts": {"added": [["456", "123"]], "removed": [...]}},
+                "summary": {"added": 1, "removed": 0, "objects": 1}
+            }
+        """
+        changes = self._changes(report or self.generate_report())
+        return self._pair_links(changes, self._links_by_hash(h for change in changes for h in change[2:] if h))
+
+    async def agenerate_association_report(self, report: dict = None) -> dict:
+        """generate_association_report pour les endpoints async (appariement des liens dans un thread)."""
+        changes = self._changes(report or await self.agenerate_report())
+        links = await self._alinks_by_hash(h for change in changes for h in change[2:] if h)
+        return await asyncio.to_thread(self._pair_links, changes, links)
+
+    def _pair_links(self, changes: List[Tuple[str, str, str, str]], links: Dict[str, Dict[str, Set[int]]]) -> dict:
+        """
+        Apparie les liens avant / après de chaque objet changé. Un lien est vu des deux côtés
+        (contacts→companies et companies→contacts) : il est rangé sous la paire de types triée,
+        IDs dans le même ordre, et compté une seule fois.
+        """
+        found: Dict[Tuple[str, str], Dict[str, Set[Tuple[str, str]]]] = {}
+        touched = 0
+        for obj_type, obj_id, old_hash, new_hash in changes:
+            old_links = links.get(old_hash, {}) if old_hash else {}
+            new_links = links.get(new_hash, {}) if new_hash else {}
+            changed = False
+            for related_type in set(old_links) | set(new_links):
+                before = old_links.get(related_type, set())
+                after = new_links.get(related_type, set())
+                added, removed = after - before, before - after
+                if not added and not removed:
+                    continue
+                changed = True
+                flipped = related_type < obj_type
+                pair = found.setdefault(
+                    (related_type, obj_type) if flipped else (obj_type, related_type), {"added": set(), "removed": set()}
+                )
+                for state, related_ids in (("added", added), ("removed", removed)):
+                    pair[state].update(
+                        (str(related_id), obj_id) if flipped else (obj_id, str(related_id)) for related_id in related_ids
+                    )
+            touched += changed
+
+        pairs = {
+            f"{from_type}→{to_type}": {state: [list(link) for link in sorted(ids)] for state, ids in pair.items()}
+            for (from_type, to_type), pair in sorted(found.items())
+        }
+        summary = {
+            "added": sum(len(pair["added"]) for pair in pairs.values()),
+            "removed": sum(len(pair["removed"]) for pair in pairs.values()),
+            "objects": touched
+        }
+        logger.debug(f"🔗 Diff des liens {self.old_id} → {self.new_id} : +{summary['added']} / -{summary['removed']}")
+        return {"pairs": pairs, "summary": summary}
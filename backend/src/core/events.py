@@ -0,0 +1,87 @@
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+# Intervalle minimal entre deux événements de progression (secondes)
+DEFAULT_EMIT_INTERVAL = 0.5
+
+
+class ProgressEmitter:
+    """
+    Émetteur d'événements de progression, pensé pour les boucles chaudes (sync, restore).
+
+    tick() ne fait qu'incrémenter un compteur et comparer une horloge : l'événement n'est
+    envoyé au sink qu'au plus toutes les `min_interval` secondes. Sans sink, tout est no-op.
+
+    Événement émis :
+        {"event": "progress", "phase", "processed": {type: n}, "total": {type: n},
+         "throughput": objets/s, "eta_seconds", "errors", "last_error", "ts"}
+    """
+
+    def __init__(self, sink: Optional[Callable[[dict], None]] = None, min_interval: float = DEFAULT_EMIT_INTERVAL):
+        self.sink = sink
+        self.min_interval = min_interval
+        self.phase = None
+        self.processed: Dict[str, int] = {}
+        self.total: Dict[str, int] = {}
+        self.errors = 0
+        self.last_error = None
+        self._started_at = time.monotonic()
+        self._last_emit = 0.0
+
+    def start_phase(self, phase: str, total: Dict[str, int] = None):
+        """Nouvelle phase : compteurs remis à zéro, événement immédiat."""
+        if self.sink is None:
+            return
+        self.phase = phase
+        self.processed = {}
+        self.total = dict(total or {})
+        self._started_at = time.monotonic()
+        self._emit(self._started_at, event="phase")
+
+    def tick(self, object_type: str, count: int = 1):
+        """Compte `count` objets traités (appelé dans les boucles chaudes)."""
+        if self.sink is None:
+            return
+        self.processed[object_type] = self.processed.get(object_type, 0) + count
+        now = time.monotonic()
+        if now - self._last_emit >= self.min_interval:
+            self._emit(now)
+
+    def error(self, message: str, object_type: str = None):
+        """Compte une erreur ; l'événement reste soumis au rate-limit."""
+        if self.sink is None:
+            return
+        self.errors += 1
+        self.last_error = f"{object_type}: {message}" if object_type else message
+        now = time.monotonic()
+        if now - self._last_emit >= self.min_interval:
+            self._emit(now, event="error")
+
+    def finish(self, status: str = "completed"):
+        """Dernier événement (jamais filtré par le rate-limit)."""
+        if self.sink is None:
+            return
+        self._emit(time.monotonic(), event="done", status=status)
+
+    def _emit(self, now: float, event: str = "progress", **extra):
+        self._last_emit = now
+        elapsed = max(now - self._started_at, 1e-6)
+        processed = sum(self.processed.values())
+        throughput = processed / elapsed
+        total = sum(self.total.values())
+        eta = None
+        if total and throughput > 0:
+            eta = round(max(total - processed, 0) / throughput, 1)
+        self.sink({
+            "event": event,
+            "phase": self.phase,
+            "processed": dict(self.processed),
+            "total": dict(self.total),
+            "throughput": round(throughput, 2),
+            "eta_seconds": eta,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "ts": datetime.utcnow().isoformat(),
+            **extra
+        })
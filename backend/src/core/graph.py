@@ -1,17 +1,85 @@
-from src.utils.db import neo4j_driver
+from src.utils.config import settings
+from src.utils.db import async_neo4j_driver, neo4j_driver
 from loguru import logger
-from typing import Dict, List, Set
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+# Type de relation Neo4j par couple (type source, type lié)
+REL_TYPES = {
+    ("contacts", "companies"): "WORKS_AT",
+    ("deals", "companies"): "ASSOCIATED_WITH",
+    ("deals", "contacts"): "INVOLVES",
+    ("tickets", "contacts"): "REPORTED_BY",
+    ("tickets", "companies"): "CONCERNS",
+}
+
+# Intervalle de validité [from_snap, to_snap) : to_snap absent = toujours valide
+VALID_AT = "{rel}.from_snap <= $snap_id AND ({rel}.to_snap IS NULL OR {rel}.to_snap > $snap_id)"
+
+# Requêtes as-of partagées par GraphManager (sync) et AsyncGraphReader (endpoints API)
+VERSION_AT_QUERY = f"""
+MATCH (e:Entity {{external_id: $ext_id, type: $obj_type}})-[v:HAS_VERSION]->(:Snapshot)
+WHERE {VALID_AT.format(rel="v")}
+RETURN v.hash AS hash, v.from_snap AS from_snap, v.to_snap AS to_snap
+"""
+
+HISTORY_QUERY = """
+MATCH (e:Entity {external_id: $ext_id, type: $obj_type})-[v:HAS_VERSION]->(:Snapshot)
+RETURN v.hash AS hash, v.from_snap AS from_snap, v.to_snap AS to_snap
+ORDER BY v.from_snap
+"""
+
+RELATIONS_AT_QUERY = f"""
+MATCH (e:Entity {{external_id: $ext_id, type: $obj_type}})-[r]->(related:Entity)
+WHERE {VALID_AT.format(rel="r")} AND EXISTS {{
+    MATCH (e)-[v:HAS_VERSION]->(:Snapshot) WHERE {VALID_AT.format(rel="v")}
+}}
+RETURN type(r) as rel_type, related.type as entity_type, related.external_id as entity_id
+"""
+
+
+def _group_relations(records: Iterable) -> Dict[str, List[str]]:
+    """Enregistrements de RELATIONS_AT_QUERY → {type lié: [ids]}."""
+    relations = {}
+    for record in records:
+        relations.setdefault(record["entity_type"], []).append(record["entity_id"])
+    return relations
+
 
 class GraphManager:
+    """
+    Graphe temporel des entités CRM.
+
+    Chaque arête porte un intervalle de validité [from_snap, to_snap) :
+    - HAS_VERSION (Entity → Snapshot d'ouverture) : une arête par version de contenu (hash),
+      pas par snapshot. Un objet inchangé ne coûte aucune écriture.
+    - WORKS_AT, ASSOCIATED_WITH, INVOLVES... : ouvertes à l'apparition du lien,
+      fermées (to_snap) quand il disparaît ou que l'objet source est supprimé.
+
+    Les lectures "as-of" (get_entity_relations, get_entity_version...) filtrent sur l'intervalle.
+
+    Le graphe est un sink de visualisation optionnel (NEO4J_ENABLED=false : écritures ignorées,
+    lectures vides) ; la restauration lit ses relations dans l'index Postgres (AssociationIndex).
+    """
+
     def __init__(self):
         self.driver = neo4j_driver
+        self.enabled = settings.neo4j.enabled
 
     def update_relation(self, snapshot_id: int, object_type: str, external_id: str, item_hash: str):
+        """Ouvre une nouvelle version si le contenu a changé (la précédente est fermée au snapshot)."""
+        if not self.enabled:
+            return
         with self.driver.session() as session:
             query = """
             MERGE (e:Entity {external_id: $ext_id, type: $obj_type})
+            WITH e
+            OPTIONAL MATCH (e)-[open:HAS_VERSION]->(:Snapshot)
+            WHERE open.from_snap IS NOT NULL AND open.to_snap IS NULL
+            WITH e, open
+            WHERE open IS NULL OR open.hash <> $hash
+            FOREACH (_ IN CASE WHEN open IS NULL THEN [] ELSE [1] END | SET open.to_snap = $snap_id)
             MERGE (s:Snapshot {snap_id: $snap_id})
-            CREATE (e)-[:HAS_VERSION {hash: $hash, at: datetime()}]->(s)
+            CREATE (e)-[:HAS_VERSION {hash: $hash, from_snap: $snap_id, at: datetime()}]->(s)
             """
             try:
                 session.run(query, 
@@ -23,50 +91,95 @@ class GraphManager:
             except Exception as e:
                 logger.error(f"❌ Erreur Neo4j : {e}")
 
-    def create_belongs_to(self, contact_ext_id: str, company_ext_id: str):
-        with self.driver.session() as session:
-            query = """
-            MERGE (c:Entity {external_id: $c_id, type: 'contacts'})
-            MERGE (co:Entity {external_id: $co_id, type: 'companies'})
-            MERGE (c)-[:WORKS_AT]->(co)
-            """
-            session.run(query, c_id=contact_ext_id, co_id=company_ext_id)            
+    def sync_relations(self, snapshot_id: int, object_type: str, external_id: str, relations: Dict[str, List[str]]):
+        """
+        Aligne les liens sortants ouverts d'une entité sur ses liens au snapshot.
 
-    def create_deal_relations(self, deal_id: str, company_id: str = None, contact_id: str = None):
+        Les liens disparus sont fermés (to_snap), les nouveaux ouverts (from_snap),
+        les liens inchangés ne sont pas touchés.
+        """
+        rel_types = [(related_type, rel_type) for (source_type, related_type), rel_type in REL_TYPES.items() if source_type == object_type]
+        if not self.enabled or not rel_types:
+            return
         with self.driver.session() as session:
-            if company_id:
-                query_co = """
-                MATCH (d:Entity {external_id: $d_id, type: 'deals'})
-                MATCH (co:Entity {external_id: $co_id, type: 'companies'})
-                MERGE (d)-[:ASSOCIATED_WITH]->(co)
+            for related_type, rel_type in rel_types:
+                related_ids = [str(related_id) for related_id in relations.get(related_type, [])]
+                query = f"""
+                MATCH (e:Entity {{external_id: $ext_id, type: $obj_type}})
+                OPTIONAL MATCH (e)-[gone:{rel_type}]->(old:Entity)
+                WHERE gone.from_snap IS NOT NULL AND gone.to_snap IS NULL AND NOT old.external_id IN $related_ids
+                SET gone.to_snap = $snap_id
+                WITH DISTINCT e
+                UNWIND $related_ids AS related_id
+                MERGE (t:Entity {{external_id: related_id, type: $related_type}})
+                WITH e, t
+                WHERE NOT EXISTS {{
+                    MATCH (e)-[open:{rel_type}]->(t) WHERE open.from_snap IS NOT NULL AND open.to_snap IS NULL
+                }}
+                CREATE (e)-[:{rel_type} {{from_snap: $snap_id}}]->(t)
                 """
-                session.run(query_co, d_id=deal_id, co_id=company_id)
+                try:
+                    session.run(query,
+                        ext_id=external_id,
+                        obj_type=object_type,
+                        related_type=related_type,
+                        related_ids=related_ids,
+                        snap_id=snapshot_id
+                    )
+                except Exception as e:
+                    logger.error(f"❌ Erreur Neo4j ({rel_type}) : {e}")
 
-            if contact_id:
-                query_c = """
-                MATCH (d:Entity {external_id: $d_id, type: 'deals'})
-                MATCH (c:Entity {external_id: $c_id, type: 'contacts'})
-                MERGE (d)-[:INVOLVES]->(c)
-                """
-                session.run(query_c, d_id=deal_id, c_id=contact_id)    
+    def close_missing(self, snapshot_id: int, object_type: str, present_ids: Iterable[str], chunk_size: int = 5000) -> int:
+        """
+        Ferme la version et les liens sortants des entités absentes du snapshot (suppressions).
+
+        Args:
+            present_ids: IDs extraits pour ce type pendant la sync (extraction complète uniquement)
+
+        Returns:
+            Nombre d'entités fermées
+        """
+        if not self.enabled:
+            return 0
+        present = {str(ext_id) for ext_id in present_ids}
+        with self.driver.session() as session:
+            result = session.run("""
+            MATCH (e:Entity {type: $obj_type})-[v:HAS_VERSION]->(:Snapshot)
+            WHERE v.to_snap IS NULL AND v.from_snap < $snap_id
+            RETURN e.external_id AS ext_id
+            """, obj_type=object_type, snap_id=snapshot_id)
+            missing = [record["ext_id"] for record in result if record["ext_id"] not in present]
 
-    def create_ticket_relations(self, ticket_id: str, contact_id: str = None, company_id: str = None):
+            for start in range(0, len(missing), chunk_size):
+                session.run("""
+                UNWIND $ext_ids AS ext_id
+                MATCH (e:Entity {external_id: ext_id, type: $obj_type})-[r]->()
+                WHERE r.to_snap IS NULL AND r.from_snap IS NOT NULL
+                SET r.to_snap = $snap_id
+                """, ext_ids=missing[start:start + chunk_size], obj_type=object_type, snap_id=snapshot_id)
+
+        if missing:
+            logger.info(f"🕰️ Graphe : {len(missing)} {object_type} fermés au snapshot {snapshot_id}")
+        return len(missing)
+
+    # ========================================
+    # REQUÊTES AS-OF
+    # ========================================
+
+    def get_entity_version(self, object_type: str, external_id: str, snapshot_id: int) -> Optional[dict]:
+        """Version valide au snapshot : {"hash", "from_snap", "to_snap"} (None si l'entité n'existait pas)."""
+        if not self.enabled:
+            return None
         with self.driver.session() as session:
-            if contact_id:
-                query_c = """
-                MATCH (t:Entity {external_id: $t_id, type: 'tickets'})
-                MATCH (c:Entity {external_id: $c_id, type: 'contacts'})
-                MERGE (t)-[:REPORTED_BY]->(c)
-                """
-                session.run(query_c, t_id=ticket_id, c_id=contact_id)
+            record = session.run(VERSION_AT_QUERY, ext_id=external_id, obj_type=object_type, snap_id=snapshot_id).single()
+            return dict(record) if record else None
 
-            if company_id:
-                query_co = """
-                MATCH (t:Entity {external_id: $t_id, type: 'tickets'})
-                MATCH (co:Entity {external_id: $co_id, type: 'companies'})
-                MERGE (t)-[:CONCERNS]->(co)
-                """
-                session.run(query_co, t_id=ticket_id, co_id=company_id)
+    def get_entity_history(self, object_type: str, external_id: str) -> List[dict]:
+        """Versions successives d'une entité, par from_snap croissant."""
+        if not self.enabled:
+            return []
+        with self.driver.session() as session:
+            return [dict(record) for record in session.run(HISTORY_QUERY, ext_id=external_id, obj_type=object_type)]
 
     # ========================================
     # NOUVELLES FONCTIONS : ANALYSE D'IMPACT
@@ -74,7 +187,7 @@ class GraphManager:
 
     def get_entity_relations(self, object_type: str, external_id: str, snapshot_id: int) -> Dict[str, List[str]]:
         """
-        Récupère toutes les relations d'une entité dans un snapshot donné.
+        Récupère toutes les relations d'une entité valides au snapshot donné (as-of).
         
         Returns:
             {
@@ -83,29 +196,13 @@ class GraphManager:
                 "deals": ["101"]
             }
         """
+        if not self.enabled:
+            return {}
         with self.driver.session() as session:
-            query = """
-            MATCH (e:Entity {external_id: $ext_id, type: $obj_type})-[r]->(related:Entity)
-            WHERE EXISTS {
-                MATCH (e)-[:HAS_VERSION]->(s:Snapshot {snap_id: $snap_id})
-            }
-            RETURN type(r) as rel_type, related.type as entity_type, related.external_id as entity_id
-            """
-            
-            result = session.run(query, ext_id=external_id, obj_type=object_type, snap_id=snapshot_id)
-            
-            relations = {}
-            for record in result:
-                entity_type = record["entity_type"]
-                entity_id = record["entity_id"]
-                
-                if entity_type not in relations:
-                    relations[entity_type] = []
-                relations[entity_type].append(entity_id)
-            
-            return relations
+            result = session.run(RELATIONS_AT_QUERY, ext_id=external_id, obj_type=object_type, snap_id=snapshot_id)
+            return _group_relations(result)
 
-    def check_orphans(self, object_type: str, external_id: str, snapshot_id: int, current_entities: Set[str]) -> Dict[str, List[str]]:
+    def check_orphans(self, object_type: str, external_id: str, snapshot_id: int, current_entities: Union[Set[str], Dict[str, Set[str]]], historical_relations: Dict[str, List[str]] = None) -> Dict[str, List[str]]:
         """
         Détecte les orphelins : relations du snapshot qui n'existent plus dans le CRM actuel.
         
@@ -113,7 +210,8 @@ class GraphManager:
             object_type: Type de l'objet à restaurer
             external_id: ID de l'objet à restaurer
             snapshot_id: Snapshot source
-            current_entities: Set des IDs actuellement présents dans le CRM
+            current_entities: Index en mémoire {type: IDs présents} (ou Set global des IDs présents)
+            historical_relations: Relations déjà chargées (évite un aller-retour Neo4j)
         
         Returns:
             {
@@ -123,21 +221,34 @@ class GraphManager:
             }
         """
         # Récupérer les relations historiques
-        historical_relations = self.get_entity_relations(object_type, external_id, snapshot_id)
+        if historical_relations is None:
+            historical_relations = self.get_entity_relations(object_type, external_id, snapshot_id)
         
         orphans = {}
         
         for entity_type, entity_ids in historical_relations.items():
-            missing = [eid for eid in entity_ids if eid not in current_entities]
+            present = current_entities.get(entity_type, set()) if isinstance(current_entities, dict) else current_entities
+            missing = [eid for eid in entity_ids if eid not in present]
             if missing:
                 orphans[f"missing_{entity_type}"] = missing
         
         return orphans
 
-    def get_impact_analysis(self, object_type: str, external_id: str, snapshot_id: int) -> Dict:
+    def _get_complexity(self, relation_count: int) -> str:
+        """Niveau de complexité d'une restauration selon le nombre de relations."""
+        if relation_count == 0:
+            return "low"
+        elif relation_count <= 5:
+            return "medium"
+        return "high"
+
+    def get_impact_analysis(self, object_type: str, external_id: str, snapshot_id: int, relations: Dict[str, List[str]] = None) -> Dict:
         """
         Analyse complète de l'impact d'une restauration.
         
+        Args:
+            relations: Relations déjà chargées (ex. index Postgres), sinon lues dans le graphe
+        
         Returns:
             {
                 "entity": {"type": "contacts", "id": "123"},
@@ -149,32 +260,123 @@ class GraphManager:
                 "complexity": "medium"  # low/medium/high
             }
         """
-        relations = self.get_entity_relations(object_type, external_id, snapshot_id)
+        if relations is None:
+            relations = self.get_entity_relations(object_type, external_id, snapshot_id)
         relation_count = sum(len(ids) for ids in relations.values())
         
-        # Déterminer la complexité
-        if relation_count == 0:
-            complexity = "low"
-        elif relation_count <= 5:
-            complexity = "medium"
-        else:
-            complexity = "high"
-        
         return {
             "entity": {"type": object_type, "id": external_id},
             "historical_relations": relations,
             "relation_count": relation_count,
-            "complexity": complexity
+            "complexity": self._get_complexity(relation_count)
+        }
+
+    # ========================================
+    # ANALYSE D'IMPACT EN MASSE (UNWIND)
+    # ========================================
+
+    def get_entity_relations_bulk(self, entities: List[Tuple[str, str]], snapshot_id: int, chunk_size: int = 5000) -> Dict[Tuple[str, str], Dict[str, List[str]]]:
+        """
+        Récupère les relations de tout un lot d'entités en une requête UNWIND par chunk.
+        
+        Args:
+            entities: [(type, external_id), ...]
+        
+        Returns:
+            {("contacts", "123"): {"companies": ["456"]}, ...}
+        """
+        query = """
+        UNWIND $entities AS ent
+        MATCH (e:Entity {external_id: ent.id, type: ent.type})
+        WHERE EXISTS {
+            MATCH (e)-[v:HAS_VERSION]->(:Snapshot) WHERE VALID_V
+        }
+        MATCH (e)-[r]->(related:Entity)
+        WHERE VALID_R
+        RETURN ent.type as obj_type, ent.id as obj_id, related.type as entity_type, related.external_id as entity_id
+        """.replace("VALID_R", VALID_AT.format(rel="r")).replace("VALID_V", VALID_AT.format(rel="v"))
+        relations = {(obj_type, str(ext_id)): {} for obj_type, ext_id in entities}
+        if not self.enabled:
+            return relations
+        params = [{"type": obj_type, "id": ext_id} for obj_type, ext_id in relations.keys()]
+        
+        with self.driver.session() as session:
+            for start in range(0, len(params), chunk_size):
+                result = session.run(query, entities=params[start:start + chunk_size], snap_id=snapshot_id)
+                for record in result:
+                    entity_relations = relations[(record["obj_type"], record["obj_id"])]
+                    entity_relations.setdefault(record["entity_type"], []).append(record["entity_id"])
+        
+        return relations
+
+    def get_bulk_impact_analysis(self, entities: List[Tuple[str, str]], snapshot_id: int, current_entities: Dict[str, Set[str]] = None, id_mapping: Dict[str, str] = None, relations: Dict[Tuple[str, str], Dict[str, List[str]]] = None) -> Dict:
+        """
+        Analyse d'impact consolidée pour tout un lot de restauration.
+        
+        Args:
+            entities: [(type, external_id), ...]
+            current_entities: Index en mémoire {type: IDs présents} pour la détection d'orphelins
+            id_mapping: {"type/old_id": new_id} pour suivre les entités déjà ressuscitées
+            relations: Relations déjà chargées par entité (ex. AssociationIndex), sinon lues dans le graphe
+        
+        Returns:
+            {
+                "items": {"contacts/123": {"entity", "historical_relations", "relation_count", "complexity", "orphans", "safe"}},
+                "summary": {"total": 10, "unsafe": 2, "relation_count": 14, "complexity": {"low": 5, ...}, "missing": {"companies": 1}}
+            }
+        """
+        id_mapping = id_mapping or {}
+        all_relations = relations if relations is not None else self.get_entity_relations_bulk(entities, snapshot_id)
+        
+        items = {}
+        summary = {
+            "total": len(all_relations),
+            "unsafe": 0,
+            "relation_count": 0,
+            "complexity": {"low": 0, "medium": 0, "high": 0},
+            "missing": {}
         }
+        for (object_type, external_id), relations in all_relations.items():
+            relations = {
+                rel_type: [id_mapping.get(f"{rel_type}/{rel_id}", rel_id) for rel_id in rel_ids]
+                for rel_type, rel_ids in relations.items()
+            }
+            relation_count = sum(len(ids) for ids in relations.values())
+            complexity = self._get_complexity(relation_count)
+            orphans = {}
+            if current_entities is not None:
+                orphans = self.check_orphans(object_type, external_id, snapshot_id, current_entities, historical_relations=relations)
+            
+            items[f"{object_type}/{external_id}"] = {
+                "entity": {"type": object_type, "id": external_id},
+                "historical_relations": relations,
+                "relation_count": relation_count,
+                "complexity": complexity,
+                "orphans": orphans,
+                "safe": not orphans
+            }
+            summary["relation_count"] += relation_count
+            summary["complexity"][complexity] += 1
+            if orphans:
+                summary["unsafe"] += 1
+                for missing_type, missing_ids in orphans.items():
+                    entity_type = missing_type.replace("missing_", "")
+                    summary["missing"][entity_type] = summary["missing"].get(entity_type, 0) + len(missing_ids)
+        
+        return {"items": items, "summary": summary}
 
-    def visualize_entity_graph(self, object_type: str, external_id: str, snapshot_id: int) -> str:
+    def visualize_entity_graph(self, object_type: str, external_id: str, snapshot_id: int, relations: Dict[str, List[str]] = None) -> str:
         """
         Génère une représentation ASCII de l'entité et ses relations.
         
+        Args:
+            relations: Relations déjà chargées (évite de rejouer la requête)
+        
         Returns:
             String ASCII art du graphe
         """
-        relations = self.get_entity_relations(object_type, external_id, snapshot_id)
+        if relations is None:
+            relations = self.get_entity_relations(object_type, external_id, snapshot_id)
         
         graph = []
         graph.append(f"\n┌─ {object_type.upper()} #{external_id}")
@@ -187,4 +389,39 @@ class GraphManager:
         
         graph.append("└─")
         
-        return "\n".join(graph)
\ No newline at end of file
+        return "\n".join(graph)
+
+
+class AsyncGraphReader:
+    """
+    Lectures as-of du graphe pour les endpoints FastAPI (driver Neo4j async).
+
+    Mêmes requêtes et mêmes résultats que GraphManager ; l'attente de Neo4j rend la main à la
+    boucle d'événements au lieu d'occuper un thread du threadpool.
+    """
+
+    def __init__(self):
+        self.driver = async_neo4j_driver
+        self.enabled = settings.neo4j.enabled
+
+    async def get_entity_version(self, object_type: str, external_id: str, snapshot_id: int) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        async with self.driver.session() as session:
+            result = await session.run(VERSION_AT_QUERY, ext_id=external_id, obj_type=object_type, snap_id=snapshot_id)
+            record = await result.single()
+            return dict(record) if record else None
+
+    async def get_entity_history(self, object_type: str, external_id: str) -> List[dict]:
+        if not self.enabled:
+            return []
+        async with self.driver.session() as session:
+            result = await session.run(HISTORY_QUERY, ext_id=external_id, obj_type=object_type)
+            return [dict(record) async for record in result]
+
+    async def get_entity_relations(self, object_type: str, external_id: str, snapshot_id: int) -> Dict[str, List[str]]:
+        if not self.enabled:
+            return {}
+        async with self.driver.session() as session:
+            result = await session.run(RELATIONS_AT_QUERY, ext_id=external_id, obj_type=object_type, snap_id=snapshot_id)
+            return _group_relations([record async for record in result])
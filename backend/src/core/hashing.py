@@ -14,4 +14,11 @@ def calculate_content_hash(data: dict[str, Any]) -> str:
     encoded_data = canonical_json.encode('utf-8')
     
     # 3. On calcule le SHA-256 et on le retourne en format hexadécimal (chaîne de caractères)
-    return hashlib.sha256(encoded_data).hexdigest()
\ No newline at end of file
+    return hashlib.sha256(encoded_data).hexdigest()
+
+def calculate_properties_hash(properties: dict[str, Any], keys: list[str]) -> str:
+    """
+    Empreinte d'un sous-ensemble de propriétés (mêmes règles que calculate_content_hash).
+    Sert à comparer l'état d'un snapshot et l'état live du CRM sur les seules clés restaurables.
+    """
+    return calculate_content_hash({key: properties.get(key) for key in keys})
@@ -0,0 +1,104 @@
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlmodel import Session, select
+
+from src.core.models import IdMapping
+from src.utils.db import engine
+
+# Nombre de mappings bufferisés avant un insert groupé
+MAPPING_FLUSH_SIZE = 500
+
+
+class IdMappingResolver:
+    """
+    Résolution old_id → id actuel sur TOUT l'historique des restaurations.
+
+    Les mappings des restaurations précédentes sont préchargés en une requête et les chaînes
+    (old → new → newer) sont réduites à la volée : resolve() renvoie toujours l'ID le plus récent.
+    Les nouveaux mappings sont écrits par lots.
+
+    S'utilise comme un dict en lecture : resolver.get("contacts/123", "123").
+    """
+
+    def __init__(self, snapshot_id: int, flush_size: int = MAPPING_FLUSH_SIZE):
+        self.snapshot_id = snapshot_id
+        self.flush_size = flush_size
+        self._map: Dict[str, str] = {}  # {"type/old_id": new_id} (un maillon de chaîne)
+        self._buffer: List[dict] = []
+        self._loaded = False
+
+    def load(self):
+        """Précharge tous les mappings historiques (ordre chronologique : le plus récent gagne)."""
+        with Session(engine) as session:
+            rows = session.exec(
+                select(IdMapping.object_type, IdMapping.old_id, IdMapping.new_id).order_by(IdMapping.id)
+            ).all()
+        for object_type, old_id, new_id in rows:
+            if old_id != new_id:
+                self._map[f"{object_type}/{old_id}"] = new_id
+        self._loaded = True
+        # Réduction des chaînes en une passe
+        for key in list(self._map):
+            self._resolve_key(key)
+        if rows:
+            logger.info(f"🧬 {len(self._map)} mappings d'IDs historiques chargés")
+
+    def _resolve_key(self, key: str) -> Optional[str]:
+        """Suit la chaîne old → new → newer et compresse le chemin parcouru."""
+        if key not in self._map:
+            return None
+        object_type = key.split("/", 1)[0]
+        path = []
+        seen = set()
+        current_key = key
+        while current_key in self._map and current_key not in seen:
+            seen.add(current_key)
+            path.append(current_key)
+            current_key = f"{object_type}/{self._map[current_key]}"
+        final_id = self._map[path[-1]]
+        for visited in path:
+            self._map[visited] = final_id
+        return final_id
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        if not self._loaded:
+            self.load()
+        final_id = self._resolve_key(key)
+        return final_id if final_id is not None else default
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def resolve(self, object_type: str, old_id: str) -> str:
+        """ID actuel d'un objet (lui-même s'il n'a jamais changé)."""
+        return self.get(f"{object_type}/{old_id}", old_id)
+
+    def remember(self, object_type: str, old_id: str, new_id: str):
+        """Ajoute un mapping en mémoire uniquement (déjà persisté ailleurs, ex. journal)."""
+        if not self._loaded:
+            self.load()
+        if str(old_id) != str(new_id):
+            self._map[f"{object_type}/{old_id}"] = str(new_id)
+
+    def add(self, object_type: str, old_id: str, new_id: str):
+        """Ajoute un mapping en mémoire et le bufferise pour un insert groupé."""
+        self.remember(object_type, old_id, new_id)
+        self._buffer.append({
+            "snapshot_id": self.snapshot_id,
+            "object_type": object_type,
+            "old_id": str(old_id),
+            "new_id": str(new_id)
+        })
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Écrit les mappings bufferisés en un seul commit."""
+        if not self._buffer:
+            return
+        buffer, self._buffer = self._buffer, []
+        with Session(engine) as session:
+            session.add_all([IdMapping(**values) for values in buffer])
+            session.commit()
+        logger.debug(f"💾 {len(buffer)} mappings sauvegardés")
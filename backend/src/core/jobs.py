@@ -0,0 +1,361 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from src.utils.config import settings
+from src.utils.db import get_redis_client
+
+# Clés Redis
+QUEUE_KEY = "zibridge:jobs:queue"
+JOB_KEY = "zibridge:job:{job_id}"
+JOB_EVENTS_KEY = "zibridge:job:{job_id}:events"
+PORTAL_LOCK_KEY = "zibridge:portal:{portal}:active_job"
+# Présence d'au moins un worker (posée par chaque worker à chaque battement)
+WORKERS_KEY = "zibridge:workers:alive"
+
+# Battement des workers et des jobs en cours (secondes)
+HEARTBEAT_INTERVAL = 10
+# Un worker sans battement depuis WORKER_TTL est considéré absent
+WORKER_TTL = 3 * HEARTBEAT_INTERVAL
+# Verrou portail : court, prolongé par les battements (job en cours ou en file d'un worker vivant) ;
+# expire peu après la mort du processus qui le portait
+PORTAL_LOCK_TTL = 6 * HEARTBEAT_INTERVAL
+# Les jobs terminés restent consultables une semaine
+JOB_TTL = 7 * 24 * 3600
+# Événements de progression conservés par job (flux SSE)
+MAX_JOB_EVENTS = 1000
+
+
+class PortalBusyError(Exception):
+    """Un job est déjà en cours (ou en file) pour ce portail."""
+
+    def __init__(self, portal: str, job_id: str):
+        super().__init__(f"Un job est déjà actif pour le portail '{portal}' : {job_id}")
+        self.portal = portal
+        self.job_id = job_id
+
+
+class LocalRedis:
+    """
+    Stand-in Redis en mémoire (sous-ensemble utilisé par JobQueue), thread-safe.
+    Sert de fallback quand Redis est indisponible, et de double pour les tests.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._cond = threading.Condition()
+
+    def _purge(self, name: str):
+        expires_at = self._expires.get(name)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+
+    def ping(self) -> bool:
+        return True
+
+    def set(self, name: str, value: str, nx: bool = False, ex: Optional[int] = None):
+        with self._cond:
+            self._purge(name)
+            if nx and name in self._data:
+                return None
+            self._data[name] = str(value)
+            self._expires.pop(name, None)
+            if ex:
+                self._expires[name] = time.monotonic() + ex
+            return True
+
+    def get(self, name: str) -> Optional[str]:
+        with self._cond:
+            self._purge(name)
+            value = self._data.get(name)
+            return value if isinstance(value, str) else None
+
+    def delete(self, *names: str) -> int:
+        with self._cond:
+            deleted = 0
+            for name in names:
+                self._expires.pop(name, None)
+                if self._data.pop(name, None) is not None:
+                    deleted += 1
+            return deleted
+
+    def expire(self, name: str, seconds: int) -> bool:
+        with self._cond:
+            self._purge(name)
+            if name not in self._data:
+                return False
+            self._expires[name] = time.monotonic() + seconds
+            return True
+
+    def hset(self, name: str, mapping: Dict[str, Any]) -> int:
+        with self._cond:
+            self._purge(name)
+            current = self._data.setdefault(name, {})
+            added = len(set(mapping) - set(current))
+            current.update({k: str(v) for k, v in mapping.items()})
+            return added
+
+    def hgetall(self, name: str) -> Dict[str, str]:
+        with self._cond:
+            self._purge(name)
+            value = self._data.get(name)
+            return dict(value) if isinstance(value, dict) else {}
+
+    def lrange(self, name: str, start: int, end: int) -> list:
+        with self._cond:
+            self._purge(name)
+            queue = self._data.get(name) or []
+            end = len(queue) if end == -1 else end + 1
+            return list(queue[start:end])
+
+    def ltrim(self, name: str, start: int, end: int) -> bool:
+        with self._cond:
+            queue = self._data.get(name)
+            if queue:
+                end = len(queue) if end == -1 else end + 1
+                self._data[name] = queue[start:end]
+            return True
+
+    def rpush(self, name: str, *values: str) -> int:
+        with self._cond:
+            queue = self._data.setdefault(name, [])
+            queue.extend(str(v) for v in values)
+            self._cond.notify_all()
+            return len(queue)
+
+    def blpop(self, keys, timeout: int = 0):
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            while True:
+                for key in keys:
+                    queue = self._data.get(key)
+                    if queue:
+                        return key, queue.pop(0)
+                remaining = deadline - time.monotonic() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+
+class JobContext:
+    """Passé aux handlers : permet de publier la progression du job."""
+
+    def __init__(self, queue: "JobQueue", job_id: str, portal: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.portal = portal
+        self._progress: Dict[str, Any] = {}
+        self._seq = 0
+
+    def progress(self, **fields):
+        """Fusionne les champs dans la progression du job (et prolonge le verrou portail)."""
+        self._progress.update(fields)
+        self._progress["updated_at"] = datetime.utcnow().isoformat()
+        self.queue._update(self.job_id, progress=json.dumps(self._progress))
+        self.queue.client.expire(PORTAL_LOCK_KEY.format(portal=self.portal), PORTAL_LOCK_TTL)
+
+    def publish(self, event: dict):
+        """Sink du ProgressEmitter : ajoute l'événement au flux du job et met à jour sa progression."""
+        events_key = JOB_EVENTS_KEY.format(job_id=self.job_id)
+        # Numéro de séquence : sert d'ID SSE (reprise via Last-Event-ID), stable malgré le ltrim
+        self._seq += 1
+        length = self.queue.client.rpush(events_key, json.dumps({"seq": self._seq, **event}, default=str))
+        if length > MAX_JOB_EVENTS:
+            self.queue.client.ltrim(events_key, -MAX_JOB_EVENTS, -1)
+        self.progress(**{k: v for k, v in event.items() if k not in ("event", "ts")})
+
+
+# ========================================
+# HANDLERS (exécutés dans un worker)
+# ========================================
+
+def _run_sync_job(ctx: JobContext, partitions: int = None) -> dict:
+    from scripts.run_sync import sync_all
+    snapshot_id = sync_all(on_event=ctx.publish, partitions=partitions)
+    return {"snapshot_id": snapshot_id}
+
+
+def _run_restore_job(ctx: JobContext, snapshot_id: int = None, selective: bool = True, skip_checks: bool = False,
+                     batch: bool = False, policy: str = "skip-unsafe", restore_id: int = None) -> dict:
+    from src.core.restore import RestoreEngine
+    if restore_id:
+        ctx.progress(phase="resume", restore_id=restore_id)
+        # Pas de terminal dans un worker : une reprise 'interactive' échoue au lieu d'attendre un prompt
+        return RestoreEngine.resume_restore(restore_id, non_interactive=True, on_event=ctx.publish)
+    restore_engine = RestoreEngine(snapshot_id=snapshot_id, on_event=ctx.publish)
+    ctx.progress(phase="plan", snapshot_id=snapshot_id)
+    plan = restore_engine.build_restore_plan("selective" if selective else "full", with_checks=not skip_checks)
+    ctx.progress(phase="execute", total=plan["summary"]["total"], estimated_api_calls=plan["estimated_api_calls"])
+    return restore_engine.execute_plan(plan, policy="force" if skip_checks else policy, batch=batch)
+
+
+JOB_HANDLERS: Dict[str, Callable[..., dict]] = {
+    "sync": _run_sync_job,
+    "restore": _run_restore_job,
+}
+
+
+class JobQueue:
+    """
+    File de jobs sync/restore.
+
+    - Redis disponible : les jobs sont mis en file et exécutés par des workers séparés
+      (`python zibridge.py worker`), isolés des timeouts HTTP.
+    - Sinon : fallback en mémoire (LocalRedis) et exécution dans un thread du processus courant.
+
+    Un seul job actif (en file ou en cours) par portail.
+    """
+
+    def __init__(self, client=None, portal: str = None):
+        self.portal = portal or settings.hubspot_portal_id
+        if client is None:
+            client = get_redis_client()
+        self.in_process = client is None or isinstance(client, LocalRedis)
+        self.client = client if client is not None else LocalRedis()
+        # Aussi utilisé avec Redis quand aucun worker ne tourne (threads créés à la demande)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zibridge-job")
+
+    def _update(self, job_id: str, **fields):
+        key = JOB_KEY.format(job_id=job_id)
+        self.client.hset(key, mapping={k: v for k, v in fields.items() if v is not None})
+
+    def workers_alive(self) -> bool:
+        """Au moins un worker a battu depuis WORKER_TTL secondes."""
+        return self.client.get(WORKERS_KEY) is not None
+
+    def heartbeat(self, worker_id: str):
+        """
+        Battement d'un worker : signale sa présence et prolonge le verrou des jobs en file,
+        qui peuvent attendre longtemps derrière les jobs d'autres portails.
+        """
+        self.client.set(WORKERS_KEY, worker_id, ex=WORKER_TTL)
+        for job_id in self.client.lrange(QUEUE_KEY, 0, -1):
+            portal = self.client.hgetall(JOB_KEY.format(job_id=job_id)).get("portal")
+            lock_key = PORTAL_LOCK_KEY.format(portal=portal)
+            if portal and self.client.get(lock_key) == job_id:
+                self.client.expire(lock_key, PORTAL_LOCK_TTL)
+
+    def submit(self, kind: str, **params) -> str:
+        """
+        Met un job en file. Lève PortalBusyError si le portail a déjà un job actif.
+        Sans worker vivant, le job s'exécute dans ce processus plutôt que d'attendre en file.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Type de job inconnu : {kind}")
+        job_id = uuid.uuid4().hex[:12]
+        lock_key = PORTAL_LOCK_KEY.format(portal=self.portal)
+        if not self.client.set(lock_key, job_id, nx=True, ex=PORTAL_LOCK_TTL):
+            raise PortalBusyError(self.portal, self.client.get(lock_key))
+
+        self._update(
+            job_id,
+            id=job_id, kind=kind, portal=self.portal, status="queued",
+            params=json.dumps(params), progress=json.dumps({}),
+            created_at=datetime.utcnow().isoformat()
+        )
+        logger.info(f"🧾 Job {kind} #{job_id} en file (portail {self.portal})")
+
+        if self.in_process:
+            self._executor.submit(self.run_job, job_id)
+        elif not self.workers_alive():
+            logger.warning(f"⚠️ Aucun worker actif : job #{job_id} exécuté dans ce processus")
+            self._executor.submit(self.run_job, job_id)
+        else:
+            self.client.rpush(QUEUE_KEY, job_id)
+        return job_id
+
+    def claim(self, timeout: int) -> Optional[str]:
+        """Retire le prochain job de la file (None après `timeout` secondes sans job)."""
+        popped = self.client.blpop(QUEUE_KEY, timeout=timeout)
+        return popped[1] if popped else None
+
+    def _keep_lock(self, lock_key: str, job_id: str, stop: threading.Event):
+        """Prolonge le verrou portail tant que le job tourne (même sans progression publiée)."""
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            if self.client.get(lock_key) == job_id:
+                self.client.expire(lock_key, PORTAL_LOCK_TTL)
+
+    def get_events(self, job_id: str, after: int = 0) -> list:
+        """Événements de progression d'un job postérieurs à la séquence `after`."""
+        events = (json.loads(e) for e in self.client.lrange(JOB_EVENTS_KEY.format(job_id=job_id), 0, -1))
+        return [event for event in events if event["seq"] > after]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """État d'un job (params, progress et result décodés)."""
+        raw = self.client.hgetall(JOB_KEY.format(job_id=job_id))
+        if not raw:
+            return None
+        job = dict(raw)
+        for field in ("params", "progress", "result"):
+            if field in job:
+                job[field] = json.loads(job[field])
+        return job
+
+    def run_job(self, job_id: str):
+        """Exécute un job et libère le verrou du portail, quelle que soit l'issue."""
+        job = self.get(job_id)
+        if not job:
+            logger.error(f"❌ Job #{job_id} introuvable")
+            return
+        lock_key = PORTAL_LOCK_KEY.format(portal=job["portal"])
+        # Verrou expiré pendant l'attente (workers arrêtés) : repris s'il est libre
+        if not self.client.set(lock_key, job_id, nx=True, ex=PORTAL_LOCK_TTL) and self.client.get(lock_key) != job_id:
+            owner = self.client.get(lock_key)
+            self._update(job_id, status="failed", error=str(PortalBusyError(job["portal"], owner)),
+                         finished_at=datetime.utcnow().isoformat())
+            logger.error(f"❌ Job {job['kind']} #{job_id} abandonné : le portail a un autre job actif ({owner})")
+            self.client.expire(JOB_KEY.format(job_id=job_id), JOB_TTL)
+            return
+        self._update(job_id, status="running", started_at=datetime.utcnow().isoformat())
+        ctx = JobContext(self, job_id, job["portal"])
+        stop = threading.Event()
+        threading.Thread(target=self._keep_lock, args=(lock_key, job_id, stop), daemon=True).start()
+        logger.info(f"⚙️ Job {job['kind']} #{job_id} démarré")
+        try:
+            result = JOB_HANDLERS[job["kind"]](ctx, **job["params"])
+            self._update(job_id, status="completed", result=json.dumps(result, default=str),
+                         finished_at=datetime.utcnow().isoformat())
+            logger.success(f"✅ Job {job['kind']} #{job_id} terminé")
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), finished_at=datetime.utcnow().isoformat())
+            logger.error(f"❌ Job {job['kind']} #{job_id} en échec : {e}")
+        finally:
+            stop.set()
+            if self.client.get(lock_key) == job_id:
+                self.client.delete(lock_key)
+            self.client.expire(JOB_KEY.format(job_id=job_id), JOB_TTL)
+            self.client.expire(JOB_EVENTS_KEY.format(job_id=job_id), JOB_TTL)
+
+
+def run_worker(poll_timeout: int = 5):
+    """Boucle d'un worker : consomme la file Redis et exécute les jobs un par un."""
+    queue = JobQueue()
+    if queue.in_process:
+        logger.error("❌ Worker impossible sans Redis (les jobs s'exécutent alors dans le processus de l'API)")
+        return
+    worker_id = uuid.uuid4().hex[:12]
+
+    # Battement indépendant de la boucle : continue pendant l'exécution d'un job
+    def beat():
+        while True:
+            try:
+                queue.heartbeat(worker_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Battement du worker {worker_id} échoué : {e}")
+            time.sleep(HEARTBEAT_INTERVAL)
+
+    threading.Thread(target=beat, daemon=True, name="zibridge-heartbeat").start()
+    logger.info(f"👷 Worker Zibridge prêt ({worker_id})")
+    while True:
+        job_id = queue.claim(timeout=poll_timeout)
+        if job_id:
+            queue.run_job(job_id)
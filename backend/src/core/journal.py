@@ -0,0 +1,110 @@
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+from sqlmodel import Session, select
+
+from src.core.models import RestoreOperation, RestoreRun
+from src.utils.db import engine
+
+# Nombre d'opérations bufferisées avant un commit
+JOURNAL_FLUSH_SIZE = 100
+
+
+class RestoreJournal:
+    """
+    Journal d'une restauration : statut et ID résultant de chaque objet, écrits par lots.
+
+    Permet de reprendre une restauration interrompue sans rejouer le travail déjà fait
+    (en particulier les recréations, qui ne sont pas idempotentes).
+    """
+
+    def __init__(self, run: RestoreRun, flush_size: int = JOURNAL_FLUSH_SIZE):
+        self.restore_id = run.id
+        self.run = run
+        self.flush_size = flush_size
+        self._buffer: Dict[Tuple[str, str], dict] = {}
+
+    @classmethod
+    def start(cls, snapshot_id: int, plan: dict, policy: str, batch: bool) -> "RestoreJournal":
+        """Ouvre un nouveau journal et y conserve le plan."""
+        with Session(engine) as session:
+            run = RestoreRun(snapshot_id=snapshot_id, mode=plan.get("mode", "full"), policy=policy, batch=batch, plan=plan)
+            session.add(run)
+            session.commit()
+            session.refresh(run)
+        logger.info(f"📒 Journal de restauration #{run.id} ouvert")
+        return cls(run)
+
+    @classmethod
+    def resume(cls, restore_id: int) -> "RestoreJournal":
+        """Rouvre le journal d'une restauration interrompue."""
+        with Session(engine) as session:
+            run = session.get(RestoreRun, restore_id)
+            if not run:
+                raise ValueError(f"Restauration #{restore_id} introuvable")
+            if run.status == "completed":
+                logger.warning(f"📒 Restauration #{restore_id} déjà terminée")
+            run.status = "running"
+            run.finished_at = None
+            session.add(run)
+            session.commit()
+            session.refresh(run)
+        logger.info(f"📒 Reprise de la restauration #{restore_id}")
+        return cls(run)
+
+    def load_state(self) -> Dict[Tuple[str, str], dict]:
+        """État déjà journalisé : {(type, id): {"result", "new_id", "state"}}."""
+        with Session(engine) as session:
+            operations = session.exec(
+                select(RestoreOperation).where(RestoreOperation.restore_id == self.restore_id)
+            ).all()
+        return {
+            (op.object_type, op.object_id): {"result": op.result, "new_id": op.new_id, "state": op.state}
+            for op in operations
+        }
+
+    def record(self, object_type: str, object_id: str, result: str, new_id: Optional[str], state: str, durable: bool = False):
+        """
+        Bufferise une opération. durable=True force le commit immédiat
+        (après une recréation, pour ne jamais recréer deux fois le même objet).
+        """
+        self._buffer[(object_type, str(object_id))] = {"result": result, "new_id": new_id, "state": state}
+        if durable or len(self._buffer) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Écrit le buffer en un seul commit (insert ou mise à jour des lignes existantes)."""
+        if not self._buffer:
+            return
+        buffer, self._buffer = self._buffer, {}
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            existing = session.exec(
+                select(RestoreOperation).where(
+                    RestoreOperation.restore_id == self.restore_id,
+                    RestoreOperation.object_id.in_([object_id for _, object_id in buffer])
+                )
+            ).all()
+            rows = {(op.object_type, op.object_id): op for op in existing}
+            for (object_type, object_id), values in buffer.items():
+                row = rows.get((object_type, object_id))
+                if row is None:
+                    row = RestoreOperation(restore_id=self.restore_id, object_type=object_type, object_id=object_id, **values)
+                else:
+                    row.result, row.new_id, row.state = values["result"], values["new_id"], values["state"]
+                row.updated_at = now
+                session.add(row)
+            session.commit()
+        logger.debug(f"📒 {len(buffer)} opérations journalisées (restauration #{self.restore_id})")
+
+    def finish(self, status: str):
+        """Vide le buffer et clôt la restauration (completed / failed)."""
+        self.flush()
+        with Session(engine) as session:
+            run = session.get(RestoreRun, self.restore_id)
+            run.status = status
+            run.finished_at = datetime.utcnow()
+            session.add(run)
+            session.commit()
+        logger.info(f"📒 Restauration #{self.restore_id} : {status}")
@@ -0,0 +1,119 @@
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from loguru import logger
+from sqlmodel import Session, select
+
+from src.core.models import Snapshot, SnapshotItem
+from src.utils.db import engine
+
+
+class LiveEntityIndex:
+    """
+    Index en mémoire des IDs présents dans le CRM actuel, construit UNE fois par restauration.
+
+    Sources possibles :
+    - "live"     : une extraction complète par type via le connecteur
+    - "snapshot" : les IDs du dernier snapshot complété (une seule requête SQL)
+    - "auto"     : le dernier snapshot complété s'il est plus récent que max_age_seconds, sinon "live"
+
+    Politique de fraîcheur : chaque type est rechargé quand son entrée dépasse max_age_seconds.
+    """
+
+    def __init__(self, connector, source: str = "auto", max_age_seconds: int = 300):
+        if source not in ("auto", "live", "snapshot"):
+            raise ValueError(f"Source d'index inconnue : {source}")
+        self.connector = connector
+        self.source = source
+        self.max_age_seconds = max_age_seconds
+        self._ids: Dict[str, Set[str]] = {}
+        self._loaded_at: Dict[str, float] = {}
+
+    def _is_fresh(self, object_type: str) -> bool:
+        loaded_at = self._loaded_at.get(object_type)
+        return loaded_at is not None and (time.monotonic() - loaded_at) < self.max_age_seconds
+
+    def _latest_completed_snapshot(self) -> Optional[Snapshot]:
+        with Session(engine) as session:
+            return session.exec(
+                select(Snapshot).where(Snapshot.status == "completed").order_by(Snapshot.id.desc())
+            ).first()
+
+    def _load_from_snapshot(self, snapshot_id: int, object_types: Iterable[str]) -> Dict[str, Set[str]]:
+        """Charge les IDs de plusieurs types en une seule requête."""
+        loaded = {object_type: set() for object_type in object_types}
+        with Session(engine) as session:
+            rows = session.exec(
+                select(SnapshotItem.object_type, SnapshotItem.object_id).where(
+                    SnapshotItem.snapshot_id == snapshot_id,
+                    SnapshotItem.object_type.in_(list(loaded.keys()))
+                )
+            ).all()
+        for object_type, object_id in rows:
+            loaded[object_type].add(str(object_id))
+        return loaded
+
+    def _load_live(self, object_type: str) -> Set[str]:
+        current_ids = set()
+        try:
+            for item in self.connector.extract_data(object_type):
+                item_id = item.get("id")
+                if item_id:
+                    current_ids.add(str(item_id))
+        except Exception as e:
+            logger.warning(f"⚠️ Impossible de récupérer les entités actuelles {object_type}: {e}")
+        return current_ids
+
+    def _resolve_snapshot(self) -> Optional[Snapshot]:
+        """Retourne le snapshot à utiliser comme source, ou None pour une extraction live."""
+        if self.source == "live":
+            return None
+        snap = self._latest_completed_snapshot()
+        if not snap:
+            if self.source == "snapshot":
+                logger.warning("⚠️ Aucun snapshot complété : bascule sur l'extraction live")
+            return None
+        age = (datetime.utcnow() - snap.timestamp).total_seconds()
+        if self.source == "auto" and age > self.max_age_seconds:
+            logger.info(f"⏱️ Snapshot #{snap.id} trop ancien ({int(age)}s) : extraction live")
+            return None
+        return snap
+
+    def load(self, object_types: Iterable[str]):
+        """Charge (ou recharge si périmés) les types demandés."""
+        stale = [t for t in dict.fromkeys(object_types) if not self._is_fresh(t)]
+        if not stale:
+            return
+
+        snap = self._resolve_snapshot()
+        if snap:
+            logger.info(f"📇 Index live depuis le Snapshot #{snap.id} : {', '.join(stale)}")
+            loaded = self._load_from_snapshot(snap.id, stale)
+        else:
+            logger.info(f"📇 Index live par extraction CRM : {', '.join(stale)}")
+            loaded = {object_type: self._load_live(object_type) for object_type in stale}
+
+        now = time.monotonic()
+        for object_type, ids in loaded.items():
+            self._ids[object_type] = ids
+            self._loaded_at[object_type] = now
+            logger.debug(f"📇 {object_type} : {len(ids)} IDs indexés")
+
+    def ids(self, object_type: str) -> Set[str]:
+        self.load([object_type])
+        return self._ids.get(object_type, set())
+
+    def contains(self, object_type: str, external_id: str) -> bool:
+        return str(external_id) in self.ids(object_type)
+
+    def view(self, object_types: Iterable[str]) -> Dict[str, Set[str]]:
+        """Vue {type: ids} pour les checks d'orphelins en mémoire."""
+        object_types = list(object_types)
+        self.load(object_types)
+        return {object_type: self._ids.get(object_type, set()) for object_type in object_types}
+
+    def mark_present(self, object_type: str, external_id: str):
+        """Un objet ressuscité pendant la restauration devient présent dans le CRM."""
+        if object_type in self._ids:
+            self._ids[object_type].add(str(external_id))
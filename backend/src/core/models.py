@@ -1,5 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from sqlalchemy import BigInteger, Column, Index, JSON
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlmodel import Field, SQLModel, create_engine
 
 class Snapshot(SQLModel, table=True):
@@ -16,21 +18,79 @@ class Blob(SQLModel, table=True):
 
 class SnapshotItem(SQLModel, table=True):
     """Le lien entre un snapshot et un objet à un instant T."""
+    __table_args__ = (
+        # Lectures ciblées d'un snapshot (restauration, index d'associations)
+        Index("ix_snapshotitem_snap_type_object", "snapshot_id", "object_type", "object_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     snapshot_id: int = Field(foreign_key="snapshot.id")
     object_id: str  # L'ID original (ex: ID HubSpot "101")
     object_type: str # ex: "contact"
     content_hash: str = Field(foreign_key="blob.hash")
 
+# 🔗 INDEX D'ASSOCIATIONS : les liens des blobs, interrogeables en SQL
+class BlobAssociation(SQLModel, table=True):
+    """
+    Liens (_zibridge_links) d'un blob : une ligne par (hash, type lié), IDs liés en tableau d'entiers.
+    Indexé par contenu comme les blobs : un objet inchangé d'un snapshot à l'autre ne coûte aucune ligne,
+    les arêtes d'un snapshot s'obtiennent par jointure avec SnapshotItem.
+    """
+    content_hash: str = Field(foreign_key="blob.hash", primary_key=True)
+    related_type: str = Field(primary_key=True)
+    related_ids: List[int] = Field(sa_column=Column(ARRAY(BigInteger), nullable=False))
+
+# 🔢 VERSION D'INDEX : un backfill enrichit des snapshots déjà complets
+class IndexVersion(SQLModel, table=True):
+    """
+    Compteur incrémenté quand un index dérivé (ex. "associations") change pour des snapshots déjà
+    complets : invalide les caches du graphe CSR et les ETags des réponses calculées à partir des liens.
+    """
+    name: str = Field(primary_key=True)
+    version: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
 # 🆕 NOUVEAU MODÈLE : Tracking des changements d'ID
 class IdMapping(SQLModel, table=True):
     """
     Stocke les mappings old_id → new_id quand un objet est restauré avec un nouvel ID.
     Essentiel pour recréer les associations après une restauration.
     """
+    __table_args__ = (
+        Index("ix_idmapping_type_old_id", "object_type", "old_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     snapshot_id: int  # Snapshot source de la restauration
     object_type: str  # "contacts", "companies", "deals"
     old_id: str  # ID dans le snapshot (ancien ID HubSpot)
     new_id: str  # Nouvel ID HubSpot après restauration
-    created_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+# 📒 JOURNAL DE RESTAURATION : reprise après crash / timeout
+class RestoreRun(SQLModel, table=True):
+    """Une exécution de plan de restauration (le plan est conservé pour pouvoir reprendre)."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    snapshot_id: int = Field(foreign_key="snapshot.id")
+    mode: str  # selective, full
+    policy: str  # skip-unsafe, force, interactive
+    batch: bool = False
+    status: str = "running"  # running, completed, failed
+    plan: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+class RestoreOperation(SQLModel, table=True):
+    """
+    Une ligne par objet du plan : où en est-il et quel ID a-t-il dans le CRM.
+    state : pushed (objet écrit, associations à refaire) / done / failed
+    """
+    __table_args__ = (
+        Index("ix_restoreoperation_run_object", "restore_id", "object_type", "object_id", unique=True),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    restore_id: int = Field(foreign_key="restorerun.id")
+    object_type: str
+    object_id: str  # ID dans le snapshot
+    result: str  # updated, resurrected, merged, identical, failed
+    new_id: Optional[str] = None  # ID actuel dans le CRM
+    state: str
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
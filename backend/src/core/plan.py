@@ -0,0 +1,69 @@
+import json
+import math
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from src.connectors.rest_api import BATCH_SIZE
+
+# Version du format de plan (à incrémenter si la structure change)
+PLAN_VERSION = 1
+
+# Politiques d'exécution d'un plan
+# - interactive : confirmation humaine pour chaque objet à risque (CLI uniquement)
+# - skip-unsafe : les objets à risque sont ignorés, le reste part sans intervention
+# - force       : tout le plan est exécuté, alertes comprises
+POLICIES = ("interactive", "skip-unsafe", "force")
+
+# Profondeur du rayon d'impact calculé pour chaque objet du plan (graphe CSR du snapshot)
+BLAST_RADIUS_DEPTH = 2
+
+
+def estimate_api_calls(objects: list[dict[str, Any]]) -> dict[str, int]:
+    """
+    Estime le nombre d'appels HubSpot pour exécuter un plan.
+
+    Returns:
+        {"single": appels en mode unitaire, "batch": appels en mode batch}
+    """
+    single = 0
+    per_type: dict[str, dict[str, int]] = {}
+    assoc_per_pair: dict[tuple, int] = {}
+
+    for entry in objects:
+        counts = per_type.setdefault(entry["type"], {"update": 0, "recreate": 0, "upsert": 0})
+        counts[entry["operation"]] += 1
+        # PATCH (+ POST après 404 pour une recréation)
+        single += 2 if entry["operation"] == "recreate" else 1
+
+        relations = entry.get("impact", {}).get("historical_relations", {})
+        for related_type, related_ids in relations.items():
+            single += len(related_ids)
+            pair = (entry["type"], related_type)
+            assoc_per_pair[pair] = assoc_per_pair.get(pair, 0) + len(related_ids)
+
+    batch = 0
+    for counts in per_type.values():
+        batch += math.ceil((counts["update"] + counts["upsert"]) / BATCH_SIZE)
+        # batch/update (404) puis batch/create
+        batch += 2 * math.ceil(counts["recreate"] / BATCH_SIZE)
+    for assoc_count in assoc_per_pair.values():
+        batch += math.ceil(assoc_count / BATCH_SIZE)
+
+    return {"single": single, "batch": batch}
+
+
+def save_plan(plan: dict[str, Any], path: str) -> str:
+    """Sauvegarde un plan de restauration en JSON pour revue."""
+    Path(path).write_text(json.dumps(plan, indent=2, ensure_ascii=False), encoding="utf-8")
+    logger.info(f"💾 Plan de restauration sauvegardé : {path}")
+    return path
+
+
+def load_plan(path: str) -> dict[str, Any]:
+    """Charge un plan de restauration et vérifie sa version."""
+    plan = json.loads(Path(path).read_text(encoding="utf-8"))
+    if plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"Version de plan non supportée : {plan.get('version')} (attendu {PLAN_VERSION})")
+    return plan
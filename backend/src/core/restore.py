@@ -1,9 +1,20 @@
+from datetime import datetime
+from typing import Dict, Tuple
 from loguru import logger
 from sqlmodel import Session, select
+from src.connectors.base import ExtractionError
 from src.connectors.rest_api import RestApiConnector
 from src.core.snapshot import SnapshotEngine
 from src.core.graph import GraphManager
-from src.core.models import IdMapping, Snapshot
+from src.core.associations import AssociationIndex, normalize_links
+from src.core.live_index import LiveEntityIndex
+from src.core.id_mapping import IdMappingResolver
+from src.core.journal import RestoreJournal
+from src.core.events import ProgressEmitter
+from src.core.models import RestoreRun, Snapshot, SnapshotItem
+from src.core.hashing import calculate_properties_hash
+from src.core.plan import BLAST_RADIUS_DEPTH, PLAN_VERSION, POLICIES, estimate_api_calls
+from src.core.adjacency import get_snapshot_graph
 from src.utils.db import engine
 from rich.console import Console
 from rich.panel import Panel
@@ -11,13 +22,35 @@ from rich.table import Table
 
 console = Console()
 
+# Ordre de dépendances : les parents d'abord pour que les associations trouvent leur cible
+RESTORE_ORDER = ["companies", "contacts", "deals"]
+
+
+class InteractivePolicyError(Exception):
+    """Reprise d'une restauration 'interactive' sans terminal (API, worker) : une autre politique est requise."""
+
+    def __init__(self, restore_id: int):
+        super().__init__(f"La restauration #{restore_id} a été lancée en mode 'interactive' : "
+                         f"reprenez-la avec la politique 'skip-unsafe' ou 'force'")
+        self.restore_id = restore_id
+
+
 class RestoreEngine:
-    def __init__(self, snapshot_id: int):
+    def __init__(self, snapshot_id: int, index_source: str = "auto", index_max_age: int = 300, on_event=None):
         self.snapshot_id = snapshot_id
         self.connector = RestApiConnector()
         self.snap_engine = SnapshotEngine(snapshot_id=snapshot_id)
         self.graph = GraphManager()
-        self.id_mapping = {}  # Cache en mémoire : {old_id: new_id}
+        # Relations historiques lues dans Postgres (Neo4j n'est qu'un sink de visualisation)
+        self.associations = AssociationIndex()
+        # Mappings old_id → id actuel, historique complet préchargé et chaînes réduites
+        self.id_mapping = IdMappingResolver(snapshot_id)
+        self.journal = None  # Journal de la restauration en cours (voir execute_plan)
+        self._journal_state = {}
+        # Index des entités du CRM actuel, construit une seule fois pour toute la restauration
+        self.live_index = LiveEntityIndex(self.connector, source=index_source, max_age_seconds=index_max_age)
+        # Progression (flux SSE des jobs) : no-op sans sink
+        self.progress = ProgressEmitter(on_event)
 
     def _get_display_name(self, obj_type: str, item: dict) -> str:
         """Extrait un nom lisible depuis les données."""
@@ -38,35 +71,91 @@ class RestoreEngine:
         return str(item.get("id") or props.get("hs_object_id") or item.get(f"{obj_type[:-1]}Id"))
 
     def _get_current_entities(self, object_type: str) -> set:
-        """Récupère les IDs de tous les objets actuellement dans le CRM."""
-        current_ids = set()
-        try:
-            for item in self.connector.extract_data(object_type):
-                item_id = str(item.get("id"))
-                if item_id:
-                    current_ids.add(item_id)
-        except Exception as e:
-            logger.warning(f"⚠️ Impossible de récupérer les entités actuelles {object_type}: {e}")
-        return current_ids
+        """Récupère les IDs de tous les objets actuellement dans le CRM (via l'index live)."""
+        return self.live_index.ids(object_type)
+
+    def _format_orphan_warnings(self, orphans: dict) -> list:
+        warnings = []
+        for missing_type, missing_ids in orphans.items():
+            entity_type = missing_type.replace("missing_", "")
+            warnings.append(
+                f"⚠️ {len(missing_ids)} {entity_type} liés n'existent plus : {', '.join(['#' + id for id in missing_ids[:3]])}"
+            )
+        return warnings
 
     def analyze_restore_impact(self, object_type: str, external_id: str) -> dict:
         """Analyse l'impact d'une restauration AVANT de l'exécuter."""
-        impact = self.graph.get_impact_analysis(object_type, external_id, self.snapshot_id)
-        warnings = []
-        all_current_entities = set()
-        for rel_type in impact["historical_relations"].keys():
-            current = self._get_current_entities(rel_type)
-            all_current_entities.update(current)
-        orphans = self.graph.check_orphans(object_type, external_id, self.snapshot_id, all_current_entities)
-        if orphans:
-            for missing_type, missing_ids in orphans.items():
-                entity_type = missing_type.replace("missing_", "")
-                warnings.append(
-                    f"⚠️ {len(missing_ids)} {entity_type} liés n'existent plus : {', '.join(['#' + id for id in missing_ids[:3]])}"
-                )
+        impact = self.graph.get_impact_analysis(
+            object_type, external_id, self.snapshot_id,
+            relations=self.associations.get_relations(self.snapshot_id, object_type, external_id)
+        )
+        # Les entités déjà ressuscitées pendant ce run sont suivies via leur nouvel ID
+        relations = {
+            rel_type: [self.id_mapping.get(f"{rel_type}/{rel_id}", rel_id) for rel_id in rel_ids]
+            for rel_type, rel_ids in impact["historical_relations"].items()
+        }
+        current_entities = self.live_index.view(relations.keys())
+        orphans = self.graph.check_orphans(object_type, external_id, self.snapshot_id, current_entities, historical_relations=relations)
+        warnings = self._format_orphan_warnings(orphans)
         safe = len(warnings) == 0
         return {"safe": safe, "warnings": warnings, "impact": impact, "orphans": orphans}
 
+    def analyze_restore_set(self, targets: dict) -> dict:
+        """
+        Analyse d'impact de TOUT le lot à restaurer en quelques requêtes (index d'associations Postgres + index live).
+
+        Args:
+            targets: {obj_type: [ext_id, ...]}
+
+        Returns:
+            {"items": {"type/id": analyse au format analyze_restore_impact}, "summary": {...}}
+        """
+        entities = [(obj_type, str(ext_id)) for obj_type, ids in targets.items() for ext_id in ids]
+        bulk = self.graph.get_bulk_impact_analysis(
+            entities, self.snapshot_id,
+            current_entities=self.live_index.view(RESTORE_ORDER),
+            id_mapping=self.id_mapping,
+            relations=self.associations.get_relations_bulk(self.snapshot_id, entities)
+        )
+        items = {}
+        for key, entry in bulk["items"].items():
+            items[key] = {
+                "safe": entry["safe"],
+                "warnings": self._format_orphan_warnings(entry["orphans"]),
+                "impact": {k: entry[k] for k in ("entity", "historical_relations", "relation_count", "complexity")},
+                "orphans": entry["orphans"]
+            }
+        return {"items": items, "summary": bulk["summary"]}
+
+    def display_restore_set_summary(self, summary: dict):
+        """Affiche le bilan consolidé de l'analyse d'impact (une seule revue pour tout le lot)."""
+        table = Table(title="🧠 Analyse d'impact du lot", show_header=True, header_style="bold magenta")
+        table.add_column("Objets", justify="right")
+        table.add_column("Relations", justify="right")
+        table.add_column("Complexité (low/medium/high)", justify="center")
+        table.add_column("À risque", style="red", justify="right")
+        table.add_column("Entités manquantes", style="yellow")
+        complexity = summary["complexity"]
+        missing = ", ".join(f"{t}: {n}" for t, n in summary["missing"].items()) or "-"
+        table.add_row(
+            str(summary["total"]), str(summary["relation_count"]),
+            f"{complexity['low']}/{complexity['medium']}/{complexity['high']}",
+            str(summary["unsafe"]), missing
+        )
+        console.print(table)
+        radius = summary.get("blast_radius")
+        if radius:
+            touched = ", ".join(f"{t}: {n}" for t, n in radius["touched"].items()) or "-"
+            console.print(f"🕸️ Rayon d'impact ({radius['depth']} sauts) : {touched}")
+
+    def _confirm_restore(self, object_type: str, external_id: str, display_name: str, analysis: dict) -> bool:
+        """Affiche l'alerte si l'objet est à risque et demande confirmation."""
+        if analysis["safe"]:
+            return True
+        self.display_impact_warning(object_type, external_id, display_name, analysis)
+        from rich.prompt import Confirm
+        return Confirm.ask(f"[yellow]Continuer la restauration de {display_name} ?[/yellow]")
+
     def display_impact_warning(self, object_type: str, external_id: str, display_name: str, analysis: dict):
         """Affiche un panneau d'alerte visuel avec Rich."""
         if analysis["safe"]:
@@ -80,7 +169,10 @@ class RestoreEngine:
             if len(missing_ids) > 5:
                 ids_str += f" ... (+{len(missing_ids) - 5})"
             table.add_row(entity_type.upper(), ids_str)
-        graph_visual = self.graph.visualize_entity_graph(object_type, external_id, self.snapshot_id)
+        graph_visual = self.graph.visualize_entity_graph(
+            object_type, external_id, self.snapshot_id,
+            relations=analysis["impact"]["historical_relations"]
+        )
         warning_text = f"""
 [bold yellow]⚠️ ALERTE DE COHÉRENCE RELATIONNELLE[/bold yellow]
 Objet : [cyan]{object_type} #{external_id} ({display_name})[/cyan]
@@ -108,23 +200,28 @@ mais certaines entités liées n'existent plus dans le CRM actuel.
         }
         return association_map.get((from_type, to_type), 1)
 
-    def _restore_associations(self, object_type: str, old_id: str, current_id: str, item_data: dict = None):
-        relations = {}
-        
-        # 1. PRIORITÉ : Liens JSON (nouveaux snapshots avec fix)
+    def _get_item_relations(self, object_type: str, old_id: str, item_data: dict = None) -> dict:
+        """Relations historiques d'un objet : liens JSON, puis index Postgres, puis Neo4j s'il est activé."""
+        # 1. PRIORITÉ : Liens JSON (listes complètes {type: [ids]} lues par l'API v4 batch,
+        #    ou un seul lien par type company_id / contact_id dans les anciens snapshots).
+        #    Un objet stocké avec ses liens fait foi, même sans lien : pas d'autre requête
         if item_data and "_zibridge_links" in item_data:
-            links = item_data["_zibridge_links"]
-            logger.debug(f"📦 JSON links trouvés: {links}")
-            if "company_id" in links:
-                relations["companies"] = [links["company_id"]]
-            if "contact_id" in links:
-                relations["contacts"] = [links["contact_id"]]
+            logger.debug(f"📦 JSON links trouvés: {item_data['_zibridge_links']}")
+            return normalize_links(item_data["_zibridge_links"])
         
-        # 2. FALLBACK Neo4j (anciens snapshots)
-        if not relations:
+        # 2. Index d'associations Postgres (objet chargé sans ses liens)
+        relations = self.associations.get_relations(self.snapshot_id, object_type, old_id)
+        
+        # 3. FALLBACK Neo4j (snapshots antérieurs à l'index, graphe activé)
+        if not relations and self.graph.enabled:
             relations = self.graph.get_entity_relations(object_type, old_id, self.snapshot_id)
             logger.debug(f"🧠 Neo4j fallback: {relations}")
         
+        return relations
+
+    def _restore_associations(self, object_type: str, old_id: str, current_id: str, item_data: dict = None):
+        relations = self._get_item_relations(object_type, old_id, item_data)
+        
         if not relations:
             logger.debug(f"ℹ️ Aucune relation pour {object_type}/{old_id}")
             return
@@ -148,165 +245,535 @@ mais certaines entités liées n'existent plus dans le CRM actuel.
         
         logger.info(f"✨ {associations_count} assos rétablies pour {object_type}/{current_id}")
 
+    def _restore_associations_batch(self, restored: dict):
+        """
+        Auto-Suture par lots : regroupe toutes les associations par paire de types
+        et les recrée via l'API batch v4, APRÈS que tous les mappings d'IDs soient connus.
+
+        Args:
+            restored: {obj_type: {old_id: (current_id, item_data)}}
+        """
+        pairs = {}  # {(from_type, to_type): [(from_id, to_id)]}
+        for object_type, entries in restored.items():
+            for old_id, (current_id, item_data) in entries.items():
+                relations = self._get_item_relations(object_type, old_id, item_data)
+                for related_type, related_ids in relations.items():
+                    for old_related_id in related_ids:
+                        actual_related_id = self.id_mapping.get(f"{related_type}/{old_related_id}", old_related_id)
+                        pairs.setdefault((object_type, related_type), []).append((current_id, actual_related_id))
+
+        for (from_type, to_type), type_pairs in pairs.items():
+            assoc_type_id = self._get_association_type_id(from_type, to_type)
+            created = self.connector.batch_create_associations(from_type, to_type, type_pairs, assoc_type_id)
+            logger.info(f"✨ {created}/{len(type_pairs)} assos {from_type} → {to_type} rétablies (batch)")
+
+    def _restore_batch(self, targets: dict, report: dict, pending_sutures: dict = None) -> dict:
+        """
+        Restauration par lots via les endpoints batch HubSpot (~100x moins d'appels).
+
+        Args:
+            targets: {obj_type: {ext_id: item_data}} déjà validés par l'analyse d'impact
+            report: Rapport à incrémenter
+            pending_sutures: {obj_type: {ext_id: (current_id, item_data)}} déjà poussés (reprise), associations à refaire
+        """
+        restored = {obj_type: dict(entries) for obj_type, entries in (pending_sutures or {}).items()}
+        # Résultat initial de chaque objet (les objets en reprise le tiennent du journal)
+        results_by_key = {key: state["result"] for key, state in self._journal_state.items()}
+        ordered_types = RESTORE_ORDER + [t for t in targets if t not in RESTORE_ORDER]
+        for obj_type in ordered_types:
+            items = targets.get(obj_type)
+            if not items:
+                continue
+            logger.info(f"📦 Batch {obj_type} : {len(items)} objets")
+            # Les objets déjà recréés lors d'une restauration précédente sont ciblés par leur ID actuel
+            old_ids = {self.id_mapping.resolve(obj_type, ext_id): ext_id for ext_id in items}
+            handled = set()
+
+            def record(chunk_results: Dict[str, Tuple[str, str]]):
+                for current_id, (status, new_id) in chunk_results.items():
+                    if current_id in handled:
+                        continue
+                    handled.add(current_id)
+                    ext_id = old_ids.get(current_id, current_id)
+                    target_id = new_id if new_id else current_id
+                    if status in ["updated", "resurrected", "merged"]:
+                        if status != "updated": self._save_id_mapping(obj_type, ext_id, target_id)
+                        restored.setdefault(obj_type, {})[ext_id] = (target_id, items[ext_id])
+                        report["success" if status == "updated" else status] += 1
+                        results_by_key[(obj_type, ext_id)] = status
+                        # Une recréation n'est pas idempotente : mapping et journal commités avant la suite du lot
+                        self._journal(obj_type, ext_id, status, target_id, "pushed", durable=status != "updated")
+                    else:
+                        report["failed"] += 1
+                        self._journal(obj_type, ext_id, "failed", None, "failed")
+                        self.progress.error(f"échec batch #{ext_id}", obj_type)
+
+            # Les créations sont enregistrées après chaque appel batch (on_created), le reste au retour
+            results = self.connector.batch_push_updates(
+                obj_type, {current_id: items[ext_id] for current_id, ext_id in old_ids.items()}, on_created=record
+            )
+            record(results)
+            self.progress.tick(obj_type, len(results))
+            # Un commit par type pour les mises à jour (les recréations sont déjà durables)
+            self.id_mapping.flush()
+            if self.journal: self.journal.flush()
+
+        self._restore_associations_batch(restored)
+        for obj_type, entries in restored.items():
+            for ext_id, (target_id, _) in entries.items():
+                self._journal(obj_type, ext_id, results_by_key.get((obj_type, ext_id), "updated"), target_id, "done")
+        if self.journal: self.journal.flush()
+        return report
+
    
     def _save_id_mapping(self, object_type: str, old_id: str, new_id: str):
-        """Sauvegarde le mapping old_id → new_id en DB et en cache."""
-        self.id_mapping[f"{object_type}/{old_id}"] = new_id
-        with Session(engine) as session:
-            mapping = IdMapping(snapshot_id=self.snapshot_id, object_type=object_type, old_id=old_id, new_id=new_id)
-            session.add(mapping)
-            session.commit()
-            logger.debug(f"💾 Mapping sauvegardé: {object_type}/{old_id} → {new_id}")
+        """Enregistre le mapping old_id → new_id (cache immédiat, écriture DB groupée)."""
+        self.id_mapping.add(object_type, old_id, new_id)
+        self.live_index.mark_present(object_type, new_id)
+        logger.debug(f"💾 Mapping: {object_type}/{old_id} → {new_id}")
 
-    def run_smart_restore_selective(self, skip_checks: bool = False):
-        """Restauration SÉLECTIVE : Uniquement changements + Auto-Suture."""
+    # ========================================
+    # PLAN DE RESTAURATION (calcul → revue → exécution)
+    # ========================================
+
+    def _collect_targets(self, mode: str, object_types: list, target_only: str = None) -> list:
+        """Liste des objets à restaurer [{"type", "id", "hash"}] selon le mode."""
+        if mode == "selective":
+            # État actuel = dernier snapshot complet (même règle que LiveEntityIndex) : un snapshot
+            # "failed" (tronqué) ou "pending" (sync en cours) ferait passer des objets pour supprimés
+            with Session(engine) as session:
+                latest_snap = session.exec(
+                    select(Snapshot).where(Snapshot.status == "completed").order_by(Snapshot.id.desc())
+                ).first()
+            if not latest_snap:
+                raise ValueError("Aucun snapshot complet : restauration sélective impossible (lancez une synchronisation)")
+            if latest_snap.id == self.snapshot_id:
+                logger.success("✅ État déjà conforme au snapshot cible.")
+                return []
+            
+            from src.core.diff import DiffEngine
+            diff_report = DiffEngine(self.snapshot_id, latest_snap.id).generate_report()
+            # Côté snapshot cible : "hash" pour les suppressions, "old_hash" pour les modifications
+            targets = [{"type": d["type"], "id": d["id"], "hash": d["hash"]} for d in diff_report["deleted"]]
+            targets += [{"type": u["type"], "id": u["id"], "hash": u["old_hash"]} for u in diff_report["updated"]]
+            return [t for t in targets if t["type"] in object_types]
+        
+        filter_type, filter_id = None, None
+        if target_only and "/" in target_only:
+            filter_type, filter_id = target_only.split("/")
+            logger.info(f"🎯 Cible spécifique détectée : {target_only}")
+        
         with Session(engine) as session:
-            latest_snap = session.exec(select(Snapshot).order_by(Snapshot.id.desc())).first()
-            if not latest_snap: return {"success": 0, "failed": 0}
-            current_snap_id = latest_snap.id
+            statement = select(SnapshotItem).where(
+                SnapshotItem.snapshot_id == self.snapshot_id,
+                SnapshotItem.object_type.in_(object_types)
+            )
+            if filter_type:
+                statement = statement.where(SnapshotItem.object_type == filter_type)
+            if filter_id:
+                statement = statement.where(SnapshotItem.object_id == str(filter_id))
+            items = session.exec(statement).all()
+        return [{"type": i.object_type, "id": i.object_id, "hash": i.content_hash} for i in items]
+
+    def build_restore_plan(self, mode: str = "selective", object_types: list = None, target_only: str = None, with_checks: bool = True) -> dict:
+        """
+        Phase 1 : calcule un plan de restauration sérialisable, sans rien écrire dans le CRM.
+
+        Args:
+            mode: "selective" (diff vs dernier snapshot) ou "full" (tout le snapshot)
+            object_types: Types à restaurer (défaut : RESTORE_ORDER)
+            target_only: Cible unique "type/id" (mode full)
+            with_checks: Analyse d'impact (orphelins, complexité) et détection update/recreate
+
+        Returns:
+            {"version", "snapshot_id", "mode", "created_at", "order", "objects", "summary", "impact_summary", "estimated_api_calls"}
+        """
+        object_types = object_types or RESTORE_ORDER
+        order = [t for t in RESTORE_ORDER if t in object_types] + [t for t in object_types if t not in RESTORE_ORDER]
+        targets = self._collect_targets(mode, object_types, target_only)
+        targets.sort(key=lambda t: (order.index(t["type"]), t["id"]))
         
-        if current_snap_id == self.snapshot_id:
-            logger.success("✅ État déjà conforme au snapshot cible.")
-            return {"success": 0, "failed": 0}
+        analyses = {"items": {}, "summary": None}
+        if with_checks and targets:
+            by_type = {}
+            for target in targets:
+                by_type.setdefault(target["type"], []).append(target["id"])
+            analyses = self.analyze_restore_set(by_type)
+            if analyses["summary"] is not None:
+                analyses["summary"]["blast_radius"] = self._plan_blast_radius(targets)
         
-        from src.core.diff import DiffEngine
-        diff_report = DiffEngine(self.snapshot_id, current_snap_id).generate_report()
+        objects = []
+        for target in targets:
+            key = f"{target['type']}/{target['id']}"
+            analysis = analyses["items"].get(key)
+            if analysis:
+                operation = "update" if self.live_index.contains(target["type"], target["id"]) else "recreate"
+            else:
+                operation = "upsert"
+            objects.append({
+                **target,
+                "operation": operation,
+                "safe": analysis["safe"] if analysis else True,
+                "warnings": analysis["warnings"] if analysis else [],
+                "orphans": analysis["orphans"] if analysis else {},
+                "impact": analysis["impact"] if analysis else {}
+            })
         
-        objects_to_restore = {}
-        for item in diff_report["deleted"] + diff_report["updated"]:
-            obj_type = item["type"]
-            if obj_type not in objects_to_restore: objects_to_restore[obj_type] = set()
-            objects_to_restore[obj_type].add(item["id"])
+        radius = (analyses["summary"] or {}).get("blast_radius") or {}
+        for entry in objects:
+            if entry["impact"] and "per_object" in radius:
+                entry["impact"]["blast_radius"] = radius["per_object"].get(f"{entry['type']}/{entry['id']}", 0)
+        radius.pop("per_object", None)
+
+        summary = {"total": len(objects), "by_type": {}, "by_operation": {}, "unsafe": 0}
+        for entry in objects:
+            summary["by_type"][entry["type"]] = summary["by_type"].get(entry["type"], 0) + 1
+            summary["by_operation"][entry["operation"]] = summary["by_operation"].get(entry["operation"], 0) + 1
+            if not entry["safe"]:
+                summary["unsafe"] += 1
         
-        total = sum(len(ids) for ids in objects_to_restore.values())
-        if total == 0: return {"success": 0, "failed": 0}
+        return {
+            "version": PLAN_VERSION,
+            "snapshot_id": self.snapshot_id,
+            "mode": mode,
+            "created_at": datetime.utcnow().isoformat(),
+            "order": order,
+            "objects": objects,
+            "summary": summary,
+            "impact_summary": analyses["summary"],
+            "estimated_api_calls": estimate_api_calls(objects)
+        }
+
+    def _plan_blast_radius(self, targets: list) -> dict:
+        """
+        Rayon d'impact du plan sur le graphe CSR du snapshot (BLAST_RADIUS_DEPTH sauts).
+
+        Returns:
+            {"depth", "touched": {type: n}, "missing": {type: n}, "per_object": {"type/id": n}}
+        """
+        try:
+            graph = get_snapshot_graph(self.snapshot_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Rayon d'impact indisponible (graphe du snapshot #{self.snapshot_id}) : {e}")
+            return {}
+
+        per_object = {}
+        for target in targets:
+            node = graph.node(target["type"], target["id"])
+            if node is not None:
+                reached, _, _ = graph.k_hop([node], BLAST_RADIUS_DEPTH)
+                per_object[f"{target['type']}/{target['id']}"] = len(reached)
+
+        # Union des voisinages : ce que le plan entier peut toucher
+        radius = graph.reach(((target["type"], target["id"]) for target in targets), BLAST_RADIUS_DEPTH)
+        return {**radius, "per_object": per_object}
+
+    def display_plan_summary(self, plan: dict):
+        """Affiche le plan pour une revue unique avant exécution."""
+        summary = plan["summary"]
+        table = Table(title=f"📋 Plan de restauration vers le Snapshot #{plan['snapshot_id']} ({plan['mode']})", show_header=True, header_style="bold cyan")
+        table.add_column("Type", style="cyan")
+        table.add_column("Objets", justify="right")
+        for obj_type in plan["order"]:
+            if obj_type in summary["by_type"]:
+                table.add_row(obj_type, str(summary["by_type"][obj_type]))
+        console.print(table)
+        operations = ", ".join(f"{op}: {n}" for op, n in summary["by_operation"].items()) or "-"
+        calls = plan["estimated_api_calls"]
+        console.print(f"Opérations : {operations}")
+        console.print(f"Appels API estimés : {calls['single']} (unitaire) / {calls['batch']} (batch)")
+        if plan.get("impact_summary"):
+            self.display_restore_set_summary(plan["impact_summary"])
+
+    def _load_plan_items(self, obj_type: str, hashes: dict, report: dict) -> dict:
+        """Charge en parallèle les seuls blobs des objets approuvés : {ext_id: item}."""
+        items = self.snap_engine.get_items_by_hash(hashes)
+        for ext_id in hashes:
+            if ext_id not in items:
+                logger.error(f"❌ {obj_type}/{ext_id} illisible dans le snapshot #{self.snapshot_id}")
+                report["failed"] += 1
+        return items
+
+    def _drop_identical(self, obj_type: str, items: dict) -> Tuple[dict, dict]:
+        """
+        Pré-vol : lit l'état live des cibles par lots, compare les empreintes des propriétés
+        restaurables et retire les objets déjà identiques au snapshot (aucun PATCH inutile).
+        Les liens font partie de l'état du snapshot : un objet aux propriétés identiques dont un lien
+        a disparu du CRM n'est pas repoussé mais garde sa suture.
+
+        Returns:
+            ({ext_id: item} à pousser, {ext_id: item} aux propriétés identiques, liens à refaire)
+        """
+        if not items:
+            return items, {}
+        clean_by_id = {ext_id: self.connector.clean_properties(item) for ext_id, item in items.items()}
+        properties = sorted({key for props in clean_by_id.values() for key in props})
+        current_ids = {ext_id: self.id_mapping.resolve(obj_type, ext_id) for ext_id in items}
+        try:
+            live_records = self.connector.batch_read(obj_type, list(current_ids.values()), properties)
+        except ExtractionError as e:
+            # Non lu n'est pas absent : sans état live fiable, tout est poussé (comportement sans pré-vol)
+            logger.warning(f"⚠️ Pré-vol {obj_type} impossible, aucun objet ignoré : {e}")
+            return items, {}
         
-        logger.warning(f"🚨 DÉBUT DU ROLLBACK SÉLECTIF VERS #{self.snapshot_id}")
-        report = {"success": 0, "failed": 0, "resurrected": 0, "merged": 0, "warnings": 0, "skipped": 0}
+        to_push, same_properties = {}, {}
+        for ext_id, item in items.items():
+            live = live_records.get(current_ids[ext_id])
+            keys = sorted(clean_by_id[ext_id])
+            if live is not None and calculate_properties_hash(live.get("properties", {}), keys) == calculate_properties_hash(clean_by_id[ext_id], keys):
+                same_properties[ext_id] = item
+            else:
+                to_push[ext_id] = item
         
-        for obj_type in ["companies", "contacts", "deals"]:
-            if obj_type not in objects_to_restore: continue
-            ids_to_res = objects_to_restore[obj_type]
+        unlinked = self._missing_links(obj_type, same_properties, current_ids)
+        relink = {ext_id: item for ext_id, item in same_properties.items() if ext_id in unlinked}
+        identical = len(same_properties) - len(relink)
+        if identical:
+            logger.info(f"😴 {identical} {obj_type} déjà identiques dans le CRM (ignorés)")
+        if relink:
+            logger.info(f"🔗 {len(relink)} {obj_type} aux propriétés identiques mais aux liens manquants (suture seule)")
+        return to_push, relink
+
+    def _missing_links(self, obj_type: str, items: dict, current_ids: dict) -> set:
+        """
+        Objets dont au moins un lien du snapshot manque dans le CRM (la suture ne fait qu'ajouter :
+        des liens en plus côté CRM ne sont pas un écart). Associations live lues par lots (API v4).
+
+        Returns:
+            {ext_id, ...}
+        """
+        if not items:
+            return set()
+        # Liens JSON du blob, sinon index Postgres (une requête par chunk)
+        indexed = self.associations.get_relations_bulk(
+            self.snapshot_id, [(obj_type, ext_id) for ext_id, item in items.items() if "_zibridge_links" not in item]
+        )
+        expected = {}
+        missing = set()
+        for ext_id, item in items.items():
+            if "_zibridge_links" in item:
+                relations = normalize_links(item["_zibridge_links"])
+            else:
+                relations = indexed.get((obj_type, str(ext_id)), {})
+                if not relations and self.graph.enabled:
+                    # Liens seulement dans Neo4j (snapshots antérieurs à l'index) : la suture les relira
+                    missing.add(ext_id)
+                    continue
+            expected[ext_id] = {
+                related_type: {self.id_mapping.get(f"{related_type}/{related_id}", related_id) for related_id in related_ids}
+                for related_type, related_ids in relations.items()
+            }
+
+        for related_type in sorted({related_type for relations in expected.values() for related_type in relations}):
+            linked = [ext_id for ext_id, relations in expected.items() if relations.get(related_type)]
             try:
-                all_data = self.snap_engine.get_all_items_from_minio(obj_type)
-                for obj_type in ["companies", "contacts", "deals"]:
-                    if obj_type not in objects_to_restore: continue
-                    ids_to_res = objects_to_restore[obj_type]
-                    
-                    # ✅ FIX : Récupère SEULEMENT les items du DIFF
-                    all_data = self.snap_engine.get_all_items_from_minio(obj_type)
-                    targeted_data = {self._extract_id(item, obj_type): item for item in all_data}
-                    
-                    logger.info(f"🎯 {len(ids_to_res)} {obj_type} ciblés sur {len(all_data)} total")
-                    
-                    for ext_id in ids_to_res:  # ✅ Boucle sur DIFF UNIQUEMENT
-                        if ext_id not in targeted_data:
-                            logger.warning(f"❌ {obj_type}/{ext_id} absent du snapshot #{self.snapshot_id}")
-                            report["failed"] += 1
-                            continue
-                        item = targeted_data[ext_id]  # ✅ Item précis
-                        display_name = self._get_display_name(obj_type, item)
-
-                    
-                    display_name = self._get_display_name(obj_type, item)
-                    if not skip_checks:
-                        analysis = self.analyze_restore_impact(obj_type, ext_id)
-                        if not analysis["safe"]:
-                            self.display_impact_warning(obj_type, ext_id, display_name, analysis)
-                            report["warnings"] += 1
-                            from rich.prompt import Confirm
-                            if not Confirm.ask(f"[yellow]Continuer la restauration de {display_name} ?[/yellow]"): continue
-                    
-                    logger.info(f"🔄 Restauration de {obj_type} #{ext_id} ({display_name})...")
-                    status, new_id = self.connector.push_update(obj_type, ext_id, item)
-                    target_id = new_id if new_id else ext_id
-                    
-                    if status in ["updated", "resurrected", "merged"]:
-                        if status != "updated": self._save_id_mapping(obj_type, ext_id, target_id)
-                        self._restore_associations(obj_type, ext_id, target_id, item)
-                        report[status if status != "updated" else "success"] += 1
-                        if status == "updated": report["success"] += 1
-                    else:
-                        report["failed"] += 1
-            except Exception as e:
-                logger.error(f"❌ Erreur {obj_type}: {e}")
+                live_links = self.connector.batch_read_associations(obj_type, related_type, [current_ids[ext_id] for ext_id in linked])
+            except ExtractionError as e:
+                logger.warning(f"⚠️ Associations {obj_type} → {related_type} illisibles, suture conservée : {e}")
+                missing.update(linked)
+                continue
+            for ext_id in linked:
+                if not expected[ext_id][related_type] <= set(live_links.get(str(current_ids[ext_id]), [])):
+                    missing.add(ext_id)
+        return missing
+
+    def _restore_single(self, obj_type: str, ext_id: str, item: dict, report: dict):
+        """Restauration unitaire d'un objet (Patch -> Post -> Merge) + Auto-Suture."""
+        display_name = self._get_display_name(obj_type, item)
+        # Un objet déjà recréé lors d'une restauration précédente est ciblé par son ID actuel
+        current_id = self.id_mapping.resolve(obj_type, ext_id)
+        logger.info(f"🔄 Restauration de {obj_type} #{current_id} ({display_name})...")
+        status, new_id = self.connector.push_update(obj_type, current_id, item)
+        target_id = new_id if new_id else current_id
+        
+        if status in ["updated", "resurrected", "merged"]:
+            if status != "updated": self._save_id_mapping(obj_type, ext_id, target_id)
+            # Une recréation n'est pas idempotente : elle est journalisée immédiatement
+            self._journal(obj_type, ext_id, status, target_id, "pushed", durable=status != "updated")
+            self._restore_associations(obj_type, ext_id, target_id, item)
+            self._journal(obj_type, ext_id, status, target_id, "done")
+            report["success" if status == "updated" else status] += 1
+        else:
+            self._journal(obj_type, ext_id, "failed", None, "failed")
+            report["failed"] += 1
+            self.progress.error(f"échec #{ext_id}", obj_type)
+        self.progress.tick(obj_type)
+
+    def _journal(self, obj_type: str, ext_id: str, result: str, new_id: str, state: str, durable: bool = False):
+        if durable:
+            self.id_mapping.flush()
+        if self.journal:
+            self.journal.record(obj_type, ext_id, result, new_id, state, durable=durable)
+
+    def execute_plan(self, plan: dict, policy: str = "skip-unsafe", batch: bool = False, skip_identical: bool = True, restore_id: int = None) -> dict:
+        """
+        Phase 2 : exécute un plan approuvé, sans intervention humaine (sauf policy="interactive").
+        Chaque opération est journalisée : une restauration interrompue se reprend avec restore_id.
+
+        Args:
+            plan: Plan produit par build_restore_plan (éventuellement rechargé depuis un fichier)
+            policy: "skip-unsafe" (ignore les objets à risque), "force" (tout) ou "interactive"
+            batch: Utiliser les endpoints batch HubSpot
+            skip_identical: Pré-vol batch-read pour ignorer les objets déjà conformes au snapshot
+            restore_id: Journal d'une restauration interrompue à reprendre
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue : {policy} (attendu : {', '.join(POLICIES)})")
+        if plan["snapshot_id"] != self.snapshot_id:
+            raise ValueError(f"Plan prévu pour le Snapshot #{plan['snapshot_id']}, pas #{self.snapshot_id}")
+        
+        report = {"success": 0, "failed": 0, "resurrected": 0, "merged": 0, "warnings": 0, "skipped": 0, "identical": 0, "resumed": 0}
+        if not plan["objects"]:
+            return report
+        
+        self.journal = RestoreJournal.resume(restore_id) if restore_id else RestoreJournal.start(self.snapshot_id, plan, policy, batch)
+        report["restore_id"] = self.journal.restore_id
+        try:
+            self._execute_plan(plan, policy, batch, skip_identical, report)
+        except BaseException:
+            self.id_mapping.flush()
+            self.journal.finish("failed")
+            self.progress.finish("failed")
+            raise
+        self.id_mapping.flush()
+        self.journal.finish("completed")
+        self.progress.finish()
         return report
 
-    def run_smart_restore(self, skip_checks: bool = False):
-        """Restauration complète avec ordre de dépendances et Auto-Suture."""
-        logger.warning(f"🚨 DÉBUT DU ROLLBACK INTELLIGENT VERS LE SNAPSHOT #{self.snapshot_id}")
-        report = {"success": 0, "failed": 0, "resurrected": 0, "merged": 0, "warnings": 0}
+    @classmethod
+    def resume_restore(cls, restore_id: int, policy: str = None, non_interactive: bool = False, **engine_kwargs) -> dict:
+        """
+        Reprend une restauration interrompue à partir de son journal (plan, policy et mode conservés).
+
+        Args:
+            policy: Remplace la politique enregistrée
+            non_interactive: Sans terminal (API, worker) : lève InteractivePolicyError plutôt que de demander confirmation
+        """
+        with Session(engine) as session:
+            run = session.get(RestoreRun, restore_id)
+            if not run:
+                raise ValueError(f"Restauration #{restore_id} introuvable")
+        policy = policy or run.policy
+        if non_interactive and policy == "interactive":
+            raise InteractivePolicyError(restore_id)
+        restore_engine = cls(snapshot_id=run.snapshot_id, **engine_kwargs)
+        return restore_engine.execute_plan(run.plan, policy=policy, batch=run.batch, restore_id=restore_id)
+
+    def _execute_plan(self, plan: dict, policy: str, batch: bool, skip_identical: bool, report: dict):
+        logger.warning(f"🚨 DÉBUT DU ROLLBACK ({plan['mode']}, policy={policy}) VERS LE SNAPSHOT #{self.snapshot_id}")
+        
+        # Reprise : le travail terminé est ignoré, les IDs déjà obtenus sont rechargés
+        journal_state = self._journal_state = self.journal.load_state()
+        for (obj_type, ext_id), state in journal_state.items():
+            if state["new_id"] and state["new_id"] != ext_id:
+                self.id_mapping.remember(obj_type, ext_id, state["new_id"])
+                self.live_index.mark_present(obj_type, state["new_id"])
         
-        for obj_type in ["companies", "contacts", "deals"]:
-            logger.info(f"\n📦 === PHASE : Restauration {obj_type.upper()} ===")
+        approved = {}  # {obj_type: {ext_id: hash}}
+        for entry in plan["objects"]:
+            state = journal_state.get((entry["type"], entry["id"]), {}).get("state")
+            if state == "done":
+                report["resumed"] += 1
+                continue
+            if state != "pushed" and not entry.get("safe", True):
+                report["warnings"] += 1
+                if policy == "skip-unsafe":
+                    logger.warning(f"⏭️ {entry['type']}/{entry['id']} ignoré (à risque)")
+                    report["skipped"] += 1
+                    continue
+                if policy == "interactive":
+                    item = self.snap_engine.get_items_by_hash({entry["id"]: entry.get("hash")}).get(entry["id"]) if entry.get("hash") else {}
+                    if item is None:
+                        continue
+                    if not self._confirm_restore(entry["type"], entry["id"], self._get_display_name(entry["type"], item), entry):
+                        report["skipped"] += 1
+                        continue
+            approved.setdefault(entry["type"], {})[entry["id"]] = entry.get("hash")
+        if report["resumed"]:
+            logger.info(f"📒 {report['resumed']} objets déjà restaurés (reprise de #{self.journal.restore_id})")
+        self.progress.start_phase("restore", total={obj_type: len(ids) for obj_type, ids in approved.items()})
+        # Les objets connus comme absents du CRM n'ont pas besoin du pré-vol
+        known_missing = {(e["type"], e["id"]) for e in plan["objects"] if e.get("operation") == "recreate"}
+        
+        batch_targets = {}
+        pending_sutures = {}
+        for obj_type in plan["order"]:
+            if obj_type not in approved: continue
+            logger.info(f"\n📦 === PHASE : Restauration {obj_type.upper()} ({len(approved[obj_type])}) ===")
             try:
-                data_to_restore = self.snap_engine.get_all_items_from_minio(obj_type)
-                for item in data_to_restore:
-                    ext_id = self._extract_id(item, obj_type)
-                    if not ext_id: continue
-                    display_name = self._get_display_name(obj_type, item)
-                    
-                    if not skip_checks:
-                        analysis = self.analyze_restore_impact(obj_type, ext_id)
-                        if not analysis["safe"]:
-                            self.display_impact_warning(obj_type, ext_id, display_name, analysis)
-                            report["warnings"] += 1
-                            from rich.prompt import Confirm
-                            if not Confirm.ask(f"[yellow]Continuer la restauration de {display_name} ?[/yellow]"): continue
-                    
-                    logger.info(f"🔄 Restauration de {obj_type} #{ext_id} ({display_name})...")
-                    status, new_id = self.connector.push_update(obj_type, ext_id, item)
-                    target_id = new_id if new_id else ext_id
-                    
-                    if status in ["updated", "resurrected", "merged"]:
-                        if status != "updated": self._save_id_mapping(obj_type, ext_id, target_id)
-                        self._restore_associations(obj_type, ext_id, target_id, item)
-                        report[status if status != "updated" else "success"] += 1
-                        if status == "updated": report["success"] += 1
+                hashes = approved[obj_type]
+                # Plan écrit à la main (type/id seulement) : une requête ciblée pour les hashes manquants
+                unresolved = [ext_id for ext_id, content_hash in hashes.items() if not content_hash]
+                if unresolved:
+                    hashes.update(self.snap_engine.get_item_hashes(obj_type, unresolved))
+                    for ext_id in unresolved:
+                        if not hashes[ext_id]:
+                            logger.warning(f"❌ {obj_type}/{ext_id} absent du snapshot #{self.snapshot_id}")
+                            report["failed"] += 1
+                            del hashes[ext_id]
+                items = self._load_plan_items(obj_type, hashes, report)
+                
+                # Déjà poussés avant l'interruption : seules les associations restent à refaire
+                for ext_id in [ext_id for ext_id in items if journal_state.get((obj_type, ext_id), {}).get("state") == "pushed"]:
+                    state = journal_state[(obj_type, ext_id)]
+                    current_id = state["new_id"] or ext_id
+                    if batch:
+                        pending_sutures.setdefault(obj_type, {})[ext_id] = (current_id, items.pop(ext_id))
                     else:
-                        report["failed"] += 1
+                        self._restore_associations(obj_type, ext_id, current_id, items.pop(ext_id))
+                        self._journal(obj_type, ext_id, state["result"], current_id, "done")
+                
+                if skip_identical:
+                    checkable = {ext_id: item for ext_id, item in items.items() if (obj_type, ext_id) not in known_missing}
+                    to_push, relink = self._drop_identical(obj_type, checkable)
+                    for ext_id in checkable:
+                        if ext_id not in to_push and ext_id not in relink:
+                            self._journal(obj_type, ext_id, "identical", ext_id, "done")
+                    # Propriétés conformes, liens manquants : pas de PATCH, seulement l'Auto-Suture
+                    for ext_id, item in relink.items():
+                        current_id = self.id_mapping.resolve(obj_type, ext_id)
+                        self._journal(obj_type, ext_id, "identical", current_id, "pushed")
+                        if batch:
+                            journal_state[(obj_type, ext_id)] = {"result": "identical", "new_id": current_id, "state": "pushed"}
+                            pending_sutures.setdefault(obj_type, {})[ext_id] = (current_id, item)
+                        else:
+                            self._restore_associations(obj_type, ext_id, current_id, item)
+                            self._journal(obj_type, ext_id, "identical", current_id, "done")
+                    report["identical"] += len(checkable) - len(to_push)
+                    self.progress.tick(obj_type, len(checkable) - len(to_push))
+                    items = {ext_id: item for ext_id, item in items.items() if ext_id in to_push or (obj_type, ext_id) in known_missing}
+                if batch:
+                    batch_targets[obj_type] = items
+                    continue
+                for ext_id, item in items.items():
+                    self._restore_single(obj_type, ext_id, item, report)
             except Exception as e:
                 logger.error(f"❌ Erreur {obj_type}: {e}")
-        return report
+                self.progress.error(str(e), obj_type)
+        
+        if batch_targets or pending_sutures:
+            self._restore_batch(batch_targets, report, pending_sutures=pending_sutures)
 
-    def run_full_restore(self, object_types: list = ["companies", "contacts", "deals"], target_only: str = None, skip_checks: bool = False):
-        """Restauration classique conservée pour compatibilité."""
-        filter_type, filter_id = None, None
-        if target_only and "/" in target_only:
-            filter_type, filter_id = target_only.split("/")
-            logger.info(f"🎯 Cible spécifique détectée : {target_only}")
+    # ========================================
+    # MODES DE RESTAURATION (plan + exécution)
+    # ========================================
 
-        logger.warning(f"🚨 DÉBUT DU ROLLBACK VERS LE SNAPSHOT #{self.snapshot_id}")
-        report = {"success": 0, "failed": 0, "resurrected": 0, "merged": 0, "warnings": 0}
+    def _run_plan(self, plan: dict, skip_checks: bool, batch: bool) -> dict:
+        if not skip_checks and plan["objects"]:
+            self.display_plan_summary(plan)
+        return self.execute_plan(plan, policy="force" if skip_checks else "interactive", batch=batch)
 
-        for obj_type in object_types:
-            if filter_type and obj_type != filter_type: continue
-            try:
-                data_to_restore = self.snap_engine.get_all_items_from_minio(obj_type)
-                for item in data_to_restore:
-                    ext_id = self._extract_id(item, obj_type)
-                    if not ext_id or (filter_id and ext_id != str(filter_id)): continue
-                    display_name = self._get_display_name(obj_type, item)
-                    
-                    if not skip_checks:
-                        analysis = self.analyze_restore_impact(obj_type, ext_id)
-                        if not analysis["safe"]:
-                            self.display_impact_warning(obj_type, ext_id, display_name, analysis)
-                            report["warnings"] += 1
-                            from rich.prompt import Confirm
-                            if not Confirm.ask(f"[yellow]Continuer la restauration de {display_name} ?[/yellow]"): continue
-                    
-                    logger.info(f"🔄 Restauration de {obj_type} #{ext_id} ({display_name})...")
-                    status, new_id = self.connector.push_update(obj_type, ext_id, item)
-                    target_id = new_id if new_id else ext_id
+    def run_smart_restore_selective(self, skip_checks: bool = False, batch: bool = False):
+        """Restauration SÉLECTIVE : Uniquement changements + Auto-Suture (batch=True : endpoints batch)."""
+        plan = self.build_restore_plan("selective", with_checks=not skip_checks)
+        return self._run_plan(plan, skip_checks, batch)
 
-                    if status in ["updated", "resurrected", "merged"]:
-                        if status != "updated": self._save_id_mapping(obj_type, ext_id, target_id)
-                        self._restore_associations(obj_type, ext_id, target_id, item)
-                        report[status if status != "updated" else "success"] += 1
-                        if status == "updated": report["success"] += 1
-                    else:
-                        report["failed"] += 1
-            except Exception as e:
-                logger.error(f"❌ Erreur {obj_type}: {e}")
-        return report
\ No newline at end of file
+    def run_smart_restore(self, skip_checks: bool = False, batch: bool = False):
+        """Restauration complète avec ordre de dépendances et Auto-Suture (batch=True : endpoints batch)."""
+        plan = self.build_restore_plan("full", with_checks=not skip_checks)
+        return self._run_plan(plan, skip_checks, batch)
+
+    def run_full_restore(self, object_types: list = ["companies", "contacts", "deals"], target_only: str = None, skip_checks: bool = False):
+        """Restauration classique conservée pour compatibilité."""
+        plan = self.build_restore_plan("full", object_types=object_types, target_only=target_only, with_checks=not skip_checks)
+        return self._run_plan(plan, skip_checks, batch=False)
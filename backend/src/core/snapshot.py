@@ -1,4 +1,6 @@
+import copy
 import json
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 from sqlmodel import Session, select
 
@@ -6,6 +8,10 @@ from src.core.hashing import calculate_content_hash
 from src.core.models import Blob, SnapshotItem
 from src.utils.db import engine, storage_manager
 from src.core.graph import GraphManager
+from src.core.associations import AssociationIndex
+
+# Lectures MinIO parallèles (le pool HTTP du client MinIO garde 10 connexions)
+BLOB_FETCH_WORKERS = 8
 
 class SnapshotEngine:
     def __init__(self, snapshot_id: int):
@@ -30,6 +36,8 @@ class SnapshotEngine:
                 try:
                     storage_manager.save_json(object_path, data)
                     session.add(Blob(hash=item_hash, content_type=object_type))
+                    # Index relationnel des liens (restauration sans Neo4j)
+                    AssociationIndex.index_links(session, item_hash, data.get("_zibridge_links"))
                 except Exception as e:
                     logger.error(f"❌ Échec stockage MinIO : {e}")
                     return
@@ -42,15 +50,13 @@ class SnapshotEngine:
                 content_hash=item_hash
             ))
 
-            # 🧠 MISE À JOUR DU GRAPHE
-            # Ici, on pourrait aussi créer des relations Neo4j entre objets !
+            # 🧠 MISE À JOUR DU GRAPHE (sink de visualisation optionnel, NEO4J_ENABLED)
             self.graph.update_relation(self.snapshot_id, object_type, external_id, item_hash)
             session.commit()
 
     def get_all_items_from_minio(self, object_type: str) -> list:
         """Récupère les objets depuis MinIO pour le snapshot actuel."""
         logger.info(f"📂 Récupération des {object_type} (Snap #{self.snapshot_id})")
-        items_data = []
         
         with Session(engine) as session:
             statement = select(SnapshotItem).where(
@@ -58,12 +64,50 @@ class SnapshotEngine:
                 SnapshotItem.object_type == object_type
             )
             results = session.exec(statement).all()
+            hashes = {item.object_id: item.content_hash for item in results}
+        
+        return list(self.get_items_by_hash(hashes).values())
 
-            for item in results:
-                try:
-                    data = storage_manager.get_json(f"blobs/{item.content_hash}.json")
-                    items_data.append(data)
-                except Exception as e:
-                    logger.error(f"❌ Erreur lecture blob {item.content_hash}: {e}")
+    def get_item_hashes(self, object_type: str, external_ids: list, chunk_size: int = 1000) -> dict:
+        """Hashes des seuls objets ciblés : {external_id: content_hash} (requête SnapshotItem ciblée)."""
+        hashes = {}
+        external_ids = [str(ext_id) for ext_id in external_ids]
+        with Session(engine) as session:
+            for start in range(0, len(external_ids), chunk_size):
+                statement = select(SnapshotItem.object_id, SnapshotItem.content_hash).where(
+                    SnapshotItem.snapshot_id == self.snapshot_id,
+                    SnapshotItem.object_type == object_type,
+                    SnapshotItem.object_id.in_(external_ids[start:start + chunk_size])
+                )
+                for object_id, content_hash in session.exec(statement).all():
+                    hashes[object_id] = content_hash
+        return hashes
+
+    def get_items_by_hash(self, hashes: dict, max_workers: int = BLOB_FETCH_WORKERS) -> dict:
+        """
+        Télécharge en parallèle les blobs demandés (un seul téléchargement par hash).
+        
+        Args:
+            hashes: {clé: content_hash}
+        
+        Returns:
+            {clé: données JSON} (les blobs illisibles sont absents et loggés)
+        """
+        unique_hashes = list(set(hashes.values()))
+        
+        def fetch(content_hash: str):
+            try:
+                return content_hash, storage_manager.get_json(f"blobs/{content_hash}.json")
+            except Exception as e:
+                logger.error(f"❌ Erreur lecture blob {content_hash}: {e}")
+                return content_hash, None
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            blobs = dict(pool.map(fetch, unique_hashes))
         
-        return items_data
\ No newline at end of file
+        # Chaque clé reçoit sa propre copie (plusieurs objets peuvent partager un blob)
+        return {
+            key: copy.deepcopy(blobs[content_hash])
+            for key, content_hash in hashes.items()
+            if blobs.get(content_hash) is not None
+        }
@@ -1,14 +1,30 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Body, Header, Query, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, select, func
-from typing import List, Optional
+from sqlalchemy import literal_column, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import re
+from pathlib import Path
 from datetime import datetime
 
-from src.utils.db import engine
-from src.core.models import Snapshot, SnapshotItem
+from src.utils.db import AsyncSessionLocal, async_engine, async_neo4j_driver
+from src.core.models import IndexVersion, Snapshot, SnapshotItem
+from src.core.associations import INDEX_NAME as ASSOCIATION_INDEX
 from src.core.diff import DiffEngine
-from src.core.restore import RestoreEngine
+from src.core.restore import InteractivePolicyError, RestoreEngine
+from src.core.graph import AsyncGraphReader
+from src.core.adjacency import SnapshotGraph, get_snapshot_graph
 from src.utils.db import storage_manager
+from src.core.jobs import JobQueue, PortalBusyError
+from src.connectors.http import get_transport
+from src.utils.http_cache import NO_STORE, cache_headers, make_etag, not_modified, request_etag
+from src.utils.compression import IDENTITY, encode_stream, negotiate_encoding
+from minio.error import S3Error
 
 app = FastAPI(
     title="Zibridge API",
@@ -23,150 +39,407 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-def get_session():
-    with Session(engine) as session:
+GRAPH_VIEW_TEMPLATE = Path(__file__).resolve().parent.parent / "templates" / "graph_view.html"
+
+async def get_session():
+    async with AsyncSessionLocal() as session:
         yield session
 
+@app.on_event("shutdown")
+async def close_async_clients():
+    """Libère le pool asyncpg et les connexions Neo4j async à l'arrêt du serveur."""
+    await async_engine.dispose()
+    await async_neo4j_driver.close()
+
+async def _offloaded_json(payload: dict, headers: Dict[str, str] = None) -> JSONResponse:
+    """
+    Sérialise un gros rapport dans un thread : renvoyer une Response court-circuite
+    jsonable_encoder, qui tournerait sinon dans la boucle d'événements.
+    """
+    return await asyncio.to_thread(JSONResponse, payload, headers=headers)
+
+# Taille de page maximale de /snapshots et /snapshots/{id}/items
+SNAPSHOTS_PAGE_MAX = 200
+ITEMS_PAGE_MAX = 1000
+
+# Empreinte du contenu des snapshots complets, par (id, timestamp) : calculée une fois par processus,
+# un ID réutilisé après une remise à zéro de la base a un autre timestamp donc une autre empreinte
+_snapshot_digests: Dict[Tuple[int, str], str] = {}
+
+async def _snapshot_versions(session: AsyncSession, snapshot_ids: Iterable[int]) -> Optional[List[str]]:
+    """
+    Version de chaque snapshot pour les ETags (id, timestamp, statut, empreinte de ses objets),
+    None si l'un d'eux n'est pas complet (en cours, échec, inconnu) : réponse non cacheable.
+    """
+    snapshot_ids = set(snapshot_ids)
+    snapshots = (await session.exec(select(Snapshot).where(Snapshot.id.in_(snapshot_ids)))).all()
+    if len(snapshots) != len(snapshot_ids) or any(snapshot.status != "completed" for snapshot in snapshots):
+        return None
+    versions = []
+    for snapshot in sorted(snapshots, key=lambda snapshot: snapshot.id):
+        key = (snapshot.id, snapshot.timestamp.isoformat())
+        if key not in _snapshot_digests:
+            # md5 des (type/id=hash) triés, agrégé par Postgres
+            entry = func.concat(SnapshotItem.object_type, "/", SnapshotItem.object_id, "=", SnapshotItem.content_hash)
+            _snapshot_digests[key] = (await session.exec(
+                select(func.md5(func.string_agg(entry, aggregate_order_by(literal_column("','"), SnapshotItem.object_type, SnapshotItem.object_id))))
+                .where(SnapshotItem.snapshot_id == snapshot.id)
+            )).one() or ""
+        versions.append(f"{snapshot.id}@{key[1]}:{snapshot.status}:{_snapshot_digests[key]}")
+    return versions
+
+async def _association_index_version(session: AsyncSession) -> str:
+    """Version de l'index d'associations (incrémentée par le backfill) pour les ETags dérivés des liens."""
+    state = await session.get(IndexVersion, ASSOCIATION_INDEX)
+    return f"{ASSOCIATION_INDEX}:{state.version if state else 0}"
+
+async def _snapshot_cache_headers(request: Request, session: AsyncSession, snapshot_ids: Iterable[int],
+                                  links: bool = False) -> Dict[str, str]:
+    """
+    En-têtes de cache d'une réponse calculée à partir de snapshots : ETag (URL + version des snapshots)
+    et immutable si tous sont complets, no-store sinon. links=True : réponse dérivée de l'index
+    d'associations, qu'un backfill peut enrichir après coup ; ETag versionné, revalidé à chaque usage.
+    """
+    versions = await _snapshot_versions(session, snapshot_ids)
+    if versions is None:
+        return cache_headers(None)
+    if links:
+        versions.append(await _association_index_version(session))
+    return cache_headers(request_etag(request, *versions), immutable=not links)
+
+async def _count_items_by_type(session: AsyncSession, snapshot_id: int) -> dict:
+    """{type: nombre d'objets} d'un snapshot, agrégé par Postgres."""
+    rows = (await session.exec(
+        select(SnapshotItem.object_type, func.count()).where(
+            SnapshotItem.snapshot_id == snapshot_id
+        ).group_by(SnapshotItem.object_type)
+    )).all()
+    return {object_type: count for object_type, count in rows}
+
+_job_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    """File de jobs partagée (Redis, ou fallback en mémoire dans ce processus)."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
+
 # ========================================
 # ENDPOINTS SNAPSHOTS
 # ========================================
 
 @app.get("/snapshots")
-def list_snapshots(
+async def list_snapshots(
+    response: Response,
+    after: Optional[int] = None,
+    limit: Optional[int] = None,
     _start: int = 0,
     _end: int = 10,
     _sort: str = "id",
     _order: str = "DESC",
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    """Liste des snapshots avec pagination (format Refine)"""
-    
-    # Requête de base
-    statement = select(Snapshot)
+    """
+    Liste des snapshots, pagination par curseur (keyset sur l'id) : `after` = dernier id de la
+    page précédente, renvoyé dans l'en-tête X-Next-Cursor. Une page profonde coûte autant que
+    la première. `_start` / `_end` (format Refine) restent acceptés sans curseur.
+    """
+    limit = min(max(limit if limit is not None else _end - _start, 1), SNAPSHOTS_PAGE_MAX)
+    descending = _order.upper() == "DESC"
     
-    # Tri
-    if _order.upper() == "DESC":
-        statement = statement.order_by(Snapshot.id.desc())
-    else:
-        statement = statement.order_by(Snapshot.id.asc())
+    # Requête de base + tri
+    statement = select(Snapshot).order_by(Snapshot.id.desc() if descending else Snapshot.id.asc())
     
     # Pagination
-    total = session.exec(select(func.count()).select_from(Snapshot)).one()
-    snapshots = session.exec(statement.offset(_start).limit(_end - _start)).all()
+    if after is not None:
+        statement = statement.where(Snapshot.id < after if descending else Snapshot.id > after)
+    elif _start:
+        statement = statement.offset(_start)
+    snapshots = (await session.exec(statement.limit(limit + 1))).all()
+    if len(snapshots) > limit:
+        snapshots = snapshots[:limit]
+        response.headers["X-Next-Cursor"] = str(snapshots[-1].id)
+    
+    # Enrichir avec le nombre d'items (une seule requête groupée pour la page)
+    counts = dict((await session.exec(
+        select(SnapshotItem.snapshot_id, func.count()).where(
+            SnapshotItem.snapshot_id.in_([snap.id for snap in snapshots])
+        ).group_by(SnapshotItem.snapshot_id)
+    )).all()) if snapshots else {}
     
-    # Enrichir avec le nombre d'items
     result = []
     for snap in snapshots:
-        count_stmt = select(func.count()).select_from(SnapshotItem).where(
-            SnapshotItem.snapshot_id == snap.id
-        )
-        item_count = session.exec(count_stmt).one()
-        
         result.append({
             "id": snap.id,
             "source": snap.source,
             "status": snap.status,
             "timestamp": snap.timestamp.isoformat() if hasattr(snap.timestamp, 'isoformat') else str(snap.timestamp),
-            "item_count": item_count
+            "item_count": counts.get(snap.id, 0)
         })
     
     return result
 
 @app.get("/snapshots/{id}")
-def get_snapshot(id: int, session: Session = Depends(get_session)):
-    """Détails d'un snapshot"""
+async def get_snapshot(id: int, request: Request, response: Response, session: AsyncSession = Depends(get_session)):
+    """Détails d'un snapshot (immuable, donc cacheable, une fois complet)"""
     
-    snapshot = session.get(Snapshot, id)
+    snapshot = await session.get(Snapshot, id)
     if not snapshot:
         raise HTTPException(status_code=404, detail="Snapshot not found")
     
-    # Compter les items
-    count_stmt = select(func.count()).select_from(SnapshotItem).where(
-        SnapshotItem.snapshot_id == id
-    )
-    item_count = session.exec(count_stmt).one()
-    
-    # Récupérer les items par type
-    items_stmt = select(SnapshotItem).where(SnapshotItem.snapshot_id == id)
-    items = session.exec(items_stmt).all()
+    headers = await _snapshot_cache_headers(request, session, [id])
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    response.headers.update(headers)
     
-    items_by_type = {}
-    for item in items:
-        if item.object_type not in items_by_type:
-            items_by_type[item.object_type] = 0
-        items_by_type[item.object_type] += 1
+    # Compter les items par type
+    items_by_type = await _count_items_by_type(session, id)
     
     return {
         "id": snapshot.id,
         "source": snapshot.source,
         "status": snapshot.status,
         "timestamp": snapshot.timestamp.isoformat() if hasattr(snapshot.timestamp, 'isoformat') else str(snapshot.timestamp),
-        "item_count": item_count,
+        "item_count": sum(items_by_type.values()),
         "items_by_type": items_by_type
     }
 
+@app.get("/snapshots/{id}/items")
+async def list_snapshot_items(
+    id: int,
+    request: Request,
+    response: Response,
+    type: Optional[List[str]] = Query(default=None),
+    after: Optional[str] = None,
+    limit: int = 100,
+    include_content: bool = False,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Objets d'un snapshot, triés par (type, id) et paginés par curseur : `after` = clé "type/id"
+    du dernier objet de la page précédente (champ `next` de la réponse). Le parcours suit l'index
+    (snapshot_id, object_type, object_id) : une page profonde coûte autant que la première.
+
+    Filtres : ?type=contacts&type=deals. include_content=true joint le contenu des blobs,
+    lus en parallèle dans MinIO.
+    """
+    snapshot = await session.get(Snapshot, id)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    
+    headers = await _snapshot_cache_headers(request, session, [id])
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    response.headers.update(headers)
+    
+    limit = min(max(limit, 1), ITEMS_PAGE_MAX)
+    statement = select(SnapshotItem.object_type, SnapshotItem.object_id, SnapshotItem.content_hash).where(
+        SnapshotItem.snapshot_id == id
+    )
+    if type:
+        statement = statement.where(SnapshotItem.object_type.in_(type))
+    if after:
+        after_type, _, after_id = after.partition("/")
+        if not after_id:
+            raise HTTPException(status_code=400, detail="after doit être une clé 'type/id'")
+        statement = statement.where(tuple_(SnapshotItem.object_type, SnapshotItem.object_id) > tuple_(after_type, after_id))
+    rows = (await session.exec(
+        statement.order_by(SnapshotItem.object_type, SnapshotItem.object_id).limit(limit + 1)
+    )).all()
+    
+    page = rows[:limit]
+    items = [{"type": object_type, "id": object_id, "hash": content_hash} for object_type, object_id, content_hash in page]
+    if include_content and items:
+        contents = await storage_manager.aget_many_json([f"blobs/{item['hash']}.json" for item in items])
+        for item, content in zip(items, contents):
+            item["content"] = content
+    
+    return {
+        "snapshot_id": id,
+        "items": items,
+        "next": f"{page[-1][0]}/{page[-1][1]}" if len(rows) > limit else None
+    }
+
+# ========================================
+# ENDPOINTS BLOBS (contenu brut, immuable)
+# ========================================
+
+BLOB_HASH = re.compile(r"^[0-9a-f]{64}$")
+BLOB_BATCH_MAX = 100
+
+def _blob_headers(etag: str) -> Dict[str, str]:
+    """En-têtes de cache d'un contenu adressé par hash (aussi renvoyés avec un 304)."""
+    return {**cache_headers(etag), "Vary": "Accept-Encoding"}
+
+@app.get("/blobs/{content_hash}")
+async def get_blob(content_hash: str, request: Request):
+    """
+    Contenu stocké d'un blob, relayé tel quel depuis MinIO (ni décodage ni ré-encodage JSON),
+    compressé à la volée en zstd / gzip selon Accept-Encoding. Adressé par son hash : immuable.
+    """
+    if not BLOB_HASH.match(content_hash):
+        raise HTTPException(status_code=400, detail="Hash SHA-256 attendu (64 caractères hexadécimaux)")
+    
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    # Un ETag par représentation : le hash du contenu, suffixé de l'encodage
+    etag = f'"{content_hash}"' if encoding == IDENTITY else f'"{content_hash}.{encoding}"'
+    headers = _blob_headers(etag)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    
+    try:
+        stored = await asyncio.to_thread(storage_manager.open_object, f"blobs/{content_hash}.json")
+    except S3Error as e:
+        if e.code == "NoSuchKey":
+            raise HTTPException(status_code=404, detail="Blob not found")
+        raise
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+    elif stored.headers.get("content-length"):
+        headers["Content-Length"] = stored.headers["content-length"]
+    
+    return StreamingResponse(
+        encode_stream(storage_manager.iter_object(stored), encoding),
+        media_type="application/json",
+        headers=headers
+    )
+
+@app.get("/blobs")
+async def get_blobs(request: Request, hashes: List[str] = Query(default=..., alias="hash")):
+    """
+    Plusieurs blobs en une réponse (?hash=...&hash=...) : {"<hash>": <contenu stocké>, ...} (null si absent).
+    Les contenus sont recopiés octet pour octet dans l'objet JSON, lus en parallèle et
+    envoyés dans l'ordre de la requête. Immuable seulement si tous les blobs existent (no-store sinon).
+    """
+    hashes = list(dict.fromkeys(hashes))
+    if len(hashes) > BLOB_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"{BLOB_BATCH_MAX} blobs maximum par requête")
+    invalid = [content_hash for content_hash in hashes if not BLOB_HASH.match(content_hash)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Hashes invalides : {invalid}")
+    
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    # Seule une réponse complète porte un ETag : un If-None-Match qui correspond désigne donc
+    # des blobs tous présents (contenus adressés par hash, jamais supprimés)
+    headers = _blob_headers(make_etag("blobs", encoding, *hashes))
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    
+    # Lecture avant les en-têtes (BLOB_BATCH_MAX borne la mémoire) : un blob absent aujourd'hui
+    # peut exister demain, la réponse ne doit alors pas être mise en cache
+    contents = await asyncio.to_thread(
+        lambda: list(storage_manager.iter_many_bytes([f"blobs/{content_hash}.json" for content_hash in hashes]))
+    )
+    if any(content is None for content in contents):
+        headers = {"Cache-Control": NO_STORE, "Vary": "Accept-Encoding"}
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+    
+    def batch_stream():
+        yield b"{"
+        for index, (content_hash, content) in enumerate(zip(hashes, contents)):
+            yield (b"," if index else b"") + f'"{content_hash}":'.encode("ascii") + (content if content is not None else b"null")
+        yield b"}"
+    
+    return StreamingResponse(encode_stream(batch_stream(), encoding), media_type="application/json", headers=headers)
+
 # ========================================
 # ENDPOINTS DIFF
 # ========================================
 
 @app.get("/diff/{base}/{target}")
-def compare_snapshots(base: int, target: int):
-    """Compare deux snapshots"""
+async def compare_snapshots(base: int, target: int, request: Request, session: AsyncSession = Depends(get_session)):
+    """Compare deux snapshots (inclut le diff des liens : ETag versionné par l'index d'associations, 304 sur If-None-Match)"""
+    
+    headers = await _snapshot_cache_headers(request, session, [base, target], links=True)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
     
     try:
         diff_engine = DiffEngine(base, target)
-        report = diff_engine.generate_report()
+        report = await diff_engine.agenerate_report()
+        associations = await diff_engine.agenerate_association_report(report)
         
-        return {
+        return await _offloaded_json({
             "base": base,
             "target": target,
             "summary": {
                 "created": len(report["created"]),
                 "updated": len(report["updated"]),
-                "deleted": len(report["deleted"])
+                "deleted": len(report["deleted"]),
+                "links_added": associations["summary"]["added"],
+                "links_removed": associations["summary"]["removed"]
             },
             "details": {
                 "created": report["created"],
                 "updated": report["updated"],
                 "deleted": report["deleted"]
-            }
-        }
+            },
+            "associations": associations["pairs"]
+        }, headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/diff/{base}/{target}/associations")
+async def compare_snapshot_associations(base: int, target: int, request: Request, session: AsyncSession = Depends(get_session)):
+    """Liens ajoutés / retirés entre deux snapshots, par paire de types"""
+    
+    headers = await _snapshot_cache_headers(request, session, [base, target], links=True)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    
+    try:
+        associations = await DiffEngine(base, target).agenerate_association_report()
+        return await _offloaded_json({"base": base, "target": target, **associations}, headers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _property_changes(item: dict, old_json: dict, new_json: dict) -> dict:
+    """Update du rapport enrichi des propriétés modifiées {clé: {"old", "new"}}."""
+    p1 = old_json.get('properties', old_json)
+    p2 = new_json.get('properties', new_json)
+    
+    changes = {}
+    for key in set(p1.keys()) | set(p2.keys()):
+        val1, val2 = p1.get(key), p2.get(key)
+        if val1 != val2:
+            changes[key] = {"old": val1, "new": val2}
+    
+    return {**item, "changes": changes}
+
 @app.get("/diff/{base}/{target}/details")
-def compare_snapshots_details(base: int, target: int):
+async def compare_snapshots_details(base: int, target: int, request: Request, session: AsyncSession = Depends(get_session)):
     """Compare deux snapshots avec détails des modifications"""
     
+    headers = await _snapshot_cache_headers(request, session, [base, target])
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    
     try:
-        diff_engine = DiffEngine(base, target)
-        report = diff_engine.generate_report()
+        report = await DiffEngine(base, target).agenerate_report()
         
-        # Enrichir les updates avec les détails
-        detailed_updates = []
-        for item in report["updated"]:
-            # Récupérer les JSONs
-            old_json = storage_manager.get_json(f"blobs/{item['old_hash']}.json")
-            new_json = storage_manager.get_json(f"blobs/{item['new_hash']}.json")
-            
-            p1 = old_json.get('properties', old_json)
-            p2 = new_json.get('properties', new_json)
-            
-            # Calculer les changements
-            changes = {}
-            for key in set(p1.keys()) | set(p2.keys()):
-                val1, val2 = p1.get(key), p2.get(key)
-                if val1 != val2:
-                    changes[key] = {"old": val1, "new": val2}
-            
-            detailed_updates.append({
-                **item,
-                "changes": changes
-            })
+        # Récupérer les JSONs (lectures MinIO parallèles et bornées, hors de la boucle)
+        paths = [f"blobs/{item[key]}.json" for item in report["updated"] for key in ("old_hash", "new_hash")]
+        blobs = await storage_manager.aget_many_json(paths)
         
-        return {
+        # Calculer les changements
+        detailed_updates = await asyncio.to_thread(lambda: [
+            _property_changes(item, blobs[2 * index], blobs[2 * index + 1])
+            for index, item in enumerate(report["updated"])
+        ])
+        
+        return await _offloaded_json({
             "base": base,
             "target": target,
             "summary": {
@@ -179,73 +452,341 @@ def compare_snapshots_details(base: int, target: int):
                 "updated": detailed_updates,
                 "deleted": report["deleted"]
             }
-        }
+        }, headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ========================================
+# ENDPOINTS GRAPHE (AS-OF)
+# ========================================
+
+@app.get("/graph/{object_type}/{object_id}")
+async def get_entity_as_of(object_type: str, object_id: str, as_of: Optional[int] = None, session: AsyncSession = Depends(get_session)):
+    """Version et relations d'une entité telles qu'au snapshot `as_of` (dernier snapshot complet par défaut)."""
+    if as_of is None:
+        as_of = (await session.exec(
+            select(func.max(Snapshot.id)).where(Snapshot.status == "completed")
+        )).one()
+        if as_of is None:
+            raise HTTPException(status_code=404, detail="Aucun snapshot complet")
+
+    graph = AsyncGraphReader()
+    version, relations = await asyncio.gather(
+        graph.get_entity_version(object_type, object_id, as_of),
+        graph.get_entity_relations(object_type, object_id, as_of)
+    )
+    if version is None:
+        raise HTTPException(status_code=404, detail=f"{object_type}/{object_id} absent au snapshot {as_of}")
+
+    return {
+        "entity": {"type": object_type, "id": object_id},
+        "as_of": as_of,
+        "version": version,
+        "relations": relations
+    }
+
+@app.get("/graph/{object_type}/{object_id}/history")
+async def get_entity_history(object_type: str, object_id: str):
+    """Versions successives d'une entité avec leurs intervalles [from_snap, to_snap)."""
+    history = await AsyncGraphReader().get_entity_history(object_type, object_id)
+    if not history:
+        raise HTTPException(status_code=404, detail=f"{object_type}/{object_id} inconnu du graphe")
+    return {"entity": {"type": object_type, "id": object_id}, "versions": history}
+
+# ========================================
+# ENDPOINTS GRAPHE CSR (PAR SNAPSHOT)
+# ========================================
+
+async def _snapshot_graph_response(
+    request: Request,
+    session: AsyncSession,
+    snapshot_id: int,
+    query: Callable[[SnapshotGraph], Optional[dict]],
+    missing: str = None
+):
+    """
+    Réponse d'une requête sur le graphe CSR d'un snapshot : 304 si le client l'a déjà
+    (snapshot complet, index d'associations inchangé), sinon construction / lecture du graphe
+    et calcul dans un thread.
+    """
+    headers = await _snapshot_cache_headers(request, session, [snapshot_id], links=True)
+    cached = not_modified(request, headers)
+    if cached:
+        return cached
+    result = await asyncio.to_thread(lambda: query(get_snapshot_graph(snapshot_id)))
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"{missing} absent du graphe du snapshot {snapshot_id}")
+    return JSONResponse(result, headers=headers)
+
+@app.get("/snapshots/{snapshot_id}/graph/stats")
+async def get_snapshot_graph_stats(snapshot_id: int, request: Request, session: AsyncSession = Depends(get_session)):
+    """Taille du graphe d'associations en mémoire (construit et mis en cache au premier appel)."""
+    return await _snapshot_graph_response(request, session, snapshot_id, lambda graph: graph.stats())
+
+@app.get("/snapshots/{snapshot_id}/graph/orphans")
+async def get_snapshot_orphans(snapshot_id: int, request: Request, object_type: Optional[str] = None, session: AsyncSession = Depends(get_session)):
+    """Objets sans association et entités liées absentes du snapshot."""
+    return await _snapshot_graph_response(request, session, snapshot_id, lambda graph: graph.orphans(object_type))
+
+@app.get("/snapshots/{snapshot_id}/graph/expand")
+async def expand_graph_node(snapshot_id: int, node: str, type: str, request: Request, offset: int = 0, limit: int = 50, session: AsyncSession = Depends(get_session)):
+    """Suite paginée des voisins d'un nœud (curseur {"node", "type", "offset"} renvoyé par /neighborhood)."""
+    return await _snapshot_graph_response(
+        request, session, snapshot_id,
+        lambda graph: graph.expand(node, type, offset=max(offset, 0), limit=min(max(limit, 1), 500)),
+        missing=node
+    )
+
+@app.get("/snapshots/{snapshot_id}/graph/{object_type}/{object_id}/neighborhood")
+async def get_graph_neighborhood(
+    snapshot_id: int,
+    object_type: str,
+    object_id: str,
+    request: Request,
+    depth: int = 1,
+    max_nodes: int = 200,
+    per_type: int = 50,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Voisinage borné d'un objet pour la vue graphe (templates/graph_view.html).
+    Format compact : nœuds [clé "type/id", présent dans le snapshot], arêtes [source, cible], curseurs d'expansion.
+    """
+    if not 1 <= depth <= 3:
+        raise HTTPException(status_code=400, detail="depth doit être compris entre 1 et 3")
+    return await _snapshot_graph_response(
+        request, session, snapshot_id,
+        lambda graph: graph.neighborhood(
+            object_type, object_id, depth=depth,
+            max_nodes=min(max(max_nodes, 1), 2000), per_type=min(max(per_type, 1), 500)
+        ),
+        missing=f"{object_type}/{object_id}"
+    )
+
+@app.get("/graph-view", response_class=HTMLResponse)
+def graph_view():
+    """Vue graphe interactive (?snapshot=N&type=companies&id=123)."""
+    return HTMLResponse(GRAPH_VIEW_TEMPLATE.read_text(encoding="utf-8"))
+
+@app.get("/snapshots/{snapshot_id}/graph/{object_type}/{object_id}/blast-radius")
+async def get_blast_radius(snapshot_id: int, object_type: str, object_id: str, request: Request, depth: int = 2, max_nodes: int = 10000, session: AsyncSession = Depends(get_session)):
+    """Entités atteintes en `depth` sauts depuis un objet (que toucherait sa restauration ?)."""
+    if not 1 <= depth <= 6:
+        raise HTTPException(status_code=400, detail="depth doit être compris entre 1 et 6")
+    return await _snapshot_graph_response(
+        request, session, snapshot_id,
+        lambda graph: graph.blast_radius(object_type, object_id, depth, max_nodes=max_nodes),
+        missing=f"{object_type}/{object_id}"
+    )
+
+@app.get("/snapshots/{snapshot_id}/graph/{object_type}/{object_id}/component")
+async def get_connected_component(snapshot_id: int, object_type: str, object_id: str, request: Request, limit: int = 1000, session: AsyncSession = Depends(get_session)):
+    """Composante connexe d'un objet (taille et membres, tronqués à `limit`)."""
+    return await _snapshot_graph_response(
+        request, session, snapshot_id,
+        lambda graph: graph.component(object_type, object_id, limit=limit),
+        missing=f"{object_type}/{object_id}"
+    )
+
 # ========================================
 # ENDPOINTS RESTORE
 # ========================================
 
+@app.post("/restore/execute")
+def execute_restore_plan(
+    plan: dict = Body(...),
+    policy: str = "skip-unsafe",
+    batch: bool = False
+):
+    """Exécute un plan de restauration approuvé (sans intervention)"""
+    
+    if policy == "interactive":
+        raise HTTPException(status_code=400, detail="La politique 'interactive' n'est pas disponible via l'API")
+    try:
+        restore_engine = RestoreEngine(snapshot_id=plan["snapshot_id"])
+        report = restore_engine.execute_plan(plan, policy=policy, batch=batch)
+        
+        return {
+            "snapshot_id": plan["snapshot_id"],
+            "success": True,
+            "report": report
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/restore/resume/{restore_id}")
+def resume_restore(restore_id: int, policy: Optional[str] = None):
+    """
+    Reprend une restauration interrompue depuis son journal.
+    `policy` (skip-unsafe / force) remplace la politique enregistrée ; une restauration
+    lancée en 'interactive' (CLI) ne peut pas reprendre sans elle.
+    """
+    if policy is not None and policy not in ("skip-unsafe", "force"):
+        raise HTTPException(status_code=400, detail="policy doit valoir 'skip-unsafe' ou 'force'")
+    
+    try:
+        report = RestoreEngine.resume_restore(restore_id, policy=policy, non_interactive=True)
+        return {
+            "restore_id": restore_id,
+            "success": True,
+            "report": report
+        }
+    except InteractivePolicyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/restore/{snapshot_id}/plan")
+def plan_restore(
+    snapshot_id: int,
+    skip_checks: bool = False,
+    selective: bool = True
+):
+    """Calcule un plan de restauration sérialisable (aucune écriture CRM)"""
+    
+    try:
+        restore_engine = RestoreEngine(snapshot_id=snapshot_id)
+        return restore_engine.build_restore_plan("selective" if selective else "full", with_checks=not skip_checks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/restore/{snapshot_id}")
 def restore_snapshot(
     snapshot_id: int,
     skip_checks: bool = False,
-    selective: bool = True
+    selective: bool = True,
+    batch: bool = False,
+    policy: str = "skip-unsafe"
 ):
-    """Restaure un snapshot"""
+    """Restaure un snapshot (plan + exécution, sans prompt)"""
     
+    if policy == "interactive":
+        raise HTTPException(status_code=400, detail="La politique 'interactive' n'est pas disponible via l'API")
     try:
         restore_engine = RestoreEngine(snapshot_id=snapshot_id)
-        
-        if selective:
-            report = restore_engine.run_smart_restore_selective(skip_checks=skip_checks)
-        else:
-            report = restore_engine.run_smart_restore(skip_checks=skip_checks)
+        plan = restore_engine.build_restore_plan("selective" if selective else "full", with_checks=not skip_checks)
+        report = restore_engine.execute_plan(plan, policy="force" if skip_checks else policy, batch=batch)
         
         return {
             "snapshot_id": snapshot_id,
             "success": True,
             "report": report
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ========================================
+# ENDPOINTS JOBS (sync / restore en arrière-plan)
+# ========================================
+
+def _submit_job(kind: str, **params):
+    try:
+        job_id = get_job_queue().submit(kind, **params)
+    except PortalBusyError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "active_job_id": e.job_id})
+    return {"job_id": job_id, "status": "queued"}
+
+@app.post("/jobs/sync", status_code=202)
+def submit_sync_job(partitions: Optional[int] = None):
+    """Lance une synchronisation en arrière-plan (partitions > 0 : extraction parallèle)"""
+    return _submit_job("sync", partitions=partitions)
+
+@app.post("/jobs/restore/{snapshot_id}", status_code=202)
+def submit_restore_job(
+    snapshot_id: int,
+    skip_checks: bool = False,
+    selective: bool = True,
+    batch: bool = False,
+    policy: str = "skip-unsafe"
+):
+    """Lance une restauration en arrière-plan (plan + exécution, sans prompt)"""
+    if policy == "interactive":
+        raise HTTPException(status_code=400, detail="La politique 'interactive' n'est pas disponible via l'API")
+    return _submit_job("restore", snapshot_id=snapshot_id, selective=selective, skip_checks=skip_checks, batch=batch, policy=policy)
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Statut complet d'un job"""
+    job = get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/progress")
+def get_job_progress(job_id: str):
+    """Progression d'un job"""
+    job = get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job_id, "status": job["status"], "progress": job.get("progress", {})}
+
+# Intervalle de scrutation du flux d'événements (secondes)
+JOB_EVENTS_POLL_INTERVAL = 0.5
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[int] = Header(default=None)):
+    """
+    Flux SSE (text/event-stream) de la progression d'un job.
+    Reprise après déconnexion via l'en-tête Last-Event-ID ; le flux se ferme à la fin du job.
+    Générateur async : un client abonné n'immobilise pas un thread du threadpool pendant tout le job.
+    """
+    queue = get_job_queue()
+    if not await asyncio.to_thread(queue.get, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        cursor = last_event_id or 0
+        while True:
+            events = await asyncio.to_thread(queue.get_events, job_id, after=cursor)
+            for event in events:
+                cursor = event["seq"]
+                yield f"id: {cursor}\nevent: {event.get('event', 'progress')}\ndata: {json.dumps(event, default=str)}\n\n"
+            job = await asyncio.to_thread(queue.get, job_id)
+            if not job or job["status"] in ("completed", "failed"):
+                if job:
+                    yield f"event: end\ndata: {json.dumps({'status': job['status'], 'result': job.get('result'), 'error': job.get('error')}, default=str)}\n\n"
+                return
+            if not events:
+                # Commentaire SSE : garde la connexion ouverte derrière les proxies
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ========================================
 # ENDPOINTS STATS
 # ========================================
 
 @app.get("/stats")
-def get_stats(session: Session = Depends(get_session)):
+async def get_stats(session: AsyncSession = Depends(get_session)):
     """Statistiques globales"""
     
     # Nombre total de snapshots
-    total_snapshots = session.exec(select(func.count()).select_from(Snapshot)).one()
+    total_snapshots = (await session.exec(select(func.count()).select_from(Snapshot))).one()
     
     # Dernier snapshot
-    latest_snapshot = session.exec(
+    latest_snapshot = (await session.exec(
         select(Snapshot).order_by(Snapshot.id.desc())
-    ).first()
+    )).first()
     
     # Nombre total d'items dans le dernier snapshot
-    total_items = 0
-    items_by_type = {}
-    
-    if latest_snapshot:
-        items_stmt = select(SnapshotItem).where(
-            SnapshotItem.snapshot_id == latest_snapshot.id
-        )
-        items = session.exec(items_stmt).all()
-        
-        for item in items:
-            total_items += 1
-            if item.object_type not in items_by_type:
-                items_by_type[item.object_type] = 0
-            items_by_type[item.object_type] += 1
+    items_by_type = await _count_items_by_type(session, latest_snapshot.id) if latest_snapshot else {}
     
     return {
         "total_snapshots": total_snapshots,
-        "total_items": total_items,
+        "total_items": sum(items_by_type.values()),
         "items_by_type": items_by_type,
         "latest_snapshot": {
             "id": latest_snapshot.id,
@@ -257,8 +798,10 @@ def get_stats(session: Session = Depends(get_session)):
 # HEALTH CHECK
 # ========================================
 
+# Endpoints sans I/O : exécutés dans la boucle, ils répondent même quand le threadpool est saturé
+
 @app.get("/")
-def root():
+async def root():
     return {
         "name": "Zibridge API",
         "version": "1.0.0",
@@ -266,5 +809,10 @@ def root():
     }
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+async def health_check():
+    return {"status": "healthy"}
+
+@app.get("/metrics/http")
+async def get_http_metrics():
+    """Latence, retries et rate-limits par endpoint HubSpot (transport de ce processus)"""
+    return get_transport().metrics()
\ No newline at end of file
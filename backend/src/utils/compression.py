@@ -0,0 +1,56 @@
+import zlib
+from typing import Iterable, Iterator, Optional
+
+import zstandard
+
+# Encodages proposés, par ordre de préférence du serveur à poids égal côté client
+SUPPORTED_ENCODINGS = ("zstd", "gzip")
+IDENTITY = "identity"
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """
+    Encodage de réponse selon Accept-Encoding (poids q, joker '*') : "zstd", "gzip" ou "identity".
+    """
+    if not accept_encoding:
+        return IDENTITY
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    weight_of = lambda encoding: weights.get(encoding, weights.get("*", 0.0))
+    # max garde le premier ex aequo : l'ordre de SUPPORTED_ENCODINGS départage
+    best = max(SUPPORTED_ENCODINGS, key=weight_of)
+    return best if weight_of(best) > 0 else IDENTITY
+
+
+def _compressor(encoding: str):
+    if encoding == "gzip":
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    raise ValueError(f"Encodage non supporté : {encoding}")
+
+
+def encode_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compresse un flux d'octets à la volée ; "identity" : les chunks passent tels quels."""
+    if encoding == IDENTITY:
+        yield from chunks
+        return
+    compressor = _compressor(encoding)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -9,14 +9,21 @@ class PostgresSettings(BaseSettings):
     db: str = Field(alias="POSTGRES_DB")
     host: str = Field(alias="POSTGRES_HOST")
     port: int = Field(alias="POSTGRES_PORT")
+    # Pool de connexions (partagé par les engines sync et async de chaque processus)
+    pool_size: int = Field(default=10, alias="POSTGRES_POOL_SIZE")
+    max_overflow: int = Field(default=20, alias="POSTGRES_MAX_OVERFLOW")
+    pool_timeout: float = Field(default=10.0, alias="POSTGRES_POOL_TIMEOUT")
+    pool_recycle: int = Field(default=1800, alias="POSTGRES_POOL_RECYCLE")
     
     # On dit à chaque sous-classe de lire aussi le .env
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 class Neo4jSettings(BaseSettings):
-    uri: str = Field(alias="NEO4J_URI")
-    user: str = Field(alias="NEO4J_USER")
-    password: str = Field(alias="NEO4J_PASSWORD")
+    # Neo4j est un sink de visualisation optionnel : la restauration s'appuie sur l'index Postgres
+    enabled: bool = Field(default=True, alias="NEO4J_ENABLED")
+    uri: str = Field(default="bolt://localhost:7687", alias="NEO4J_URI")
+    user: str = Field(default="neo4j", alias="NEO4J_USER")
+    password: str = Field(default="", alias="NEO4J_PASSWORD")
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 class MinioSettings(BaseSettings):
@@ -24,6 +31,26 @@ class MinioSettings(BaseSettings):
     root_user: str = Field(alias="MINIO_ROOT_USER")
     root_password: str = Field(alias="MINIO_ROOT_PASSWORD")
     bucket: str = Field(alias="MINIO_BUCKET")
+    # Lectures de blobs simultanées côté API (≤ pool urllib3 du client MinIO)
+    read_concurrency: int = Field(default=10, alias="MINIO_READ_CONCURRENCY")
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+class RedisSettings(BaseSettings):
+    host: str = Field(default="localhost", alias="REDIS_HOST")
+    port: int = Field(default=6379, alias="REDIS_PORT")
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+class HttpSettings(BaseSettings):
+    # Transport HubSpot : pool de connexions, timeouts et retries
+    connect_timeout: float = Field(default=5.0, alias="HUBSPOT_CONNECT_TIMEOUT")
+    read_timeout: float = Field(default=30.0, alias="HUBSPOT_READ_TIMEOUT")
+    max_retries: int = Field(default=5, alias="HUBSPOT_MAX_RETRIES")
+    backoff_base: float = Field(default=0.5, alias="HUBSPOT_BACKOFF_BASE")
+    backoff_max: float = Field(default=30.0, alias="HUBSPOT_BACKOFF_MAX")
+    pool_size: int = Field(default=10, alias="HUBSPOT_POOL_SIZE")
+    # Extraction parallèle (0 = pagination séquentielle) et limite de l'API search HubSpot
+    extract_partitions: int = Field(default=0, alias="HUBSPOT_EXTRACT_PARTITIONS")
+    search_rate: float = Field(default=4.0, alias="HUBSPOT_SEARCH_RATE")
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 class Settings(BaseSettings):
@@ -32,9 +59,17 @@ class Settings(BaseSettings):
     postgres: PostgresSettings = PostgresSettings()
     neo4j: Neo4jSettings = Neo4jSettings()
     minio: MinioSettings = MinioSettings()
+    redis: RedisSettings = RedisSettings()
+    http: HttpSettings = HttpSettings()
     
     # HubSpot Token (directement dans la classe parente pour simplifier)
     hubspot_access_token: Optional[str] = Field(default=None, alias="HUBSPOT_ACCESS_TOKEN")
+    # Racine de l'API (ex. http://localhost:8090 pour le simulateur local)
+    hubspot_api_base: str = Field(default="https://api.hubapi.com", alias="HUBSPOT_API_BASE")
+    # Identifiant du portail HubSpot (un seul job sync/restore à la fois par portail)
+    hubspot_portal_id: str = Field(default="default", alias="HUBSPOT_PORTAL_ID")
+    # Durée de cache du schéma des propriétés HubSpot (secondes)
+    hubspot_schema_ttl: int = Field(default=3600, alias="HUBSPOT_SCHEMA_TTL")
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -1,21 +1,40 @@
+import asyncio
 import json
 import io
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, Iterator, List, Optional
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session 
-from neo4j import GraphDatabase
+from sqlmodel.ext.asyncio.session import AsyncSession
+from neo4j import AsyncGraphDatabase, GraphDatabase
 from minio import Minio
+from minio.error import S3Error
+import redis
 from loguru import logger
 
 from src.utils.config import settings
 
 # --- POSTGRES ---
 postgres_url = f"postgresql://{settings.postgres.user}:{settings.postgres.password}@{settings.postgres.host}:{settings.postgres.port}/{settings.postgres.db}"
-engine = create_engine(postgres_url)
+pool_options = {
+    "pool_size": settings.postgres.pool_size,
+    "max_overflow": settings.postgres.max_overflow,
+    "pool_timeout": settings.postgres.pool_timeout,
+    # Connexions recyclées avant les coupures côté serveur / proxy, vérifiées avant usage
+    "pool_recycle": settings.postgres.pool_recycle,
+    "pool_pre_ping": True,
+}
+engine = create_engine(postgres_url, **pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine async (asyncpg) des endpoints FastAPI : une requête en attente de Postgres ne bloque
+# ni la boucle d'événements ni un thread du threadpool
+async_engine = create_async_engine(postgres_url.replace("postgresql://", "postgresql+asyncpg://", 1), **pool_options)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 @contextmanager
 def get_db_session() -> Generator[Session, None, None]:  
     session = SessionLocal()
@@ -34,6 +53,12 @@ neo4j_driver = GraphDatabase.driver(
     auth=(settings.neo4j.user, settings.neo4j.password)
 )
 
+# Driver async : lectures du graphe depuis les endpoints FastAPI
+async_neo4j_driver = AsyncGraphDatabase.driver(
+    settings.neo4j.uri,
+    auth=(settings.neo4j.user, settings.neo4j.password)
+)
+
 @contextmanager
 def get_neo4j_session():
     session = neo4j_driver.session()
@@ -77,5 +102,63 @@ class StorageManager:
             response.close()
             response.release_conn()
 
+    def open_object(self, path: str):
+        """Réponse HTTP brute de MinIO (lecture en flux via iter_object). Lève S3Error si absent."""
+        return self.client.get_object(self.bucket, path)
+
+    @staticmethod
+    def iter_object(response, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Octets stockés, par chunks, sans décodage ; libère la connexion à la fin du flux."""
+        try:
+            yield from response.stream(chunk_size)
+        finally:
+            response.close()
+            response.release_conn()
+
+    def get_bytes(self, path: str) -> Optional[bytes]:
+        """Octets stockés tels quels (None si l'objet n'existe pas)."""
+        try:
+            response = self.open_object(path)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            raise
+        return b"".join(self.iter_object(response))
+
+    def iter_many_bytes(self, paths: List[str]) -> Iterator[Optional[bytes]]:
+        """get_bytes d'une liste, dans l'ordre : les lectures suivantes sont préchargées en parallèle."""
+        with ThreadPoolExecutor(max_workers=settings.minio.read_concurrency) as pool:
+            yield from pool.map(self.get_bytes, paths)
+
+    async def aget_json(self, path: str) -> dict:
+        """get_json hors de la boucle d'événements (le client MinIO est bloquant)."""
+        return await asyncio.to_thread(self.get_json, path)
+
+    async def aget_many_json(self, paths: List[str], concurrency: int = None) -> List[dict]:
+        """Lectures parallèles et bornées (MINIO_READ_CONCURRENCY), dans l'ordre de `paths`."""
+        semaphore = asyncio.Semaphore(concurrency or settings.minio.read_concurrency)
+
+        async def read(path: str) -> dict:
+            async with semaphore:
+                return await self.aget_json(path)
+
+        return await asyncio.gather(*(read(path) for path in paths))
+
 # On instancie l'objet unique
-storage_manager = StorageManager()
\ No newline at end of file
+storage_manager = StorageManager()
+
+# --- REDIS (file de jobs) ---
+def get_redis_client():
+    """Client Redis si le serveur répond, sinon None (fallback en mémoire côté appelant)."""
+    client = redis.Redis(
+        host=settings.redis.host,
+        port=settings.redis.port,
+        decode_responses=True,
+        socket_connect_timeout=2
+    )
+    try:
+        client.ping()
+        return client
+    except redis.exceptions.RedisError as e:
+        logger.warning(f"⚠️ Redis indisponible ({e}) : fallback en mémoire")
+        return None
@@ -0,0 +1,57 @@
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+# Réponses figées (snapshot complet, blob, diff entre snapshots complets) : cache navigateur / proxy d'un an
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Réponses dérivées d'un index qui peut encore être enrichi (liens) : gardées, revalidées par ETag
+REVALIDATE = "no-cache"
+# Snapshot en cours : jamais mis en cache
+NO_STORE = "no-store"
+
+# À incrémenter quand le format d'une réponse change : invalide les ETags déjà distribués
+ETAG_VERSION = "1"
+
+
+def make_etag(*parts) -> str:
+    """ETag fort dérivé des identifiants de la ressource (IDs de snapshots, hash de contenu...)."""
+    digest = hashlib.sha256("|".join(str(part) for part in (ETAG_VERSION, *parts)).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def request_etag(request: Request, *versions) -> str:
+    """
+    ETag d'une réponse déterminée par l'URL (chemin + paramètres triés) et par la version des données
+    lues : un snapshot seul (ID réutilisable après une remise à zéro) ne suffit pas à l'identifier.
+    """
+    return make_etag(request.url.path, *sorted(request.query_params.multi_items()), *versions)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible de If-None-Match (RFC 9110 §13.1.2) : liste d'ETags ou '*'."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def cache_headers(etag: Optional[str], immutable: bool = True) -> Dict[str, str]:
+    """
+    En-têtes de cache : ETag + immutable pour une ressource figée, ETag + revalidation pour une
+    ressource stable qui peut encore changer, no-store sans ETag (ressource en cours).
+    """
+    if etag is None:
+        return {"Cache-Control": NO_STORE}
+    return {"ETag": etag, "Cache-Control": IMMUTABLE if immutable else REVALIDATE}
+
+
+def not_modified(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """
+    304 si le client possède déjà la représentation (If-None-Match), sinon None.
+    À appeler avant tout calcul : une ressource en cache ne coûte alors aucune requête en base.
+    """
+    etag = headers.get("ETag")
+    if etag and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return None
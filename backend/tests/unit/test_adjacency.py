@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from src.core.adjacency import SnapshotGraph
+
+
+@pytest.fixture
+def graph() -> SnapshotGraph:
+    """
+    companies 1, 2 ; contacts 10, 11, 12 ; deals 100 (et 99, lié mais absent du snapshot)
+
+        company 1 ── contact 10 ── deal 100 ── company 2
+        company 1 ── contact 11 ── deal 99 (absent)
+        contact 12 : isolé
+
+    Comme dans load(), les sources des arêtes sont des objets du snapshot ; seules les cibles peuvent manquer.
+    """
+    ids = lambda *values: np.array(values, dtype=np.int64)
+    nodes = {"companies": ids(1, 2), "contacts": ids(10, 11, 12), "deals": ids(100)}
+    edges = {
+        ("contacts", "companies"): (ids(10, 11, 10), ids(1, 1, 1)),  # doublon 10-1 dédoublonné
+        ("deals", "contacts"): (ids(100,), ids(10,)),
+        ("contacts", "deals"): (ids(11,), ids(99,)),
+        ("deals", "companies"): (ids(100,), ids(2,)),
+    }
+    return SnapshotGraph(1, nodes, edges)
+
+
+def test_csr_is_undirected_and_deduplicated(graph):
+    assert graph.edge_count == 5
+    contact = graph.node("contacts", "10")
+    assert sorted(graph.key(n) for n in graph.neighbors(contact)) == ["companies/1", "deals/100"]
+    assert graph.node("contacts", "13") is None
+
+
+def test_k_hop_counts_per_hop(graph):
+    nodes, per_hop, truncated = graph.k_hop([graph.node("companies", "1")], depth=2)
+
+    assert per_hop == [2, 2]
+    assert sorted(graph.key(n) for n in nodes) == ["contacts/10", "contacts/11", "deals/100", "deals/99"]
+    assert not truncated
+
+
+def test_k_hop_truncates_at_max_nodes(graph):
+    nodes, per_hop, truncated = graph.k_hop([graph.node("companies", "1")], depth=3, max_nodes=3)
+
+    assert len(nodes) == 3
+    assert truncated
+
+
+def test_blast_radius_separates_missing_entities(graph):
+    radius = graph.blast_radius("contacts", "11", depth=1)
+
+    assert radius["nodes"] == {"companies": ["1"]}
+    assert radius["missing"] == {"deals": ["99"]}
+    assert graph.blast_radius("contacts", "404") is None
+
+
+def test_components_and_orphans(graph):
+    component = graph.component("companies", "2")
+
+    assert component["size"] == 6
+    assert graph.component("contacts", "12")["size"] == 1
+    assert graph.orphans() == {"isolated": {"contacts": ["12"]}, "dangling": {"deals": ["99"]}}
+    assert graph.orphans("companies") == {"isolated": {}, "dangling": {}}
+
+
+def test_reach_counts_touched_and_missing(graph):
+    assert graph.reach([("contacts", "11")], depth=2) == {
+        "depth": 2, "touched": {"companies": 1, "contacts": 1}, "missing": {"deals": 1}
+    }
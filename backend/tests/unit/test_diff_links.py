@@ -0,0 +1,47 @@
+from src.core.diff import DiffEngine
+
+
+def pair_links(changes, links) -> dict:
+    return DiffEngine(1, 2)._pair_links(changes, links)
+
+
+def test_link_seen_from_both_ends_is_counted_once():
+    # Contact 1 rattaché à la company 9 : le lien apparaît dans les deux blobs modifiés
+    changes = [("contacts", "1", "c1-old", "c1-new"), ("companies", "9", "co9-old", "co9-new")]
+    links = {"c1-new": {"companies": {9}}, "co9-new": {"contacts": {1}}}
+
+    report = pair_links(changes, links)
+
+    assert report["pairs"] == {"companies→contacts": {"added": [["9", "1"]], "removed": []}}
+    assert report["summary"] == {"added": 1, "removed": 0, "objects": 2}
+
+
+def test_moved_contact_reports_added_and_removed_links():
+    changes = [("contacts", "1", "old", "new")]
+    links = {"old": {"companies": {10}}, "new": {"companies": {20}}}
+
+    report = pair_links(changes, links)
+
+    assert report["pairs"] == {"companies→contacts": {"added": [["20", "1"]], "removed": [["10", "1"]]}}
+    assert report["summary"]["added"] == 1
+    assert report["summary"]["removed"] == 1
+
+
+def test_created_and_deleted_objects():
+    changes = [("deals", "5", None, "d5"), ("deals", "6", "d6", None)]
+    links = {"d5": {"contacts": {1}, "companies": {9}}, "d6": {"companies": {9}}}
+
+    report = pair_links(changes, links)
+
+    assert report["pairs"] == {
+        "companies→deals": {"added": [["9", "5"]], "removed": [["9", "6"]]},
+        "contacts→deals": {"added": [["1", "5"]], "removed": []},
+    }
+    assert report["summary"] == {"added": 2, "removed": 1, "objects": 2}
+
+
+def test_unchanged_links_are_not_reported():
+    changes = [("contacts", "1", "old", "new")]
+    links = {"old": {"companies": {9}}, "new": {"companies": {9}}}
+
+    assert pair_links(changes, links) == {"pairs": {}, "summary": {"added": 0, "removed": 0, "objects": 0}}
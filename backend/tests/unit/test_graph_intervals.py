@@ -0,0 +1,69 @@
+from scripts.migrate_graph_intervals import compute_intervals, relation_intervals
+
+SNAPS = [1, 2, 3, 4, 5]
+
+
+def test_consecutive_identical_versions_merge():
+    assert compute_intervals({1: "a", 2: "a", 3: "b", 4: "b", 5: "b"}, SNAPS) == [
+        {"hash": "a", "from_snap": 1, "to_snap": 3},
+        {"hash": "b", "from_snap": 3, "to_snap": None},
+    ]
+
+
+def test_absence_closes_the_interval():
+    assert compute_intervals({2: "a", 4: "a"}, SNAPS) == [
+        {"hash": "a", "from_snap": 2, "to_snap": 3},
+        {"hash": "a", "from_snap": 4, "to_snap": 5},
+    ]
+
+
+def test_entity_unseen_before_its_creation():
+    assert compute_intervals({3: "a", 4: "a", 5: "a"}, SNAPS) == [{"hash": "a", "from_snap": 3, "to_snap": None}]
+
+
+def test_failed_snapshots_are_skipped():
+    # Snapshot 3 en échec (absent de la liste) : l'entité qui n'y figure pas reste valide
+    assert compute_intervals({1: "a", 2: "a", 4: "a"}, [1, 2, 4, 5]) == [
+        {"hash": "a", "from_snap": 1, "to_snap": 5},
+    ]
+
+
+def test_relation_follows_links_of_each_version():
+    versions = [{"hash": "a", "from_snap": 1, "to_snap": 3}, {"hash": "b", "from_snap": 3, "to_snap": None}]
+    blobs = {"a": {"_zibridge_links": {"companies": ["10"]}}, "b": {"_zibridge_links": {"companies": ["20"]}}}
+
+    intervals = relation_intervals("contacts", versions, blobs, legacy=[])
+
+    assert sorted(intervals, key=lambda interval: interval["related_id"]) == [
+        {"rel_type": "WORKS_AT", "related_type": "companies", "related_id": "10", "from_snap": 1, "to_snap": 3},
+        {"rel_type": "WORKS_AT", "related_type": "companies", "related_id": "20", "from_snap": 3, "to_snap": None},
+    ]
+
+
+def test_legacy_link_format_is_read():
+    versions = [{"hash": "a", "from_snap": 1, "to_snap": None}]
+    blobs = {"a": {"_zibridge_links": {"company_id": 10}}}
+
+    assert relation_intervals("contacts", versions, blobs, legacy=[]) == [
+        {"rel_type": "WORKS_AT", "related_type": "companies", "related_id": "10", "from_snap": 1, "to_snap": None},
+    ]
+
+
+def test_gap_between_versions_closes_relations():
+    versions = [{"hash": "a", "from_snap": 1, "to_snap": 2}, {"hash": "a", "from_snap": 4, "to_snap": None}]
+    blobs = {"a": {"_zibridge_links": {"companies": ["10"]}}}
+
+    intervals = relation_intervals("contacts", versions, blobs, legacy=[])
+
+    assert [(interval["from_snap"], interval["to_snap"]) for interval in intervals] == [(1, 2), (4, None)]
+
+
+def test_without_stored_links_legacy_relations_cover_the_lifetime():
+    versions = [{"hash": "a", "from_snap": 2, "to_snap": 3}, {"hash": "b", "from_snap": 3, "to_snap": 5}]
+
+    intervals = relation_intervals("contacts", versions, {"a": {}, "b": {}}, legacy=[("companies", "10"), ("deals", "7")])
+
+    # contacts → deals n'est pas une relation sortante du graphe : ignorée
+    assert intervals == [
+        {"rel_type": "WORKS_AT", "related_type": "companies", "related_id": "10", "from_snap": 2, "to_snap": 5},
+    ]
@@ -0,0 +1,35 @@
+from fastapi import Request
+
+from src.utils.http_cache import IMMUTABLE, NO_STORE, REVALIDATE, cache_headers, etag_matches, request_etag
+
+
+def make_request(path: str, query: str = "") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": []})
+
+
+def test_request_etag_depends_on_snapshot_version():
+    request = make_request("/snapshots/3")
+
+    before_reset = request_etag(request, "3@2026-01-01T00:00:00:completed:abc")
+    after_reset = request_etag(request, "3@2026-03-01T00:00:00:completed:def")
+
+    assert before_reset != after_reset
+    assert request_etag(request, "3@2026-01-01T00:00:00:completed:abc") == before_reset
+
+
+def test_request_etag_ignores_query_order():
+    assert request_etag(make_request("/snapshots/3/items", "type=a&limit=5"), "v") == \
+        request_etag(make_request("/snapshots/3/items", "limit=5&type=a"), "v")
+
+
+def test_cache_headers_policies():
+    assert cache_headers(None) == {"Cache-Control": NO_STORE}
+    assert cache_headers('"e"') == {"ETag": '"e"', "Cache-Control": IMMUTABLE}
+    assert cache_headers('"e"', immutable=False) == {"ETag": '"e"', "Cache-Control": REVALIDATE}
+
+
+def test_etag_matches_weak_and_lists():
+    assert etag_matches('W/"a", "b"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"')
+    assert not etag_matches(None, '"a"')
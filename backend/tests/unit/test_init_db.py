@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from scripts import init_db
+from src.core.models import Snapshot
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[Snapshot.__table__])
+    monkeypatch.setattr(init_db, "engine", engine)
+    return engine
+
+
+def add(db, *snapshots):
+    with Session(db) as session:
+        session.add_all(Snapshot(source="hubspot", status=status, timestamp=datetime.utcnow() - age) for status, age in snapshots)
+        session.commit()
+
+
+def statuses(db) -> list:
+    with Session(db) as session:
+        return [snapshot.status for snapshot in session.exec(select(Snapshot).order_by(Snapshot.id)).all()]
+
+
+def test_legacy_snapshots_before_first_tracked_sync_are_completed(db):
+    old = timedelta(days=30)
+    add(db, ("pending", old), ("pending", old), ("failed", old), ("pending", timedelta(days=2)), ("pending", timedelta(0)))
+
+    assert init_db.mark_legacy_snapshots_completed() == 2
+    # Après le premier snapshot suivi : un crash ou une sync en cours, jamais migrés
+    assert statuses(db) == ["completed", "completed", "failed", "pending", "pending"]
+
+
+def test_without_tracked_sync_recent_snapshot_is_left_pending(db):
+    add(db, ("pending", timedelta(days=30)), ("pending", timedelta(minutes=5)))
+
+    assert init_db.mark_legacy_snapshots_completed() == 1
+    assert statuses(db) == ["completed", "pending"]
+
+
+def test_migration_is_idempotent(db):
+    add(db, ("pending", timedelta(days=30)), ("completed", timedelta(days=1)))
+
+    init_db.mark_legacy_snapshots_completed()
+
+    assert init_db.mark_legacy_snapshots_completed() == 0
+    assert statuses(db) == ["completed", "completed"]
@@ -0,0 +1,131 @@
+import time
+
+import pytest
+
+from src.core import jobs
+from src.core.jobs import PORTAL_LOCK_KEY, JobQueue, LocalRedis, PortalBusyError
+
+
+def wait_for(queue: JobQueue, job_id: str, timeout: float = 5.0) -> dict:
+    """Attend la fin d'un job exécuté dans le processus."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} toujours {queue.get(job_id)['status']}")
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Remplace les handlers sync/restore (aucun accès HubSpot / base)."""
+    def sync(ctx, partitions=None):
+        ctx.progress(phase="extract", done=3)
+        return {"snapshot_id": 42, "partitions": partitions}
+
+    def restore(ctx, **params):
+        raise RuntimeError("HubSpot indisponible")
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "sync", sync)
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "restore", restore)
+
+
+@pytest.fixture
+def redis_queue():
+    """File en mode Redis (LocalRedis joue le serveur) avec un worker vivant."""
+    queue = JobQueue(client=LocalRedis(), portal="portal-1")
+    queue.in_process = False
+    queue.heartbeat("worker-1")
+    return queue
+
+
+def test_enqueue_claim_progress_result(handlers, redis_queue):
+    job_id = redis_queue.submit("sync", partitions=4)
+    assert redis_queue.get(job_id)["status"] == "queued"
+    assert redis_queue.get(job_id)["params"] == {"partitions": 4}
+
+    assert redis_queue.claim(timeout=1) == job_id
+    redis_queue.run_job(job_id)
+
+    job = redis_queue.get(job_id)
+    assert job["status"] == "completed"
+    assert job["result"] == {"snapshot_id": 42, "partitions": 4}
+    assert job["progress"]["phase"] == "extract"
+    assert job["progress"]["done"] == 3
+    assert redis_queue.client.get(PORTAL_LOCK_KEY.format(portal="portal-1")) is None
+
+
+def test_claim_times_out_on_empty_queue(redis_queue):
+    assert redis_queue.claim(timeout=1) is None
+
+
+def test_second_submit_for_same_portal_is_rejected(handlers, redis_queue):
+    job_id = redis_queue.submit("sync")
+
+    with pytest.raises(PortalBusyError) as busy:
+        redis_queue.submit("restore", snapshot_id=1)
+
+    assert busy.value.job_id == job_id
+    assert busy.value.portal == "portal-1"
+
+
+def test_other_portal_is_not_blocked(handlers, redis_queue):
+    redis_queue.submit("sync")
+    other = JobQueue(client=redis_queue.client, portal="portal-2")
+    other.in_process = False
+
+    assert other.submit("sync")
+
+
+def test_lock_released_when_job_fails(handlers, redis_queue):
+    job_id = redis_queue.submit("restore", snapshot_id=1)
+    redis_queue.run_job(redis_queue.claim(timeout=1))
+
+    job = redis_queue.get(job_id)
+    assert job["status"] == "failed"
+    assert "HubSpot indisponible" in job["error"]
+    assert redis_queue.client.get(PORTAL_LOCK_KEY.format(portal="portal-1")) is None
+    assert redis_queue.submit("sync")
+
+
+def test_in_process_queue_runs_job(handlers):
+    queue = JobQueue(client=LocalRedis(), portal="portal-1")
+
+    job = wait_for(queue, queue.submit("sync"))
+
+    assert queue.in_process
+    assert job["status"] == "completed"
+
+
+def test_without_worker_job_runs_in_process(handlers):
+    queue = JobQueue(client=LocalRedis(), portal="portal-1")
+    queue.in_process = False
+
+    assert not queue.workers_alive()
+    job = wait_for(queue, queue.submit("sync"))
+
+    assert job["status"] == "completed"
+    assert queue.claim(timeout=1) is None
+
+
+def test_lock_expires_without_heartbeat(handlers, redis_queue, monkeypatch):
+    monkeypatch.setattr(jobs, "PORTAL_LOCK_TTL", 1)
+    redis_queue.submit("sync")
+
+    time.sleep(1.1)
+
+    assert redis_queue.submit("sync")
+
+
+def test_heartbeat_extends_queued_job_lock(handlers, redis_queue, monkeypatch):
+    monkeypatch.setattr(jobs, "PORTAL_LOCK_TTL", 1)
+    job_id = redis_queue.submit("sync")
+
+    for _ in range(3):
+        time.sleep(0.5)
+        redis_queue.heartbeat("worker-1")
+
+    with pytest.raises(PortalBusyError):
+        redis_queue.submit("sync")
+    assert redis_queue.claim(timeout=1) == job_id
@@ -0,0 +1,146 @@
+import pytest
+
+from src.connectors.base import ExtractionError
+from src.connectors.rest_api import RestApiConnector
+from src.core.restore import RestoreEngine
+
+
+class FakeConnector:
+    """État live du CRM en mémoire : {id: propriétés} et {(type lié, id): [ids liés]}."""
+
+    clean_properties = RestApiConnector.clean_properties
+
+    def __init__(self, records: dict, links: dict, fail_read: bool = False):
+        self.records = records
+        self.links = links
+        self.fail_read = fail_read
+        self.association_reads = []
+
+    def batch_read(self, object_type, ids, properties):
+        if self.fail_read:
+            raise ExtractionError(object_type, "batch read : HTTP 502")
+        return {item_id: {"id": item_id, "properties": self.records[item_id]} for item_id in ids if item_id in self.records}
+
+    def batch_read_associations(self, from_type, to_type, ids):
+        self.association_reads.append((from_type, to_type, list(ids)))
+        return {item_id: self.links.get((to_type, item_id), []) for item_id in ids}
+
+
+class FakeIdMapping:
+    def __init__(self, mapping: dict = None):
+        self.mapping = mapping or {}
+
+    def get(self, key, default=None):
+        return self.mapping.get(key, default)
+
+    def resolve(self, object_type, old_id):
+        return self.get(f"{object_type}/{old_id}", old_id)
+
+
+class FakeAssociations:
+    def __init__(self, relations: dict = None):
+        self.relations = relations or {}
+
+    def get_relations_bulk(self, snapshot_id, entities):
+        return {(object_type, ext_id): self.relations.get((object_type, ext_id), {}) for object_type, ext_id in entities}
+
+
+class FakeGraph:
+    enabled = False
+
+
+def make_engine(connector, mapping=None, relations=None) -> RestoreEngine:
+    """RestoreEngine sans services : seuls les collaborateurs du pré-vol sont branchés."""
+    engine = RestoreEngine.__new__(RestoreEngine)
+    engine.snapshot_id = 1
+    engine.connector = connector
+    engine.id_mapping = FakeIdMapping(mapping)
+    engine.associations = FakeAssociations(relations)
+    engine.graph = FakeGraph()
+    return engine
+
+
+def contact(firstname: str, **links) -> dict:
+    item = {"properties": {"firstname": firstname, "email": f"{firstname}@acme.io"}}
+    if links:
+        item["_zibridge_links"] = links
+    return item
+
+
+def test_identical_properties_and_links_are_skipped():
+    connector = FakeConnector({"1": {"firstname": "Ada", "email": "Ada@acme.io"}}, {("companies", "1"): ["10"]})
+    engine = make_engine(connector)
+
+    to_push, relink = engine._drop_identical("contacts", {"1": contact("Ada", companies=["10"])})
+
+    assert to_push == {}
+    assert relink == {}
+
+
+def test_link_only_change_keeps_suture_without_patch():
+    # Le contact est passé de la company 10 à la company 20 : propriétés inchangées
+    connector = FakeConnector({"1": {"firstname": "Ada", "email": "Ada@acme.io"}}, {("companies", "1"): ["20"]})
+    engine = make_engine(connector)
+    item = contact("Ada", companies=["10"])
+
+    to_push, relink = engine._drop_identical("contacts", {"1": item})
+
+    assert to_push == {}
+    assert relink == {"1": item}
+
+
+def test_extra_live_links_are_not_a_difference():
+    connector = FakeConnector({"1": {"firstname": "Ada", "email": "Ada@acme.io"}}, {("companies", "1"): ["10", "20"]})
+    engine = make_engine(connector)
+
+    to_push, relink = engine._drop_identical("contacts", {"1": contact("Ada", companies=["10"])})
+
+    assert (to_push, relink) == ({}, {})
+
+
+def test_changed_properties_are_pushed():
+    connector = FakeConnector({"1": {"firstname": "Grace", "email": "Ada@acme.io"}}, {("companies", "1"): ["10"]})
+    engine = make_engine(connector)
+    item = contact("Ada", companies=["10"])
+
+    to_push, relink = engine._drop_identical("contacts", {"1": item})
+
+    assert to_push == {"1": item}
+    assert relink == {}
+
+
+def test_indexed_links_follow_recreated_ids():
+    # Company 10 recréée en 99 : le lien attendu est vers 99, lu sur le contact 2 (ancien 1)
+    connector = FakeConnector({"2": {"firstname": "Ada", "email": "Ada@acme.io"}}, {("companies", "2"): ["99"]})
+    engine = make_engine(
+        connector,
+        mapping={"contacts/1": "2", "companies/10": "99"},
+        relations={("contacts", "1"): {"companies": ["10"]}},
+    )
+
+    to_push, relink = engine._drop_identical("contacts", {"1": contact("Ada")})
+
+    assert (to_push, relink) == ({}, {})
+    assert connector.association_reads == [("contacts", "companies", ["2"])]
+
+
+def test_missing_object_is_pushed():
+    connector = FakeConnector({}, {})
+    engine = make_engine(connector)
+    item = contact("Ada", companies=["10"])
+
+    to_push, relink = engine._drop_identical("contacts", {"1": item})
+
+    assert to_push == {"1": item}
+    assert connector.association_reads == []
+
+
+@pytest.mark.parametrize("items", [{"1": contact("Ada")}, {}])
+def test_unreadable_live_state_pushes_everything(items):
+    connector = FakeConnector({"1": {"firstname": "Ada", "email": "Ada@acme.io"}}, {}, fail_read=True)
+    engine = make_engine(connector)
+
+    to_push, relink = engine._drop_identical("contacts", items)
+
+    assert to_push == items
+    assert relink == {}
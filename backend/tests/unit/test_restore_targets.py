@@ -0,0 +1,66 @@
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.core import diff, restore
+from src.core.models import Snapshot
+from src.core.restore import RestoreEngine
+
+
+@pytest.fixture
+def snapshots(monkeypatch):
+    """Table Snapshot en SQLite mémoire, branchée à la place de l'engine Postgres."""
+    db = create_engine("sqlite://")
+    SQLModel.metadata.create_all(db, tables=[Snapshot.__table__])
+    monkeypatch.setattr(restore, "engine", db)
+
+    def add(*statuses):
+        with Session(db) as session:
+            session.add_all(Snapshot(source="hubspot", status=status) for status in statuses)
+            session.commit()
+
+    return add
+
+
+@pytest.fixture
+def diffs(monkeypatch):
+    """Remplace DiffEngine : enregistre les paires comparées, rapport vide."""
+    compared = []
+
+    class FakeDiffEngine:
+        def __init__(self, old_id, new_id):
+            compared.append((old_id, new_id))
+
+        def generate_report(self):
+            return {"created": [], "updated": [], "deleted": [{"type": "contacts", "id": "1", "hash": "h1"}]}
+
+    monkeypatch.setattr(diff, "DiffEngine", FakeDiffEngine)
+    return compared
+
+
+def make_engine(snapshot_id: int) -> RestoreEngine:
+    engine = RestoreEngine.__new__(RestoreEngine)
+    engine.snapshot_id = snapshot_id
+    return engine
+
+
+def test_selective_diff_ignores_failed_and_pending_snapshots(snapshots, diffs):
+    snapshots("completed", "completed", "failed", "pending")
+
+    targets = make_engine(1)._collect_targets("selective", ["contacts"])
+
+    assert diffs == [(1, 2)]
+    assert targets == [{"type": "contacts", "id": "1", "hash": "h1"}]
+
+
+def test_selective_target_is_latest_completed(snapshots, diffs):
+    snapshots("completed", "failed")
+
+    assert make_engine(1)._collect_targets("selective", ["contacts"]) == []
+    assert diffs == []
+
+
+def test_selective_without_completed_snapshot_fails(snapshots, diffs):
+    snapshots("pending", "failed")
+
+    with pytest.raises(ValueError, match="Aucun snapshot complet"):
+        make_engine(1)._collect_targets("selective", ["contacts"])
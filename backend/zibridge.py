@@ -1,6 +1,4 @@
 import typer
-import subprocess
-import sys
 from loguru import logger
 from rich.console import Console
 from rich.table import Table
@@ -10,6 +8,8 @@ import warnings
 # Imports internes
 from src.core.diff import DiffEngine
 from src.core.restore import RestoreEngine
+from src.core.plan import POLICIES, save_plan, load_plan
+from src.core.jobs import JobQueue, PortalBusyError, run_worker
 from src.utils.db import engine, storage_manager
 from src.core.models import Snapshot, SnapshotItem
 
@@ -20,24 +20,62 @@ app = typer.Typer(help="🚀 Zibridge CLI - Système de Versioning pour CRM")
 console = Console()
 
 @app.command()
-def sync():
+def sync(
+    background: bool = typer.Option(False, "--background", "-b", help="Envoyer la synchronisation à la file de jobs"),
+    parallel: int = typer.Option(None, "--parallel", help="Extraction parallèle en N partitions d'IDs (0 = séquentielle)")
+):
     """Capture l'état actuel du CRM et crée un nouveau Snapshot."""
+    if background:
+        try:
+            queue = JobQueue()
+            if queue.in_process or not queue.workers_alive():
+                console.print("[yellow]⚠️ Redis ou worker indisponible : le job s'exécute dans ce processus.[/yellow]")
+            job_id = queue.submit("sync", partitions=parallel)
+            console.print(f"[bold green]🧾 Job de synchronisation en file : {job_id}[/bold green]")
+            console.print(f"[dim]Suivi : python zibridge.py job {job_id}[/dim]")
+        except PortalBusyError as e:
+            console.print(f"[bold yellow]⏳ {e}[/bold yellow]")
+        return
+
     console.print("[bold green]🔄 Lancement de la synchronisation globale...[/bold green]")
     try:
-        import os
-        # On ajoute le dossier actuel au PYTHONPATH pour que 'src' soit trouvé
-        env = os.environ.copy()
-        env["PYTHONPATH"] = os.getcwd() 
-
-        subprocess.run(
-            [sys.executable, "scripts/run_sync.py"], 
-            check=True, 
-            env=env  # On passe l'environnement mis à jour
-        )
+        from scripts.run_sync import sync_all
+        sync_all(partitions=parallel)
         console.print("[bold green]✨ Synchronisation terminée avec succès ![/bold green]")
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         console.print(f"[bold red]❌ Erreur lors de la synchronisation : {e}[/bold red]")
 
+@app.command()
+def worker(
+    processes: int = typer.Option(1, "--processes", "-p", help="Nombre de processus workers")
+):
+    """👷 Lance des workers qui exécutent les jobs sync/restore de la file Redis."""
+    if processes <= 1:
+        run_worker()
+        return
+    import multiprocessing
+    workers = [multiprocessing.Process(target=run_worker, daemon=True) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    console.print(f"[bold green]👷 {processes} workers démarrés[/bold green]")
+    for process in workers:
+        process.join()
+
+@app.command()
+def job(job_id: str):
+    """🧾 Affiche le statut et la progression d'un job."""
+    state = JobQueue().get(job_id)
+    if not state:
+        console.print(f"[bold red]❌ Job {job_id} introuvable[/bold red]")
+        raise typer.Exit(code=1)
+    console.print(f"[bold]Job {job_id}[/bold] ({state['kind']}) : [cyan]{state['status']}[/cyan]")
+    for key, value in state.get("progress", {}).items():
+        console.print(f"  • {key} : {value}")
+    if state.get("error"):
+        console.print(f"[red]Erreur : {state['error']}[/red]")
+    if state.get("result"):
+        console.print(f"Résultat : {state['result']}")
+
 @app.command()
 def status():
     """Affiche la liste des Snapshots avec le nombre d'objets contenus."""
@@ -118,10 +156,26 @@ def diff(base: int, target: int):
 
 @app.command()
 def restore(
-    snap_id: int, 
-    only: str = typer.Option(None, "--only", "-o", help="Cibler un objet (ex: 'companies/123')")
+    snap_id: int = typer.Argument(None, help="Snapshot à restaurer"),
+    only: str = typer.Option(None, "--only", "-o", help="Cibler un objet (ex: 'companies/123')"),
+    resume: int = typer.Option(None, "--resume", help="Reprendre une restauration interrompue (restore_id)")
 ):
     """Restaure les données du CRM vers un état passé (méthode classique)."""
+    if resume is not None:
+        console.print(f"[bold blue]📒 Reprise de la restauration #{resume}...[/bold blue]")
+        try:
+            report = RestoreEngine.resume_restore(resume)
+            console.print(f"\n[bold green]🏁 Restauration #{resume} terminée ![/bold green]")
+            console.print(f"📒 Déjà faits : {report.get('resumed', 0)}")
+            print_restore_report(report)
+        except Exception as e:
+            console.print(f"[bold red]❌ Erreur critique de restauration : {e}[/bold red]")
+        return
+
+    if snap_id is None:
+        console.print("[bold red]❌ Indiquez un snapshot (ou --resume <restore_id>).[/bold red]")
+        raise typer.Exit(code=1)
+
     target_msg = f"le Snap #{snap_id}" if not only else f"l'objet {only}"
     
     if not typer.confirm(f"⚠️ Êtes-vous sûr de vouloir écraser les données actuelles par {target_msg} ?"):
@@ -136,6 +190,8 @@ def restore(
         )
         console.print(f"\n[bold green]🏁 Rollback terminé ![/bold green]")
         console.print(f"✅ Succès : {report['success']} | ❌ Échecs : {report['failed']}")
+        if report.get("restore_id"):
+            console.print(f"[dim]📒 Journal : #{report['restore_id']} (reprise : python zibridge.py restore --resume {report['restore_id']})[/dim]")
     except Exception as e:
         console.print(f"[bold red]❌ Erreur critique de restauration : {e}[/bold red]")
 
@@ -143,7 +199,10 @@ def restore(
 def smart_restore(
     snap_id: int,
     selective: bool = typer.Option(True, "--selective/--full", help="Mode sélectif (uniquement changements) ou complet"),
-    skip_checks: bool = typer.Option(False, "--skip-checks", help="Ignorer les vérifications de cohérence")
+    skip_checks: bool = typer.Option(False, "--skip-checks", help="Ignorer les vérifications de cohérence"),
+    batch: bool = typer.Option(False, "--batch", help="Utiliser les endpoints batch HubSpot (100 objets/appel)"),
+    index_source: str = typer.Option("auto", "--index-source", help="Source de l'index CRM actuel : auto, live ou snapshot"),
+    index_max_age: int = typer.Option(300, "--index-max-age", help="Fraîcheur max (s) de l'index CRM actuel")
 ):
     """
     🧠 Restauration intelligente avec Auto-Suture des associations.
@@ -162,6 +221,7 @@ def smart_restore(
     - Restauration sélective (défaut): python zibridge.py smart-restore 10
     - Restauration complète: python zibridge.py smart-restore 10 --full
     - Sans vérifications: python zibridge.py smart-restore 10 --skip-checks
+    - Mode batch (gros rollbacks): python zibridge.py smart-restore 10 --batch
     """
     
     mode = "SÉLECTIVE (uniquement changements)" if selective else "COMPLÈTE (tout le snapshot)"
@@ -174,41 +234,82 @@ def smart_restore(
     console.print("[dim]Ordre: Companies → Contacts → Deals[/dim]\n")
     
     try:
-        restore_engine = RestoreEngine(snapshot_id=snap_id)
+        restore_engine = RestoreEngine(snapshot_id=snap_id, index_source=index_source, index_max_age=index_max_age)
         
         if selective:
             # Mode sélectif : restaure uniquement les changements
-            report = restore_engine.run_smart_restore_selective(skip_checks=skip_checks)
+            report = restore_engine.run_smart_restore_selective(skip_checks=skip_checks, batch=batch)
         else:
             # Mode complet : restaure tout
-            report = restore_engine.run_smart_restore(skip_checks=skip_checks)
+            report = restore_engine.run_smart_restore(skip_checks=skip_checks, batch=batch)
         
         console.print(f"\n[bold green]🎉 Restauration Intelligente terminée ![/bold green]")
         
-        if selective and 'skipped' in report:
-            console.print(f"""
-[bold]Résumé :[/bold]
-✅ Succès : {report.get('success', 0)}
-✨ Ressuscités : {report.get('resurrected', 0)}
-🔀 Fusionnés : {report.get('merged', 0)}
-😴 Ignorés (identiques) : {report.get('skipped', 0)}
-⚠️ Alertes : {report.get('warnings', 0)}
-❌ Échecs : {report.get('failed', 0)}
-            """)
-        else:
-            console.print(f"""
+        print_restore_report(report)
+        
+    except Exception as e:
+        console.print(f"[bold red]❌ Erreur critique : {e}[/bold red]")
+        import traceback
+        console.print(traceback.format_exc())
+
+def print_restore_report(report: dict):
+    """Affiche le résumé d'une restauration."""
+    console.print(f"""
 [bold]Résumé :[/bold]
 ✅ Succès : {report.get('success', 0)}
 ✨ Ressuscités : {report.get('resurrected', 0)}
 🔀 Fusionnés : {report.get('merged', 0)}
+😴 Déjà identiques : {report.get('identical', 0)}
+⏭️ Ignorés (à risque) : {report.get('skipped', 0)}
 ⚠️ Alertes : {report.get('warnings', 0)}
 ❌ Échecs : {report.get('failed', 0)}
-            """)
-        
+    """)
+
+@app.command()
+def plan(
+    snap_id: int,
+    selective: bool = typer.Option(True, "--selective/--full", help="Mode sélectif (uniquement changements) ou complet"),
+    skip_checks: bool = typer.Option(False, "--skip-checks", help="Ignorer l'analyse d'impact"),
+    output: str = typer.Option(None, "--output", "-o", help="Fichier du plan (défaut : restore_plan_<id>.json)")
+):
+    """
+    📋 Calcule un plan de restauration (objets, opérations, ordre, alertes, coût API) sans rien écrire.
+    
+    Le plan peut être relu puis exécuté sans intervention avec 'apply'.
+    """
+    try:
+        restore_engine = RestoreEngine(snapshot_id=snap_id)
+        restore_plan = restore_engine.build_restore_plan("selective" if selective else "full", with_checks=not skip_checks)
+        restore_engine.display_plan_summary(restore_plan)
+        path = save_plan(restore_plan, output or f"restore_plan_{snap_id}.json")
+        console.print(f"\n[bold green]📋 Plan enregistré : {path}[/bold green]")
+        console.print(f"[dim]Exécution : python zibridge.py apply {path} --policy skip-unsafe[/dim]")
+    except Exception as e:
+        console.print(f"[bold red]❌ Erreur lors du calcul du plan : {e}[/bold red]")
+
+@app.command()
+def apply(
+    plan_file: str,
+    policy: str = typer.Option("skip-unsafe", "--policy", help=f"Politique : {', '.join(POLICIES)}"),
+    batch: bool = typer.Option(False, "--batch", help="Utiliser les endpoints batch HubSpot (100 objets/appel)"),
+    skip_identical: bool = typer.Option(True, "--skip-identical/--push-all", help="Ignorer les objets déjà identiques dans le CRM"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Ne pas demander de confirmation")
+):
+    """🚀 Exécute un plan de restauration approuvé (sans prompt par objet)."""
+    restore_plan = load_plan(plan_file)
+    summary = restore_plan["summary"]
+    if not yes and not typer.confirm(
+        f"⚠️ Exécuter le plan ({summary['total']} objets, {summary['unsafe']} à risque) vers le Snap #{restore_plan['snapshot_id']} avec policy={policy} ?"
+    ):
+        raise typer.Abort()
+
+    try:
+        restore_engine = RestoreEngine(snapshot_id=restore_plan["snapshot_id"])
+        report = restore_engine.execute_plan(restore_plan, policy=policy, batch=batch, skip_identical=skip_identical)
+        console.print("\n[bold green]🎉 Plan exécuté ![/bold green]")
+        print_restore_report(report)
     except Exception as e:
         console.print(f"[bold red]❌ Erreur critique : {e}[/bold red]")
-        import traceback
-        console.print(traceback.format_exc())
 
 if __name__ == "__main__":
     app()
\ No newline at end of file